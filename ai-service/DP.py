@@ -1,7 +1,9 @@
 # DP.py
-import json
-import time
-from logger_config import ai_logger, log_api_call, log_error
+from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from prompt_layout import build_messages
+from schemas import POLICY_RESULT
+from status_encoder import encode_status
 
 POLICY_SELECTION_PROMPT = """
 당신은 제한된 시간 안에 문진대화를 수행하는 정신과 의사입니다.
@@ -116,65 +118,120 @@ JSON 형태로 답변해주세요:
 }
 """
 
+# 정책 선택에 영향을 주는 문항 필드 (DST 이후 이 값들이 바뀌지 않으면 이전 상태로 선택한 정책을 그대로 사용)
+POLICY_RELEVANT_FIELDS = ("status",)
 
-def select_policy(intent, user_message, history, client, message_count, updated_status=None, selected_policies=None, conversation_style=None):
+# 정책 선택 프롬프트에 포함할 문항 필드 (rawUserInput 등 누적되는 필드는 제외)
+STATUS_FIELDS = ("questionText", "status", "experience", "frequency", "condition", "conflict")
+
+
+def policy_relevant_changes(previous_status, updated_status):
+    """
+    DST 전후 상태를 비교하여 정책 선택에 영향을 주는 필드가 바뀐 문항 ID 목록을 반환하는 함수
+
+    Args:
+        previous_status (dict): DST 실행 전 상태
+        updated_status (dict): DST 실행 후 상태
+
+    Returns:
+        list: POLICY_RELEVANT_FIELDS 중 하나라도 값이 바뀐 questionId 목록
+    """
+    previous_questions = {q.get('questionId'): q for q in (previous_status or {}).get('questions', [])}
+    changed = []
+    for question in (updated_status or {}).get('questions', []):
+        before = previous_questions.get(question.get('questionId'), {})
+        if any(before.get(field) != question.get(field) for field in POLICY_RELEVANT_FIELDS):
+            changed.append(question.get('questionId'))
+    return changed
+
+
+def select_policy_by_rules(intent, updated_status=None):
+    """
+    GPT 호출 없이 의도와 문항 상태만으로 정책을 선택하는 함수 (턴 예산이 부족할 때 DP 대신 사용)
+
+    우선순위: 질문/주제 이탈 의도 → 모순(conflict) 문항 확인 → 답변 중인 문항(asking/checking) 보충 → 새 문항 질문 → 문진 완료 안내
+
+    Args:
+        intent (dict): NLU 결과
+        updated_status (dict): DST 이후 상태
+
+    Returns:
+        dict: select_policy와 같은 형식의 정책
+    """
+    intent = intent.get('intent', 'unknown')
+    policy = {"first_policy": "empathize", "second_policy": None, "next_question": None, "is_completed": False, "is_finished": False}
+
+    if intent == "question":
+        policy["first_policy"] = "answer_question"
+        return policy
+    if intent == "off_topic":
+        policy["first_policy"] = "handle_off_topic"
+        return policy
+
+    questions = (updated_status or {}).get('questions', [])
+    if not questions:
+        return policy
+    for status, first_policy in (("conflict", "check_conflict"), ("asking", "ask_frequency"),
+                                 ("checking", "clarify_symptom"), ("unanswered", "ask_new_symptom")):
+        question = next((q for q in questions if q.get('status') == status), None)
+        if question is not None:
+            policy["first_policy"] = first_policy
+            policy["next_question"] = question.get('questionId')
+            return policy
+
+    policy["first_policy"] = "announce_completion"
+    policy["is_completed"] = True
+    return policy
+
+
+async def select_policy(intent, user_message, history, client, message_count, updated_status=None, selected_policies=None, conversation_style=None):
     """NLU 결과를 바탕으로 대화 정책을 선택하는 함수"""
     ai_logger.info("🎯 정책 선택 중...")
     intent = intent.get('intent', 'unknown')
     
     # 이전에 선택된 정책들을 문자열로 변환
-    policies_history = ""
+    policies_history = ", ".join(selected_policies) if selected_policies else "없음"
     if selected_policies:
-        policies_history = f"\n이전에 선택된 정책들: {', '.join(selected_policies)}"
-        ai_logger.info(f"📋 이전 정책 선택 이력: {', '.join(selected_policies)}")
+        ai_logger.info(f"📋 이전 정책 선택 이력: {policies_history}")
     
-    context_text = f"현재 상태:{updated_status}\n대화 히스토리:\n{history}\n현재 사용자 메시지: {user_message}\n의도 분석 결과:{intent}\n이전 대화 정책:{policies_history}\n대화 스타일:{conversation_style}"
+    # 세션 동안 고정된 값 → 뒤에만 추가되는 대화 히스토리 → 턴마다 바뀌는 값 순서로 배치 (프롬프트 캐시 적중 구간 확보)
+    messages = build_messages(POLICY_SELECTION_PROMPT, [
+        ("대화 스타일", conversation_style),
+        ("대화 히스토리", history),
+        ("이전 대화 정책", policies_history),
+        ("현재 상태", encode_status(updated_status, STATUS_FIELDS)),
+        ("의도 분석 결과", intent),
+        ("현재 사용자 메시지", user_message)
+    ])
     
-    messages = [
-        {"role": "system", "content": POLICY_SELECTION_PROMPT},
-        {"role": "user", "content": context_text}
-    ]
-    
-    max_retries = 3
-    retry_delay = 1  # 초
-    
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                ai_logger.info(f"🔄 정책 선택 재시도 {attempt}/{max_retries}")
-                time.sleep(retry_delay * attempt)  # 재시도 시 대기 시간 증가
-            
-            log_api_call("gpt-5-chat-latest", "policy_selection", attempt + 1)
-            response = client.chat.completions.create(
-                model="gpt-5-chat-latest",
-                messages=messages,
-                max_tokens=50,
-                temperature=0.5
-            )
-            
-            result_text = response.choices[0].message.content.strip()        
-            policy_result = json.loads(result_text)
-            
-            # 선택된 정책들을 추출하여 로깅
-            selected_policies_list = []
-            if policy_result.get('first_policy'):
-                selected_policies_list.append(policy_result['first_policy'])
-            if policy_result.get('second_policy'):
-                selected_policies_list.append(policy_result['second_policy'])
-            
-            ai_logger.info(f"📊 정책 선택 결과: {policy_result}")
-            ai_logger.info(f"🎯 이번에 선택된 정책들: {', '.join(selected_policies_list) if selected_policies_list else '없음'}")
-            ai_logger.info("----------------------------------------------------------")
-            return policy_result
-            
-        except Exception as e:
-            ai_logger.warning(f"⚠️ 정책 선택 시도 {attempt + 1} 실패: {str(e)}")
-            if attempt == max_retries - 1:
-                log_error("정책 선택 최종 실패", e)
-                return {
-                    "first_policy": "failed",
-                    "second_policy": "failed",
-                    "next_question": "failed",
-                    "reason": "failed"
-                }
-            continue
\ No newline at end of file
+    try:
+        policy_result = await call_llm(
+            client, "dp", "policy_selection",
+            parse=POLICY_RESULT.parse,
+            model="gpt-5-chat-latest",
+            messages=messages,
+            max_tokens=50,
+            temperature=0.5,
+            **POLICY_RESULT.request_options()
+        )
+
+        # 선택된 정책들을 추출하여 로깅
+        selected_policies_list = []
+        if policy_result.get('first_policy'):
+            selected_policies_list.append(policy_result['first_policy'])
+        if policy_result.get('second_policy'):
+            selected_policies_list.append(policy_result['second_policy'])
+
+        ai_logger.info(f"📊 정책 선택 결과: {policy_result}")
+        ai_logger.info(f"🎯 이번에 선택된 정책들: {', '.join(selected_policies_list) if selected_policies_list else '없음'}")
+        ai_logger.info("----------------------------------------------------------")
+        return policy_result
+
+    except Exception as e:
+        log_error("정책 선택 최종 실패", e)
+        return {
+            "first_policy": "failed",
+            "second_policy": "failed",
+            "next_question": "failed",
+            "reason": "failed"
+        }
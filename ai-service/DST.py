@@ -1,101 +1,102 @@
 # DST.py (Dialogue State Tracking)
 import json
-import copy
-import time
-from logger_config import ai_logger, log_api_call, log_error
+import os
+from dialogue_state import apply_updates
+from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from metrics import increment_counter
+from NLU import normalize_message
+from prompt_layout import build_messages
+from schemas import SYMPTOM_UPDATES
+from status_encoder import encode_status
 
 # 증상 분석 프롬프트 (Chain-of-Thought 방식)
+# status, rawUserInput, updated는 dialogue_state의 규칙으로 결정하므로 GPT는 문항별 변경사항만 반환
 SYMPTOM_ANALYSIS_PROMPT = """
 당신은 신중한 정신의학 전문가입니다. 
-챗봇의 직전 질문과 사용자의 현재 발화를 분석하여 주어진 문진표 내의 우울 및 불안 관련 증상을 추출하고 업데이트해주세요.
-
-현재 문항 상태:
-{questions_info}
+챗봇의 직전 질문과 사용자의 현재 발화를 분석하여 주어진 문진표 내의 우울 및 불안 관련 증상을 추출하고, 이번 발화로 바뀐 내용만 반환해주세요.
 
 INSTRUCTIONS:
 1. 현재 사용자 발화에서 증상 관련 표현을 찾으세요
 2. 각 증상이 우울 및 불안의 증상으로 명확한지 판단하세요
-3. 아래 데이터 구조에 맞게 정보를 업데이트하고 반환하세요
-4. rawUserInput에 챗봇의 발화의 내용을 포함하지 마세요
+3. 이번 발화와 관련된 문항만, 이번 발화로 새로 알게 된 필드만 아래 데이터 구조로 반환하세요
+4. 챗봇의 발화 내용을 사용자의 답변으로 간주하지 마세요
 
 DATA STRUCTURE:
 - questionId: 해당 문항 ID (Q1~Q10)
-- questionText: 실제 문항 텍스트 
 - experience: 사용자가 해당 증상을 경험하고 있는지 여부 ("yes", "no", "unknown")
     - yes: 사용자가 해당 증상을 경험하고 있다고 명확히 언급했을 때 
     - no: 사용자가 명확히 해당 증상을 경험하지 않는다고 표현했을 때
-    - unknown: 관련 언급이 없거나 모호한 경우 
-- status: 답변 완료 상태 ("unanswered", "checking", "asking", "conflict", "answered") 
-    - unanswered: 관련 언급이 전혀 없는 상태
-    - checking: 관련 언급은 있지만 애매하여 추가 확인이 필요한 상태
-    - asking: 사용자가 증상을 경험하고 있다고 답하여 증상의 빈도나 맥락에 대해 추가로 질문해야 하는 상태 
-    - answered: 증상의 유무 및 빈도나 맥락에 대한 명확하고 구체적인 답변이 완료된 상태
-    - conflict: 이전에 수집된 문항과 상충되거나 모순이 있는 경우 
-- rawUserInput: 증상과 관련된 사용자 발화들을 저장한 리스트 (업데이트 할 내용이 있다면, 기존 내역에 새로운 요소 추가하여 리스트 업데이트)
+    - unknown: 관련 언급은 있으나 모호한 경우 
 - frequency: 사용자 발화로부터 해당 증상 발생 빈도에 대한 내용 추출 (명확한 빈도가 아니라면 추출하지 마세요)
 - condition: 사용자 발화로부터 해당 증상 발생과 관련된 조건, 이유 등에 대한 내용 추출 (예: "회사가 너무 바빠서", "시험 때문에", "가족 문제로")
-- note: 사용자 발화로부터 해당 증상과 관련된 일반적인 노트나 추가 정보 추출 (예: "사용자의 응답 내용", "추가 설명", "관련 정보"), 
-- updated: 이번 시점에 업데이트 되었는지 여부 (true/false)
+- note: 사용자 발화로부터 해당 증상과 관련된 일반적인 노트나 추가 정보 추출
+- conflict: 이전에 수집된 내용과 상충되거나 모순되는 경우 그 내용, 또는 충돌 상태(conflict) 문항에 대한 확인 답변이 온 경우 충돌을 해결한 기록
 
 CAUTION:
-1. 해당 증상의 경험유무(experience)에 대한 언급은 있으나 명확하지 않은 경우 status를 "checking"으로 설정하여 추가 확인이 필요함을 표시하세요
-2. 사용자가 해당 증상을 경험하고 있다고 답하여 추가적인 맥락이나 빈도에 대한 질문이 필요한 경우 status를 "asking"으로 설정하세요
-3. 사용자가 해당 증상을 경험하고 있으며, 해당 증상에 대한 추가적인 맥락 또는 빈도에 대한 답변이 수집된 경우 status를 "answered"로 설정하세요. 
-4. 사용자의 현재 발화에서 문진 항목 내 증상이 관찰되지 않은 경우 빈 배열을 반환하세요 
-5. rawUserInput은 반드시 기존 내역에 현재 발화에서 추가로 관측된 내용을 추가하여 리스트를 업데이트한 후 반환하세요. 
-6. 전체 status를 참고하여, 현재 사용자의 발화가 이전에 수집된 문항과 상충되거나 모순이 있는 경우 status를 "conflict"로 설정하고 그 모순에 대한 내용을 conflict 항목에 기록하세요. 
+1. 사용자의 현재 발화에서 문진 항목 내 증상이 관찰되지 않은 경우 updates를 빈 배열로 반환하세요 
+2. 바뀌지 않은 필드와 값이 없는 필드는 null로 두세요. questionText, status, rawUserInput은 반환하지 마세요 (상태 전이와 발화 기록은 시스템이 처리합니다)
+3. 전체 문항 상태를 참고하여, 현재 사용자의 발화가 이전에 수집된 문항과 상충되거나 모순이 있는 경우에만 conflict에 그 모순에 대한 내용을 기록하세요. 
 이후 챗봇이 사용자에게 충돌에 대해 확인하는 메시지를 보낼 것입니다 (예: 이전에는 ~했는데, 지금은 ~이라고 답했습니다, 어느쪽이 맞을까요?). 그것에 대한 답변이 온 경우 아래 단계를 수행하세요. 
-    a. experience 항목을 정정된 내용에 맞게 수정하세요. 
-    b. 이에 맞게 condition, frequency를 상황에 맞게 업데이트 하세요.
-    c. rawUserInput에 유저의 새로운 답변을 추가하세요.
-    d. status를 checking으로 설정하세요. 
-    e. conflict 항목에 충돌을 해결한 기록을 추가하세요.
-
-JSON 배열 형태로 답변해주세요:
-[
-    {{
-        "questionId": "[해당 문항 ID]",
-        "questionText": "[실제 문항 텍스트]",
-        "experience": "[yes, no, or unknown]",
-        "status": "[unanswered, checking, asking, answered, or conflict]",
-        "rawUserInput": ["[증상 관련 사용자 발화 리스트]"],
-        "frequency": "[빈도 내용 또는 null]",
-        "condition": "[조건/이유 내용 또는 null]",
-        "note": "[추가 정보 또는 null]",
-        "conflict": "[모순 내용 또는 null]",
-        "updated": "[true or false]"
-    }}
-]
+    a. experience 항목을 정정된 내용에 맞게 반환하세요. 
+    b. 정정된 condition, frequency가 있으면 함께 반환하세요.
+    c. conflict 항목에 충돌을 해결한 기록을 반환하세요.
+
+JSON 형태로 답변해주세요 (예시):
+{
+    "updates": [
+        {"questionId": "Q2", "experience": "yes", "frequency": null, "condition": "시험 때문에", "note": null, "conflict": null}
+    ]
+}
 """
 
+# 증상 분석 프롬프트에 포함할 문항 필드 (완료 여부 등 헤더 정보는 제외)
+STATUS_FIELDS = ("questionText", "status", "experience", "frequency", "condition", "conflict", "score")
 
-def extract_json_array(text):
-    """GPT 응답에서 JSON 배열을 안전하게 추출하는 함수"""
-    try:
-        # 마크다운 제거
-        clean_text = text.replace("```json", "").replace("```", "").strip()
-        
-        # 첫 번째 [ 부터 마지막 ] 까지 추출
-        start = clean_text.find('[')
-        end = clean_text.rfind(']') + 1
-        
-        if start != -1 and end > start:
-            json_str = clean_text[start:end]
-            return json.loads(json_str)
-        
-        # [ ] 가 없으면 단일 객체일 수도 있음
-        if clean_text.startswith('{') and clean_text.endswith('}'):
-            single_obj = json.loads(clean_text)
-            return [single_obj]  # 배열로 감싸서 반환
-            
-        return []
-        
-    except Exception as e:
-        ai_logger.error(f"❌ JSON 배열 추출 오류: {str(e)}")
-        return []
+# 직전 질문 문항, 키워드가 일치하는 문항, 충돌 확인 중인 문항만 분석하고, 변경사항이 없으면 전체 문항으로 다시 분석
+DST_TARGETED = os.environ.get("DST_TARGETED", "false").lower() == "true"
+
+# 문항별 사전 매칭 키워드 (사용자가 증상을 말할 때 자주 쓰는 어간, 공백 제거 후 부분 문자열로 비교)
+QUESTION_KEYWORDS = {
+    "Q1": ("스트레스", "힘들", "힘든", "괴롭", "벅차"),
+    "Q2": ("우울", "가라앉", "희망", "슬프", "슬퍼", "울적", "눈물", "기분"),
+    "Q3": ("흥미", "재미", "즐거", "즐겁", "의욕", "귀찮"),
+    "Q4": ("잠", "수면", "불면", "깨요", "깨서", "자요", "잤", "졸려"),
+    "Q5": ("피곤", "기운", "지치", "지쳐", "무기력", "피로", "힘이없"),
+    "Q6": ("잘못", "실패", "실망", "자책", "죄책", "한심"),
+    "Q7": ("죽", "자해", "사라지", "극단"),
+    "Q8": ("초조", "불안", "조마조마", "긴장", "두려", "무서"),
+    "Q9": ("걱정", "염려", "신경쓰"),
+    "Q10": ("멈추", "멈출", "조절", "통제", "꼬리")
+}
+
+
+def select_target_questions(status, user_message):
+    """
+    이번 발화와 관련 있을 가능성이 높은 문항만 고르는 함수
+
+    Args:
+        status (dict): 현재 상태 정보
+        user_message (str): 사용자 현재 발화
+
+    Returns:
+        list: 분석할 questionId 목록 (직전 질문 문항 → 키워드 일치 문항 → 충돌 확인 중인 문항 순, 없으면 빈 리스트)
+    """
+    normalized = normalize_message(user_message)
+    question_ids = [question.get("questionId") for question in status.get("questions", [])]
+    targets = []
+    if status.get("last_asked_question") in question_ids:
+        targets.append(status["last_asked_question"])
+    for question in status.get("questions", []):
+        question_id = question.get("questionId")
+        if question_id in targets:
+            continue
+        if any(keyword in normalized for keyword in QUESTION_KEYWORDS.get(question_id, ())) or question.get("status") == "conflict":
+            targets.append(question_id)
+    return targets
 
 
-def analysis_user_symptom(last_bot_message, user_message, status, intent, client):
+async def analysis_user_symptom(last_bot_message, user_message, status, intent, client, question_ids=None):
     """
     사용자 발화에서 증상을 분석하고 관련 question 항목을 업데이트하는 함수
     
@@ -105,106 +106,49 @@ def analysis_user_symptom(last_bot_message, user_message, status, intent, client
         status (dict): 현재 상태 정보
         intent (str): 탐색된 intent
         client: OpenAI 클라이언트
+        question_ids (list): 분석할 문항 ID 목록 (None이면 전체 문항)
         
     Returns:
-        list: 업데이트된 question 항목들
+        list: 문항별 변경사항 ({"questionId": ..., 바뀐 필드만}), 분석에 실패하면 None (변경사항 없음인 빈 목록과 구분)
     """
-    ai_logger.info(f"🔍 사용자 증상 분석 시작 - Intent: {intent}")
+    ai_logger.info(f"🔍 사용자 증상 분석 시작 - Intent: {intent}, 대상 문항: {question_ids or '전체'}")
     
-    # 현재 질문들 정보
-    questions_info = "\n".join([
-        f"- {q['questionId']}: {q['questionText']} (status: {q['status']}, frequency: {q.get('frequency', 'null')}, score: {q.get('score', 'null')})"
-        for q in status.get("questions", [])
+    # 지시사항은 고정된 system 메시지로, 현재 문항 상태와 턴별 입력은 user 메시지로 전달 (프롬프트 캐시 적중 구간 확보)
+    messages = build_messages(SYMPTOM_ANALYSIS_PROMPT, [
+        ("현재 문항 상태", encode_status(
+            status, STATUS_FIELDS, include_header=False,
+            question_filter=(lambda question: question.get("questionId") in question_ids) if question_ids else None
+        )),
+        ("마지막 챗봇 발화", last_bot_message),
+        ("사용자 답변", user_message),
+        ("의도 분석 결과", intent)
     ])
     
-    # 프롬프트에 현재 질문 상태 정보 삽입
-    system_prompt = SYMPTOM_ANALYSIS_PROMPT.format(questions_info=questions_info)
-    
-    max_retries = 3
-    retry_delay = 1  # 초
-    
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                ai_logger.info(f"🔄 증상 분석 재시도 {attempt}/{max_retries}")
-                time.sleep(retry_delay * attempt)  # 재시도 시 대기 시간 증가
-            
-            log_api_call("gpt-5-chat-latest", "symptom_analysis", attempt + 1)
-            response = client.chat.completions.create(
-                model="gpt-5-chat-latest",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"마지막 챗봇 발화:\n{last_bot_message}\n사용자 답변: {user_message}\n의도 분석 결과: {intent}"}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
-            
-            result_text = response.choices[0].message.content.strip()
-            ai_logger.info(f"🤖 GPT 분석 결과: {result_text}")
-            
-            # JSON 배열 파싱 시도
-            if result_text == "[]":
-                ai_logger.info("‼️ 감지된 증상이 없습니다.")
-                return []
-            else:
-                analyzed_symptoms = extract_json_array(result_text)
-                if analyzed_symptoms:
-                    ai_logger.info(f"✅ 증상 분석 완료: {analyzed_symptoms}")
-                    ai_logger.info("----------------------------------------------------------")
-                    return analyzed_symptoms
-                else:
-                    ai_logger.warning("⚠️ JSON 파싱 실패")
-                    if attempt == max_retries - 1:
-                        ai_logger.error("❌ 모든 재시도 후에도 JSON 파싱 실패")
-                        return []
-                    continue
-                    
-        except Exception as e:
-            ai_logger.warning(f"⚠️ 증상 분석 시도 {attempt + 1} 실패: {str(e)}")
-            if attempt == max_retries - 1:
-                log_error("증상 분석 최종 실패", e)
-                return []
-            continue
-    
-
-def create_full_updated_status(current_status, updated_slots):
-    """전체 업데이트된 상태 생성 (questions와 last_answered_question만)"""
-    # 현재 상태를 복사
-    updated_status = copy.deepcopy(current_status)
-    
-    # 모든 updated 플래그를 False로 초기화
-    for question in updated_status["questions"]:
-        question["updated"] = False
-    
-    # updated_slots의 변경사항을 questions에 적용
-    latest_answered_question = None
-    for update in updated_slots:
-        question_id = update["questionId"]
-        
-        # 해당 질문 찾아서 업데이트
-        for i, question in enumerate(updated_status["questions"]):
-            if question["questionId"] == question_id:
-                # 업데이트 적용
-                for key, value in update.items():
-                    if key != "questionId":  # questionId는 변경하지 않음
-                        updated_status["questions"][i][key] = value
-                
-                # 답변된 질문 중 가장 최근 것 추적
-                if update.get("updated") == True:
-                    latest_answered_question = question_id
-                break
-    
-    # state 업데이트
-    updated_status["last_answered_question"] = latest_answered_question
-    ai_logger.info(f"👉 마지막 답변된 질문: {latest_answered_question}")
-
-    return updated_status, latest_answered_question
-
+    try:
+        analyzed_symptoms = (await call_llm(
+            client, "dst", "symptom_analysis_targeted" if question_ids else "symptom_analysis",
+            parse=SYMPTOM_UPDATES.parse,
+            model="gpt-5-chat-latest",
+            messages=messages,
+            temperature=0.1,
+            max_tokens=300,
+            **SYMPTOM_UPDATES.request_options()
+        ))["updates"]
+        # 재생 코퍼스(log_corpus.py)가 DST 출력으로 읽는 줄 (문항별 변경사항 JSON 배열)
+        ai_logger.info(f"🤖 GPT 분석 결과: {json.dumps(analyzed_symptoms, ensure_ascii=False)}")
+        if not analyzed_symptoms:
+            ai_logger.info("‼️ 감지된 증상이 없습니다.")
+            return []
+        ai_logger.info(f"✅ 증상 분석 완료 (변경사항 {len(analyzed_symptoms)}개): {analyzed_symptoms}")
+        ai_logger.info("----------------------------------------------------------")
+        return analyzed_symptoms
 
+    except Exception as e:
+        log_error("증상 분석 최종 실패", e)
+        return None
 
 
-def update_dialogue_state(last_bot_message, status, user_message, intent, client):
+async def update_dialogue_state(last_bot_message, status, user_message, intent, client):
     """
     대화 상태를 업데이트하고 DP용 전체 상태를 생성하는 메인 함수
     
@@ -223,12 +167,23 @@ def update_dialogue_state(last_bot_message, status, user_message, intent, client
     ai_logger.info(f"🧠 DST 시작 - Intent: {intent}")
     
     try:
-        # 사용자 증상 분석 (GPT 활용)
-        updated_slots = analysis_user_symptom(last_bot_message, user_message, status, intent, client)
-
-        # 전체 업데이트된 상태 생성 (룰 베이스)
-        updated_status, latest_answered_question = create_full_updated_status(status, updated_slots)
-        ai_logger.info(f"📊 상태 DB 업데이트 완료: {updated_status}")
+        # 사용자 증상 분석 (GPT 활용, 문항별 변경사항만 추출)
+        question_ids = select_target_questions(status, user_message) if DST_TARGETED else None
+        deltas = await analysis_user_symptom(last_bot_message, user_message, status, intent, client, question_ids)
+        if question_ids:
+            # 분석 실패(None)는 전체 문항으로 다시 호출해도 같은 장애를 겪으므로 변경사항 없음으로 처리
+            increment_counter("dst_targeted_total", outcome="error" if deltas is None else "hit" if deltas else "fallback")
+            if deltas == []:
+                ai_logger.info("🔁 대상 문항에서 변경사항이 없어 전체 문항으로 다시 분석")
+                deltas = await analysis_user_symptom(last_bot_message, user_message, status, intent, client)
+        elif DST_TARGETED:
+            increment_counter("dst_targeted_total", outcome="full_scan")
+        deltas = deltas or []
+
+        # 문항별 변경사항을 규칙 기반 상태 전이로 반영
+        updated_slots, updated_status, latest_answered_question = apply_updates(status, deltas, user_message)
+        ai_logger.info(f"👉 마지막 답변된 질문: {latest_answered_question}")
+        ai_logger.info(f"📊 상태 DB 업데이트 완료: {updated_slots}")
         ai_logger.info("----------------------------------------------------------")
         
         return updated_slots, updated_status, latest_answered_question
@@ -236,4 +191,4 @@ def update_dialogue_state(last_bot_message, status, user_message, intent, client
     except Exception as e:
         log_error("DST 처리 중 오류", e)
         # 오류 시 기본값 반환
-        return [], status
\ No newline at end of file
+        return [], status, status.get("last_answered_question")
\ No newline at end of file
@@ -1,149 +1,293 @@
 # NLG.py - Natural Language Generation
-import time
-from logger_config import ai_logger, log_api_call, log_error
+import os
+from contextlib import aclosing
+from logger_config import ai_logger, log_error
+from llm_client import call_llm, stream_llm
+from metrics import increment_counter
+from prompt_layout import build_messages, prompt_cache_key
+from response_cache import (
+    create_response_cache, build_cache_key, is_cacheable, DEFAULT_CACHEABLE_POLICIES, DEFAULT_MESSAGE_DEPENDENT_POLICIES
+)
+from status_encoder import encode_status
+from turn_budget import current_turn, TURN_DEGRADE_NLG_BELOW, TURN_NLG_MAX_TOKENS
 from prompts import (
-    MULTI_POLICY_BASE_PROMPT, 
-    POLICY_PROMPTS_SINGLE, 
+    MULTI_POLICY_BASE_PROMPT,
+    POLICY_PROMPTS_SINGLE,
     POLICY_MAX_TOKENS,
     POLICY_PROMPTS_MULTI,
     TONE_PROMPTS
 )
 
-def generate_response(policy, user_message, history, status, client, tone_preference=None):
+RESPONSE_FAILURE_MESSAGE = "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+
+# 응답 생성 프롬프트에 포함할 문항 필드 (재진술/공감을 위해 최근 사용자 발화 일부 포함)
+STATUS_FIELDS = ("questionText", "status", "experience", "frequency", "condition", "conflict", "rawUserInput")
+
+# 응답 캐시 설정 (NLG_CACHE_BACKEND: none, memory, sqlite)
+NLG_CACHE_BACKEND = os.environ.get("NLG_CACHE_BACKEND", "none").lower()
+NLG_CACHE_TTL = int(os.environ.get("NLG_CACHE_TTL", "86400"))
+NLG_CACHE_MAX_ENTRIES = int(os.environ.get("NLG_CACHE_MAX_ENTRIES", "1000"))
+NLG_CACHE_PATH = os.environ.get("NLG_CACHE_PATH", os.path.join(os.path.dirname(__file__), 'nlg_cache.sqlite3'))
+NLG_CACHE_POLICIES = tuple(
+    name.strip() for name in os.environ.get("NLG_CACHE_POLICIES", ",".join(DEFAULT_CACHEABLE_POLICIES)).split(",") if name.strip()
+)
+NLG_CACHE_MESSAGE_POLICIES = tuple(
+    name.strip() for name in os.environ.get("NLG_CACHE_MESSAGE_POLICIES", ",".join(DEFAULT_MESSAGE_DEPENDENT_POLICIES)).split(",")
+    if name.strip()
+)
+
+response_cache = create_response_cache(NLG_CACHE_BACKEND, max_entries=NLG_CACHE_MAX_ENTRIES, ttl=NLG_CACHE_TTL, path=NLG_CACHE_PATH)
+
+
+def get_cache_key(policy, status, tone_preference, user_message):
+    """캐시를 사용할 수 있는 정책 조합이면 캐시 키를, 아니면 None을 반환"""
+    if response_cache is None:
+        return None
+    if not is_cacheable(policy, NLG_CACHE_POLICIES):
+        increment_counter("nlg_cache_total", outcome="bypass")
+        return None
+    return build_cache_key(policy, status, tone_preference, user_message, NLG_CACHE_MESSAGE_POLICIES)
+
+
+def get_cached_response(cache_key):
+    """캐시된 응답을 조회하고 적중 여부를 기록"""
+    if cache_key is None:
+        return None
+    cached = response_cache.get(cache_key)
+    increment_counter("nlg_cache_total", outcome="hit" if cached else "miss")
+    if cached:
+        ai_logger.info(f"💾 캐시된 응답 사용: {cache_key}")
+    return cached
+
+
+def store_cached_response(cache_key, response):
+    """생성에 성공한 응답만 캐시에 저장 (턴 예산 부족으로 짧게 생성한 응답은 제외)"""
+    budget = current_turn()
+    if budget is not None and "short_nlg" in budget.degradations:
+        return
+    if cache_key is not None and response and response != RESPONSE_FAILURE_MESSAGE:
+        response_cache.set(cache_key, response)
+
+
+def limit_max_tokens(max_tokens):
+    """턴 예산이 부족하면 응답 길이를 TURN_NLG_MAX_TOKENS로 줄임"""
+    budget = current_turn()
+    if budget is not None and budget.degrade("short_nlg", TURN_DEGRADE_NLG_BELOW):
+        return min(max_tokens, TURN_NLG_MAX_TOKENS)
+    return max_tokens
+
+
+async def generate_response(policy, user_message, history, status, client, tone_preference=None):
     """정책에 따라 응답을 생성하도록 요청하는 메인 함수"""
     ai_logger.info("🤖 응답 생성 중...")
     second_policy = policy.get('second_policy', 'default')
 
+    cache_key = get_cache_key(policy, status, tone_preference, user_message)
+    cached = get_cached_response(cache_key)
+    if cached:
+        return cached
+
     if second_policy == None:
-        response = generate_response_by_policy(policy, user_message, history, status, client, tone_preference)
-        return response
+        response = await generate_response_by_policy(policy, user_message, history, status, client, tone_preference)
     else:
-        response = generate_response_by_policies(policy, user_message, history, status, client, tone_preference)
-        return response
+        response = await generate_response_by_policies(policy, user_message, history, status, client, tone_preference)
 
+    store_cached_response(cache_key, response)
+    return response
 
-def generate_response_by_policy(policy, user_message, history, status, client, tone_preference=None):
-    """통합된 응답 생성 함수 - 모든 정책에 대해 동일한 로직 사용"""
-    ai_logger.info("🔍 한 개의 응답 정책을 조합하여 최종 응답을 생성")
-    
+
+def build_single_policy_messages(policy, user_message, history, status, tone_preference=None):
+    """단일 정책 응답 생성을 위한 메시지와 토큰 제한을 구성하는 함수"""
     first_policy = policy.get('first_policy', 'default')
     ai_logger.info(f"🔍 선택된 정책: {first_policy}")
-    
+
     prompt = POLICY_PROMPTS_SINGLE.get(first_policy, "announce_completion")
     question = check_question(policy)
-    
+
     # 말투 프롬프트 추가
     tone_prompt = TONE_PROMPTS.get(tone_preference or '미선택', TONE_PROMPTS['미선택'])
     ai_logger.info(f"🔍 선택된 말투: {tone_preference}")
     prompt_with_tone = prompt + "\n" + tone_prompt
 
-    if question != None:
-        context_history = f"선택된 정책: {policy}\n대화 히스토리:\n{history}\n현재 사용자 메시지: {user_message}\n현재 문진 상태: {status}\n선택된 문진문항: {question}"
-    else:
-        context_history = f"선택된 정책: {policy}\n대화 히스토리:\n{history}\n현재 사용자 메시지: {user_message}\n현재 문진 상태: {status}"
+    # 정책/말투별로 고정된 지시사항을 system에, 대화 히스토리(뒤에만 추가됨)부터 턴별 입력을 user에 배치
+    messages = build_messages(prompt_with_tone, [
+        ("대화 히스토리", history),
+        ("현재 문진 상태", encode_status(status, STATUS_FIELDS)),
+        ("선택된 정책", policy),
+        ("선택된 문진문항", question),
+        ("현재 사용자 메시지", user_message)
+    ])
 
-    messages = [
-        {"role": "system", "content": prompt_with_tone},
-        {"role": "user", "content": context_history}
-    ]
-    
     # 정책별 토큰 제한
     max_tokens = POLICY_MAX_TOKENS.get(first_policy,200)
-    
-    max_retries = 3
-    retry_delay = 1  # 초
-    
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                ai_logger.info(f"🔄 응답 생성 재시도 {attempt}/{max_retries}")
-                time.sleep(retry_delay * attempt)  # 재시도 시 대기 시간 증가
-            
-            log_api_call("gpt-5-chat-latest", f"response_generation_{first_policy}", attempt + 1)
-            # OpenAI API 호출
-            response = client.chat.completions.create(
-                model="gpt-5-chat-latest",
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=0.7
-            )
-            
-            generated_response = response.choices[0].message.content.strip()
-            ai_logger.info(f"✅ 응답 생성 완료: {generated_response}")
-            return generated_response
-            
-        except Exception as e:
-            ai_logger.warning(f"⚠️ 응답 생성 시도 {attempt + 1} 실패: {str(e)}")
-            if attempt == max_retries - 1:
-                log_error("응답 생성 최종 실패", e)
-                return "죄송합니다. 응답 생성 중 오류가 발생했습니다."
-            continue
-
-
-def generate_response_by_policies(policy, user_message, history, status, client, tone_preference=None):
-    """두 개의 응답 정책을 조합하여 최종 응답을 생성하는 함수"""
-    ai_logger.info("🔍 두 개의 응답 정책을 조합하여 최종 응답을 생성")
+    return messages, max_tokens
 
+
+def build_multi_policy_messages(policy, user_message, history, status, tone_preference=None):
+    """복합 정책 응답 생성을 위한 메시지와 토큰 제한을 구성하는 함수"""
     first_policy = policy.get('first_policy', '')
     second_policy = policy.get('second_policy', '')
     ai_logger.info(f"🔍 선택된 정책들: {first_policy}, {second_policy}")
-    
+
     # 핵심 지시사항만 조합
     instruction_1 = POLICY_PROMPTS_MULTI.get(first_policy, "announce_completion")
     instruction_2 = POLICY_PROMPTS_MULTI.get(second_policy, "announce_completion")
-    
+
     policy_instructions = f"정책 1: {instruction_1}\n정책 2: {instruction_2}"
     combined_prompt = MULTI_POLICY_BASE_PROMPT.format(policy_instructions=policy_instructions)
-    
+
     # 말투 프롬프트 추가
     tone_prompt = TONE_PROMPTS.get(tone_preference or '미선택', TONE_PROMPTS['미선택'])
     ai_logger.info(f"🔍 선택된 말투: {tone_preference}")
     combined_prompt_with_tone = combined_prompt + "\n" + tone_prompt
-    
+
     question = check_question(policy)
-    
-    if question != None:
-        context_history = f"선택된 정책: {first_policy}, {second_policy}\n대화 히스토리:\n{history}\n현재 사용자 메시지: {user_message}\n현재 문진 상태: {status}\n선택된 문진문항: {question}"
+
+    messages = build_messages(combined_prompt_with_tone, [
+        ("대화 히스토리", history),
+        ("현재 문진 상태", encode_status(status, STATUS_FIELDS)),
+        ("선택된 정책", f"{first_policy}, {second_policy}"),
+        ("선택된 문진문항", question),
+        ("현재 사용자 메시지", user_message)
+    ])
+    return messages, 300
+
+
+async def generate_response_by_policy(policy, user_message, history, status, client, tone_preference=None):
+    """통합된 응답 생성 함수 - 모든 정책에 대해 동일한 로직 사용"""
+    ai_logger.info("🔍 한 개의 응답 정책을 조합하여 최종 응답을 생성")
+
+    first_policy = policy.get('first_policy', 'default')
+    messages, max_tokens = build_single_policy_messages(policy, user_message, history, status, tone_preference)
+    max_tokens = limit_max_tokens(max_tokens)
+
+    try:
+        response = await call_llm(
+            client, "nlg", f"response_generation_{first_policy}",
+            model="gpt-5-chat-latest",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+
+        generated_response = response.choices[0].message.content.strip()
+        ai_logger.info(f"✅ 응답 생성 완료: {generated_response}")
+        return generated_response
+
+    except Exception as e:
+        log_error("응답 생성 최종 실패", e)
+        return RESPONSE_FAILURE_MESSAGE
+
+
+async def generate_response_by_policies(policy, user_message, history, status, client, tone_preference=None):
+    """두 개의 응답 정책을 조합하여 최종 응답을 생성하는 함수"""
+    ai_logger.info("🔍 두 개의 응답 정책을 조합하여 최종 응답을 생성")
+
+    first_policy = policy.get('first_policy', '')
+    second_policy = policy.get('second_policy', '')
+    messages, max_tokens = build_multi_policy_messages(policy, user_message, history, status, tone_preference)
+    max_tokens = limit_max_tokens(max_tokens)
+
+    try:
+        response = await call_llm(
+            client, "nlg", f"response_generation_{first_policy}_{second_policy}",
+            model="gpt-5-chat-latest",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+
+        generated_response = response.choices[0].message.content.strip()
+        ai_logger.info(f"✅ 복합 정책 응답 생성 완료: {generated_response}")
+        return generated_response
+
+    except Exception as e:
+        log_error("복합 정책 응답 생성 최종 실패", e)
+        return RESPONSE_FAILURE_MESSAGE
+
+
+async def stream_response(policy, user_message, history, status, client, tone_preference=None):
+    """
+    정책에 따라 응답을 생성하며, 모델이 생성한 텍스트 조각을 도착하는 즉시 반환하는 비동기 제너레이터
+
+    재시도와 서킷 브레이커 처리는 llm_client.stream_llm이 담당합니다.
+    첫 조각을 받기 전에 최종 실패하면 실패 안내 문구를 반환하고, 이미 일부를 전달한 뒤의 실패는 그대로 예외를 전파합니다.
+    """
+    ai_logger.info("🤖 스트리밍 응답 생성 중...")
+    first_policy = policy.get('first_policy', 'default')
+    second_policy = policy.get('second_policy', 'default')
+
+    cache_key = get_cache_key(policy, status, tone_preference, user_message)
+    cached = get_cached_response(cache_key)
+    if cached:
+        yield cached
+        return
+
+    if second_policy == None:
+        messages, max_tokens = build_single_policy_messages(policy, user_message, history, status, tone_preference)
+        prompt_type = f"response_generation_{first_policy}"
     else:
-        context_history = f"선택된 정책: {first_policy}, {second_policy}\n대화 히스토리:\n{history}\n현재 사용자 메시지: {user_message}\n현재 문진 상태: {status}"
-    
-    messages = [
-        {"role": "system", "content": combined_prompt_with_tone},
-        {"role": "user", "content": context_history}
-    ]
-
-    
-    max_retries = 3
-    retry_delay = 1  # 초
-    
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                ai_logger.info(f"🔄 복합 정책 응답 생성 재시도 {attempt}/{max_retries}")
-                time.sleep(retry_delay * attempt)  # 재시도 시 대기 시간 증가
-            
-            log_api_call("gpt-5-chat-latest", f"response_generation_{first_policy}_{second_policy}", attempt + 1)
-            response = client.chat.completions.create(
-                model="gpt-5-chat-latest",
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7
-            )
-            
-            generated_response = response.choices[0].message.content.strip()
-            ai_logger.info(f"✅ 복합 정책 응답 생성 완료: {generated_response}")
-            return generated_response
-            
-        except Exception as e:
-            ai_logger.warning(f"⚠️ 복합 정책 응답 생성 시도 {attempt + 1} 실패: {str(e)}")
-            if attempt == max_retries - 1:
-                log_error("복합 정책 응답 생성 최종 실패", e)
-                return "죄송합니다. 응답 생성 중 오류가 발생했습니다."
-            continue
+        messages, max_tokens = build_multi_policy_messages(policy, user_message, history, status, tone_preference)
+        prompt_type = f"response_generation_{first_policy}_{second_policy}"
+
+    request_options = {
+        "model": "gpt-5-chat-latest",
+        "messages": messages,
+        "max_tokens": limit_max_tokens(max_tokens),
+        "temperature": 0.7
+    }
+    if prompt_cache_key("nlg"):
+        request_options["prompt_cache_key"] = prompt_cache_key("nlg")
+
+    generated_parts = []
+    try:
+        async with aclosing(stream_llm(client, "nlg", prompt_type, **request_options)) as stream:
+            async for delta in stream:
+                generated_parts.append(delta)
+                yield delta
+    except Exception as e:
+        if generated_parts:
+            log_error("스트리밍 응답 생성 도중 실패", e)
+            raise
+        log_error("스트리밍 응답 생성 최종 실패", e)
+        yield RESPONSE_FAILURE_MESSAGE
+        return
+
+    generated_response = ''.join(generated_parts).strip()
+    ai_logger.info(f"✅ 스트리밍 응답 생성 완료: {generated_response}")
+    store_cached_response(cache_key, generated_response)
+
+
+class StreamPostProcessor:
+    """
+    전체 응답에 적용하던 후처리(replace("\\n\\n", "\\n").strip())를 스트리밍 조각 단위로 동일하게 적용하는 클래스
+
+    공백 문자는 다음 일반 문자가 도착할 때까지 보류했다가 연속 줄바꿈을 정리하여 내보내므로,
+    앞뒤 공백은 버려지고 결과를 이어 붙이면 전체 응답을 한 번에 후처리한 결과와 같습니다.
+    """
+
+    def __init__(self):
+        self.pending_whitespace = ""
+        self.started = False
+
+    def feed(self, chunk):
+        """새 텍스트 조각을 받아 지금 내보낼 수 있는 후처리된 텍스트를 반환"""
+        output = []
+        for char in chunk:
+            if char.isspace():
+                if self.started:
+                    self.pending_whitespace += char
+                continue
+            if self.pending_whitespace:
+                output.append(self.pending_whitespace.replace("\n\n", "\n"))
+                self.pending_whitespace = ""
+            self.started = True
+            output.append(char)
+        return "".join(output)
 
 
 def check_question(policy):
     """정책 딕셔너리에서 question 를 추출하는 함수"""
     question = policy.get('next_question_text', None)
     ai_logger.info(f"🔍 선택된 문진문항: {question}")
-    return question
\ No newline at end of file
+    return question
@@ -1,8 +1,12 @@
 # NLU.py
-import json
 import os
-import time
-from logger_config import ai_logger, log_api_call, log_error
+import re
+from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from metrics import increment_counter, get_counter, sum_counter
+from prompt_layout import build_messages
+from schemas import INTENT_RESULT
+from intent_classifier import IntentClassifier, DEFAULT_MODEL_PATH
 
 
 INTENT_ANALYSIS_PROMPT = """
@@ -41,50 +45,147 @@ JSON 형태로 답변해주세요:
 }
 """
 
-def analyze_intent(user_message, history, client, previous_policy):
-    """ 사용자의 의도를 분석하는 함수 (3번 재시도 포함) """ 
+# UI 선택지로 고정된 답변 (api-server/models/Session.js의 tonePreference, conversationStyle enum과 동일)
+TONE_OPTIONS = ('정중하지만 다정한 말투', '이성적이고 전문적인 말투', '친구처럼 대화하는 말투')
+CONVERSATION_STYLE_OPTIONS = ('심층적이고 구체적인 대화', '간결하고 신속한 대화')
+
+# self_introduction 직후에 규칙으로 처리할 인사말 (정규화된 형태)
+GREETING_MESSAGES = (
+    '안녕', '안녕하세요', '안녕하십니까', '반가워', '반가워요', '반갑습니다', '반갑다',
+    '처음뵙겠습니다', '하이', 'hi', 'hello', '헬로'
+)
+
+# 규칙 기반 의도 분류 사용 여부 (확실한 경우 GPT 호출 생략)
+NLU_RULES_ENABLED = os.environ.get("NLU_RULES_ENABLED", "true").lower() == "true"
+
+# 의도 분석 백엔드 ("gpt": 항상 GPT 호출, "local": 로컬 분류기 우선 사용 후 신뢰도가 낮으면 GPT 호출)
+NLU_BACKEND = os.environ.get("NLU_BACKEND", "gpt").lower()
+NLU_LOCAL_THRESHOLD = float(os.environ.get("NLU_LOCAL_THRESHOLD", "0.85"))
+INTENT_MODEL_PATH = os.environ.get("INTENT_MODEL_PATH", DEFAULT_MODEL_PATH)
+
+_intent_classifier = None
+_intent_classifier_loaded = False
+
+
+def get_intent_classifier():
+    """로컬 의도 분류기를 최초 1회 로드하여 반환 (모델 파일이 없으면 None)"""
+    global _intent_classifier, _intent_classifier_loaded
+    if not _intent_classifier_loaded:
+        _intent_classifier_loaded = True
+        try:
+            _intent_classifier = IntentClassifier.load(INTENT_MODEL_PATH)
+            ai_logger.info(f"🧩 로컬 의도 분류기 로드 완료: {INTENT_MODEL_PATH}")
+        except (OSError, ValueError, KeyError) as e:
+            ai_logger.warning(f"⚠️ 로컬 의도 분류기 로드 실패, GPT만 사용합니다: {str(e)}")
+    return _intent_classifier
+
+
+def classify_intent_locally(user_message, previous_policy):
+    """
+    로컬 분류기로 의도를 분류하는 함수
+
+    Returns:
+        dict | None: 신뢰도가 NLU_LOCAL_THRESHOLD 이상이면 의도 분석 결과, 아니면 None (GPT 분석 필요)
+    """
+    classifier = get_intent_classifier()
+    if classifier is None:
+        return None
+
+    label, confidence = classifier.predict(user_message, previous_policy)
+    if confidence < NLU_LOCAL_THRESHOLD:
+        increment_counter("nlu_local_total", outcome="fallback")
+        ai_logger.info(f"🧩 로컬 분류 신뢰도 부족 ({label}, {confidence:.2f}) → GPT 분석")
+        return None
+
+    increment_counter("nlu_local_total", outcome="hit")
+    ai_logger.info(f"🧩 로컬 분류 결과 채택 ({label}, {confidence:.2f})")
+    return {"intent": label}
+
+
+def normalize_message(text):
+    """공백, 문장부호, 대소문자 차이를 제거하여 규칙 매칭용 문자열로 변환하는 함수"""
+    return re.sub(r"[\s.,!?~^ㅎㅋ]+", "", (text or "").lower())
+
+
+def match_option(user_message, options):
+    """사용자 발화가 주어진 선택지 중 하나와 (정규화 후) 일치하면 해당 선택지 원문을, 아니면 None을 반환"""
+    normalized = normalize_message(user_message)
+    for option in options:
+        if normalize_message(option) == normalized:
+            return option
+    return None
+
+
+def classify_intent_by_rules(user_message, previous_policy):
+    """
+    LLM 없이 확실하게 판단할 수 있는 의도를 규칙으로 분류하는 함수
+
+    Args:
+        user_message (str): 사용자 발화
+        previous_policy (str): 직전 챗봇 발화 정책
+
+    Returns:
+        dict | None: 확실한 경우 의도 분석 결과, 아니면 None (GPT 분석 필요)
+    """
+    if match_option(user_message, TONE_OPTIONS):
+        return {"intent": "answer_tone"}
+    if match_option(user_message, CONVERSATION_STYLE_OPTIONS):
+        return {"intent": "answer_conversation_style"}
+    if previous_policy == "self_introduction" and normalize_message(user_message) in GREETING_MESSAGES:
+        return {"intent": "greeting"}
+    return None
+
+
+async def analyze_intent(user_message, history, client, previous_policy):
+    """ 사용자의 의도를 분석하는 함수 (재시도는 llm_client.call_llm에서 처리) """ 
     ai_logger.info("🔍 의도 분석 중...")
+
+    # 규칙으로 확실히 판단 가능한 경우 GPT 호출 생략
+    if NLU_RULES_ENABLED:
+        rule_result = classify_intent_by_rules(user_message, previous_policy)
+        increment_counter("nlu_rule_total", outcome="hit" if rule_result else "miss")
+        hits = get_counter("nlu_rule_total", outcome="hit")
+        total = sum_counter("nlu_rule_total")
+        ai_logger.info(f"📏 규칙 기반 의도 분류 적중률: {hits}/{total} ({hits / total:.1%}), 생략된 GPT 호출: {hits}회")
+        if rule_result:
+            ai_logger.info(f"✅ 의도 분석 완료 (규칙): {rule_result}")
+            ai_logger.info("----------------------------------------------------------")
+            return rule_result
+
+    # 로컬 분류기의 신뢰도가 충분한 경우 GPT 호출 생략
+    if NLU_BACKEND == "local":
+        local_result = classify_intent_locally(user_message, previous_policy)
+        if local_result:
+            ai_logger.info(f"✅ 의도 분석 완료 (로컬): {local_result}")
+            ai_logger.info("----------------------------------------------------------")
+            return local_result
     
-    # 마지막 챗봇 발화와 현재 사용자 메시지만 사용
-    if history:
-        context_text = f"이전 대화내역: {history}\n현재 사용자 메시지: {user_message}\n직전 챗봇 발화 정책: {previous_policy}"
-    else:
-        context_text = f"현재 사용자 메시지: {user_message}\n직전 챗봇 발화 정책: {previous_policy}"
-    messages = [
-        {"role": "system", "content": INTENT_ANALYSIS_PROMPT},
-        {"role": "user", "content": context_text}]
-    
-    max_retries = 3
-    retry_delay = 1  # 초
+    # 이전 대화내역(뒤에만 추가됨) → 직전 정책 → 현재 사용자 메시지 순서로 배치하여 프롬프트 캐시 적중 구간을 늘림
+    messages = build_messages(INTENT_ANALYSIS_PROMPT, [
+        ("이전 대화내역", history or None),
+        ("직전 챗봇 발화 정책", previous_policy),
+        ("현재 사용자 메시지", user_message)
+    ])
     
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                ai_logger.info(f"🔄 의도 분석 재시도 {attempt}/{max_retries}")
-                time.sleep(retry_delay * attempt)  # 재시도 시 대기 시간 증가
-            
-            log_api_call("gpt-5-chat-latest", "intent_analysis", attempt + 1)
-            response = client.chat.completions.create(
-                model="gpt-5-chat-latest",
-                messages=messages,
-                max_tokens=50,
-                temperature=0.5
-            )
-            
-            result_text = response.choices[0].message.content.strip()
-            intent_result = json.loads(result_text)
-            ai_logger.info(f"✅ 의도 분석 완료: {intent_result}")
-            ai_logger.info("----------------------------------------------------------")
-            return intent_result
-            
-        except Exception as e:
-            ai_logger.warning(f"⚠️ 의도 분석 시도 {attempt + 1} 실패: {str(e)}")
-            if attempt == max_retries - 1:
-                log_error("의도 분석 최종 실패", e)
-                return {
-                    "intent": "failed"
-                }
-            continue
+    try:
+        intent_result = await call_llm(
+            client, "nlu", "intent_analysis",
+            parse=INTENT_RESULT.parse,
+            model="gpt-5-chat-latest",
+            messages=messages,
+            max_tokens=50,
+            temperature=0.5,
+            **INTENT_RESULT.request_options()
+        )
+        ai_logger.info(f"✅ 의도 분석 완료: {intent_result}")
+        ai_logger.info("----------------------------------------------------------")
+        return intent_result
+
+    except Exception as e:
+        log_error("의도 분석 최종 실패", e)
+        return {
+            "intent": "failed"
+        }
 
 def is_symptom_intent(intent):
     """
@@ -0,0 +1,81 @@
+# Planner.py - 의도 분석(NLU)과 정책 선택(DP)을 한 번의 호출로 수행하는 통합 플래너
+from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from prompt_layout import build_messages
+from schemas import PLAN_RESULT
+from NLU import INTENT_ANALYSIS_PROMPT
+from DP import POLICY_SELECTION_PROMPT, STATUS_FIELDS
+from status_encoder import encode_status
+
+# 기존 프롬프트의 지시사항 부분을 그대로 사용하고, 응답 형식만 통합
+_INTENT_INSTRUCTIONS = INTENT_ANALYSIS_PROMPT.split("JSON 형태로 답변해주세요:")[0].strip()
+_POLICY_INSTRUCTIONS = POLICY_SELECTION_PROMPT.split("JSON 형태로 답변해주세요:")[0].strip()
+
+PLANNER_PROMPT = f"""
+당신은 한 번의 분석으로 (1) 현재 사용자 발화의 의도를 파악하고 (2) 그 의도를 바탕으로 다음 대화 정책을 선택하는 문진 대화 플래너입니다.
+먼저 [1단계] 지침에 따라 의도를 분석한 뒤, 분석한 의도를 "의도 분석 결과"로 사용하여 [2단계] 지침에 따라 정책을 선택하세요.
+
+[1단계: 의도 분석]
+{_INTENT_INSTRUCTIONS}
+
+[2단계: 정책 선택]
+{_POLICY_INSTRUCTIONS}
+
+JSON 형태로 답변해주세요:
+{{
+  "intent": "1단계에서 분석한 의도 유형",
+  "first_policy": "선택된 첫 번째 정책",
+  "second_policy": "선택된 두 번째 정책 또는 null",
+  "next_question": "선택된 문항의 questionId, 증상 탐색 정책이 없다면 null",
+  "is_completed": "정보 수집 완료 여부, true 또는 false",
+  "is_finished": "대화 종료 여부, true 또는 false"
+}}
+"""
+
+POLICY_KEYS = ("first_policy", "second_policy", "next_question", "is_completed", "is_finished")
+
+
+async def plan_turn(user_message, history, client, previous_policy, message_count, status=None, selected_policies=None, conversation_style=None):
+    """
+    의도 분석과 정책 선택을 한 번의 GPT 호출로 수행하는 함수
+
+    Returns:
+        tuple: (intent_result, policy_result)
+            - intent_result: analyze_intent와 같은 형식 ({"intent": ...})
+            - policy_result: select_policy와 같은 형식 (first_policy, second_policy, next_question, is_completed, is_finished)
+            실패 시 (None, None)
+    """
+    ai_logger.info("🧭 통합 플래너 (NLU+DP) 실행 중...")
+
+    policies_history = ", ".join(selected_policies) if selected_policies else "없음"
+
+    messages = build_messages(PLANNER_PROMPT, [
+        ("대화 스타일", conversation_style),
+        ("대화 히스토리", history),
+        ("이전 대화 정책", policies_history),
+        ("현재 상태", encode_status(status, STATUS_FIELDS)),
+        ("직전 챗봇 발화 정책", previous_policy),
+        ("현재 사용자 메시지", user_message)
+    ])
+
+    try:
+        plan = await call_llm(
+            client, "planner", "turn_planning",
+            parse=PLAN_RESULT.parse,
+            model="gpt-5-chat-latest",
+            messages=messages,
+            max_tokens=100,
+            temperature=0.5,
+            **PLAN_RESULT.request_options()
+        )
+        intent_result = {"intent": plan["intent"]}
+        policy_result = {key: plan.get(key) for key in POLICY_KEYS}
+
+        ai_logger.info(f"✅ 의도 분석 완료 (플래너): {intent_result}")
+        ai_logger.info(f"📊 정책 선택 결과 (플래너): {policy_result}")
+        ai_logger.info("----------------------------------------------------------")
+        return intent_result, policy_result
+
+    except Exception as e:
+        log_error("통합 플래너 최종 실패", e)
+        return None, None
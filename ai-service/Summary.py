@@ -2,6 +2,9 @@
 import json
 import logging
 from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from prompt_layout import build_messages
+from status_encoder import encode_status
 
 
 SUMMARY_ANALYSIS_PROMPT = """
@@ -10,11 +13,11 @@ SUMMARY_ANALYSIS_PROMPT = """
 
 반드시 아래 JSON 형식으로만 응답해주세요. 다른 텍스트나 설명은 포함하지 마세요.
 
-{{
+{
   "depression": "우울상태에 대한 분석 내용을 자세히 작성해주세요. 현재 상태, 주요 증상, 심각도 등을 포함하여 따뜻하고 이해하기 쉬운 언어로 설명해주세요.",
   "anxiety": "불안상태에 대한 분석 내용을 자세히 작성해주세요. 현재 상태, 주요 증상, 심각도 등을 포함하여 따뜻하고 이해하기 쉬운 언어로 설명해주세요.",
   "suggestion": "사용자에게 도움이 될 수 있는 구체적인 제안사항을 작성해주세요. 즉시 실행할 수 있는 방법, 장기적인 관리 방법, 전문가 상담 필요성 등을 포함하여 실용적이고 따뜻한 조언을 제공해주세요."
-}}
+}
 
 # 분석 가이드라인:
 1. 대화에서 나타난 감정, 행동, 사고 패턴을 종합적으로 고려하세요.
@@ -24,21 +27,15 @@ SUMMARY_ANALYSIS_PROMPT = """
 5. 판단적이거나 의학적 진단보다는 이해와 공감을 바탕으로 한 분석을 제공하세요.
 6. 제안사항은 구체적이고 실현 가능한 방법을 중심으로 작성하세요.
 7. 따뜻하고 희망적인 어조를 유지하면서도 현실적인 조언을 제공하세요.
-
-대화 내용:
-{conversation_history}
-
-문진 상태:
-{additional_info}
 """
 
-def generate_summary_report(user_id, session_id, conversation_history, client, session_data=None, status_data=None):
+async def generate_summary_report(user_id, session_id, conversation_history, client, session_data=None, status_data=None):
     """
     Args:
         user_id (str): 사용자 ID
         session_id (str): 세션 ID
         conversation_history (str): 대화 내용
-        client (OpenAI): OpenAI 클라이언트
+        client (AsyncOpenAI): OpenAI 비동기 클라이언트
     
     Returns:
         dict: 분석 결과 레포트
@@ -65,22 +62,18 @@ def generate_summary_report(user_id, session_id, conversation_history, client, s
         # 추가 정보 포맷팅
         additional_info = format_additional_info(session_data, status_data)
         
-        # 프롬프트에 대화 내용과 추가 정보 삽입
-        analysis_prompt = SUMMARY_ANALYSIS_PROMPT.format(
-            conversation_history=conversation_history,
-            additional_info=additional_info
-        )
-        ai_logger.info(f"프롬프트: {analysis_prompt}")
+        # 지시사항은 고정된 system 메시지로, 세션별 대화 내용과 문진 상태는 user 메시지로 전달
+        messages = build_messages(SUMMARY_ANALYSIS_PROMPT, [
+            ("문진 상태", additional_info),
+            ("대화 내용", conversation_history)
+        ])
+        ai_logger.info(f"프롬프트: {messages[1]['content']}")
         
         # OpenAI API 호출
-        response = client.chat.completions.create(
+        response = await call_llm(
+            client, "summary", "summary_report",
             model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": analysis_prompt
-                }
-            ],
+            messages=messages,
             max_tokens=1500,
             temperature=0.7
         )
@@ -130,6 +123,9 @@ def generate_summary_report(user_id, session_id, conversation_history, client, s
             "data": None
         }
 
+# 레포트 생성에 포함할 문항 필드 (진행 상태 대신 수집된 증상 정보 위주)
+STATUS_FIELDS = ("questionText", "experience", "frequency", "condition", "note")
+
 def format_additional_info(session_data, status_data):
     """
     세션 정보와 상태 정보를 분석에 유용한 형태로 포맷팅합니다.
@@ -165,17 +161,13 @@ def format_additional_info(session_data, status_data):
             info_text += f"- 총 문진 항목: {len(status_data['questions'])}개\n"
             info_text += f"- 답변 완료: {len(answered_questions)}개\n"
             
-            # 주요 증상들 요약
-            symptoms_summary = []
-            for question in answered_questions:
-                if question.get('experience') == 'yes' and question.get('frequency'):
-                    freq_text = {0: '전혀없음', 1: '며칠간', 2: '절반이상', 3: '거의매일'}.get(question.get('frequency'), '미상')
-                    symptoms_summary.append(f"{question.get('questionText', '미상')[:20]}... ({freq_text})")
-            
-            if symptoms_summary:
-                info_text += f"- 경험한 주요 증상:\n"
-                for symptom in symptoms_summary[:5]:  # 최대 5개만
-                    info_text += f"  • {symptom}\n"
+            # 주요 증상들 요약 (경험했다고 답한 문항만, 문항별 한 줄)
+            experienced = encode_status(
+                status_data, STATUS_FIELDS, include_header=False,
+                question_filter=lambda question: question.get('experience') == 'yes'
+            )
+            if experienced:
+                info_text += "- 경험한 주요 증상:\n" + "\n".join(f"  {row}" for row in experienced.splitlines()) + "\n"
         
         return info_text
         
@@ -0,0 +1,146 @@
+# admission.py - /api/chat 턴 수락 제어 (프로바이더 한도에 맞춘 전역 토큰 버킷, 세션별 동시 턴 1개, 제한된 대기열)
+import asyncio
+import os
+import time
+
+from logger_config import ai_logger
+from metrics import increment_counter, observe_histogram
+
+# 프로바이더 분당 요청 한도 중 이 워커가 사용할 몫 (0이면 토큰 버킷을 사용하지 않음, 워커가 여러 개면 한도 / 워커 수)
+ADMISSION_RPM = float(os.environ.get("ADMISSION_RPM", "0"))
+# 턴 하나가 사용하는 평균 GPT 호출 수 (NLU, DST, DP, NLG)
+ADMISSION_CALLS_PER_TURN = float(os.environ.get("ADMISSION_CALLS_PER_TURN", "4"))
+# 한 번에 몰려도 바로 수락할 수 있는 턴 수
+ADMISSION_BURST = int(os.environ.get("ADMISSION_BURST", "10"))
+# 토큰을 기다릴 수 있는 턴 수와 최대 대기 시간 (초과하면 바로 503)
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", "100"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", "10"))
+# 같은 세션의 턴은 동시에 하나만 처리 (처리 중에 같은 세션의 요청이 오면 409)
+ADMISSION_SESSION_LIMIT = os.environ.get("ADMISSION_SESSION_LIMIT", "true").lower() == "true"
+# 해제되지 않은 세션 표시를 무시하는 시간 (해제 전에 워커가 멈춘 경우 등에 대한 안전장치)
+ADMISSION_SESSION_TTL = float(os.environ.get("ADMISSION_SESSION_TTL", "120"))
+
+
+class AdmissionRejected(Exception):
+    """턴을 수락할 수 없는 경우 (status_code: 응답 코드, retry_after: 다시 시도까지 권장 대기 시간)"""
+
+    def __init__(self, reason, message, status_code, retry_after=None):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self):
+        """토큰 1개가 찰 때까지 남은 시간 (초)"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class AdmissionController:
+    """
+    턴 단위 수락 제어
+
+    - 세션별로 처리 중인 턴은 하나만 허용 (중복 전송된 요청이 파이프라인을 두 번 실행하지 않도록)
+    - 토큰 버킷에 토큰이 없으면 대기열에서 순서대로 기다리고, 대기열이 가득 찼거나 최대 대기 시간을 넘으면 바로 거절
+    """
+
+    def __init__(self, rpm=ADMISSION_RPM, calls_per_turn=ADMISSION_CALLS_PER_TURN, burst=ADMISSION_BURST,
+                 queue_size=ADMISSION_QUEUE_SIZE, max_wait=ADMISSION_MAX_WAIT, session_limit=ADMISSION_SESSION_LIMIT,
+                 session_ttl=ADMISSION_SESSION_TTL):
+        self.bucket = TokenBucket(rpm / 60.0 / calls_per_turn, burst) if rpm > 0 else None
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.session_limit = session_limit
+        self.session_ttl = session_ttl
+        # 처리 중인 세션 -> 수락 시각
+        self.active_sessions = {}
+        self.waiting = 0
+        self._queue_lock = asyncio.Lock()
+
+    async def acquire(self, session_key):
+        """
+        턴 처리를 시작하기 전에 호출 (수락되면 반환, 거절되면 AdmissionRejected)
+
+        Args:
+            session_key (tuple): (user_id, session_id)
+        """
+        now = time.monotonic()
+        if self.session_limit and now - self.active_sessions.get(session_key, -self.session_ttl) < self.session_ttl:
+            increment_counter("admission_total", outcome="session_busy")
+            raise AdmissionRejected("session_busy", "같은 세션의 이전 메시지를 처리 중입니다.", 409)
+
+        self.active_sessions[session_key] = now
+        try:
+            await self._take_token()
+        except BaseException:
+            self.active_sessions.pop(session_key, None)
+            raise
+
+    def release(self, session_key):
+        """턴 처리가 끝나면 호출"""
+        self.active_sessions.pop(session_key, None)
+
+    def release_when_done(self, session_key, task):
+        """
+        task가 끝날 때 해제 (스트리밍 응답용)
+
+        스트리밍 응답 본문(제너레이터)은 클라이언트가 읽기 전에 연결이 끊기면 시작되지 않아 finally에서 해제할 수 없으므로,
+        응답 전송까지 담당하는 요청 처리 태스크가 끝나는 시점(전송 완료 또는 연결 종료로 인한 취소)에 해제합니다.
+        """
+        task.add_done_callback(lambda _: self.release(session_key))
+
+    async def _take_token(self):
+        if self.bucket is None:
+            increment_counter("admission_total", outcome="admitted")
+            return
+        # 먼저 기다리는 턴이 없을 때만 바로 수락 (대기열 순서 유지)
+        if self.waiting == 0 and self.bucket.try_take():
+            increment_counter("admission_total", outcome="admitted")
+            return
+        if self.waiting >= self.queue_size:
+            increment_counter("admission_total", outcome="queue_full")
+            raise AdmissionRejected("queue_full", "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503,
+                                    retry_after=self.bucket.wait_time() * (self.waiting + 1))
+
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            async with self._queue_lock:
+                while not self.bucket.try_take():
+                    delay = self.bucket.wait_time()
+                    if time.monotonic() - started + delay > self.max_wait:
+                        increment_counter("admission_total", outcome="wait_timeout")
+                        raise AdmissionRejected("wait_timeout", "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503,
+                                                retry_after=delay * self.waiting)
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+            observe_histogram("admission_wait_seconds", time.monotonic() - started)
+
+        increment_counter("admission_total", outcome="queued")
+        ai_logger.info(f"⏳ 수락 대기 {time.monotonic() - started:.2f}초 후 턴 처리 시작 (대기 중: {self.waiting})")
+
+
+admission = AdmissionController()
@@ -0,0 +1,87 @@
+# api_server_client.py - API 서버 조회용 공유 HTTP 클라이언트 (연결 풀, keep-alive, 타임아웃)
+import asyncio
+import os
+
+import httpx
+
+from logger_config import ai_logger
+from metrics import increment_counter, observe_histogram
+
+API_SERVER_URL = os.environ.get("API_SERVER_URL", "http://localhost:3002")
+API_SERVER_TIMEOUT = float(os.environ.get("API_SERVER_TIMEOUT", "5"))
+API_SERVER_MAX_CONNECTIONS = int(os.environ.get("API_SERVER_MAX_CONNECTIONS", "20"))
+
+_client = None
+
+
+def get_api_server_client():
+    """프로세스 전체에서 공유하는 httpx.AsyncClient를 반환 (처음 호출할 때 생성)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=API_SERVER_URL,
+            timeout=httpx.Timeout(API_SERVER_TIMEOUT, connect=min(API_SERVER_TIMEOUT, 2.0)),
+            limits=httpx.Limits(
+                max_connections=API_SERVER_MAX_CONNECTIONS,
+                max_keepalive_connections=API_SERVER_MAX_CONNECTIONS,
+                keepalive_expiry=30
+            )
+        )
+    return _client
+
+
+async def close_api_server_client():
+    """공유 클라이언트의 연결을 모두 닫음 (서버 종료 시 호출)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _trace_connections(event_name, info):
+    # 새 TCP 연결이 만들어질 때만 기록 (keep-alive로 재사용된 요청은 기록되지 않음)
+    if event_name == "connection.connect_tcp.complete":
+        increment_counter("api_server_connections_total")
+
+
+async def fetch_json(resource, path):
+    """
+    API 서버에서 JSON 리소스를 조회하는 함수
+
+    Args:
+        resource (str): 지표 라벨로 사용할 리소스 이름 (history, session, state)
+        path (str): 요청 경로
+
+    Returns:
+        tuple: (status_code, data) - 연결 실패/타임아웃 시 (None, None)
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        response = await get_api_server_client().get(path, extensions={"trace": _trace_connections})
+    except httpx.HTTPError as e:
+        ai_logger.error(f"API 서버 연결 실패 ({resource}): {type(e).__name__}: {e}")
+        increment_counter("api_server_requests_total", resource=resource, outcome="error")
+        return None, None
+    finally:
+        observe_histogram("api_server_request_duration_seconds", loop.time() - started, resource=resource)
+
+    increment_counter("api_server_requests_total", resource=resource, outcome=str(response.status_code))
+    if response.status_code != 200:
+        return response.status_code, None
+    return response.status_code, response.json()
+
+
+async def fetch_summary_inputs(user_id, session_id):
+    """
+    레포트 생성에 필요한 대화 내용, 세션 정보, 상태 정보를 동시에 조회하는 함수
+
+    Returns:
+        dict: {"history": (status_code, data), "session": (status_code, data), "state": (status_code, data)}
+    """
+    history, session, state = await asyncio.gather(
+        fetch_json("history", f"/api/history/{user_id}/{session_id}"),
+        fetch_json("session", f"/api/session/{user_id}/{session_id}"),
+        fetch_json("state", f"/api/state/{user_id}/{session_id}")
+    )
+    return {"history": history, "session": session, "state": state}
@@ -0,0 +1,151 @@
+# benchmark_planner.py - 로그에 기록된 턴을 재생하여 기존 2회 호출(NLU → DP)과 통합 플래너(NLU+DP 1회 호출)를 비교하는 스크립트
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import types
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from log_corpus import load_turns
+from metrics import percentile
+from NLU import analyze_intent
+from DP import select_policy
+from Planner import plan_turn
+
+
+class UsageRecordingClient:
+    """AsyncOpenAI 클라이언트를 감싸 호출별 토큰 사용량을 기록하는 래퍼 (chat.completions.create만 사용)"""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        response = await self._client.chat.completions.create(**kwargs)
+        usage = getattr(response, 'usage', None)
+        self.calls.append({
+            "prompt_tokens": getattr(usage, 'prompt_tokens', 0) or 0,
+            "completion_tokens": getattr(usage, 'completion_tokens', 0) or 0
+        })
+        return response
+
+
+async def run_two_call(turn, client):
+    previous_policy = turn["selected_policies"][-1] if turn["selected_policies"] else "start"
+    intent = await analyze_intent(turn["message"], turn["history"], client, previous_policy)
+    policy = await select_policy(
+        intent, turn["message"], turn["history"], client, turn["message_count"],
+        turn["status"], turn["selected_policies"], turn["conversation_style"]
+    )
+    return intent, policy
+
+
+async def run_planner(turn, client):
+    previous_policy = turn["selected_policies"][-1] if turn["selected_policies"] else "start"
+    return await plan_turn(
+        turn["message"], turn["history"], client, previous_policy, turn["message_count"],
+        turn["status"], turn["selected_policies"], turn["conversation_style"]
+    )
+
+
+async def measure(runner, turn, base_client):
+    """한 턴을 실행하여 (결과, 지연 시간, 호출 수, 입력 토큰, 출력 토큰)을 반환"""
+    client = UsageRecordingClient(base_client)
+    started = time.perf_counter()
+    intent, policy = await runner(turn, client)
+    elapsed = time.perf_counter() - started
+    return {
+        "intent": (intent or {}).get("intent"),
+        "policy": policy,
+        "latency": elapsed,
+        "calls": len(client.calls),
+        "prompt_tokens": sum(call["prompt_tokens"] for call in client.calls),
+        "completion_tokens": sum(call["completion_tokens"] for call in client.calls)
+    }
+
+
+def summarize(results):
+    latencies = [result["latency"] for result in results]
+    count = len(results) or 1
+    return {
+        "latency_mean": statistics.mean(latencies) if latencies else 0.0,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "calls_per_turn": sum(result["calls"] for result in results) / count,
+        "prompt_tokens_per_turn": sum(result["prompt_tokens"] for result in results) / count,
+        "completion_tokens_per_turn": sum(result["completion_tokens"] for result in results) / count
+    }
+
+
+def agreement(pairs):
+    """기존 2회 호출 결과를 기준으로 플래너 결과가 일치하는 비율을 계산"""
+    total = len(pairs) or 1
+
+    def rate(key):
+        return sum(key(baseline) == key(planner) for baseline, planner in pairs) / total
+
+    return {
+        "intent": rate(lambda result: result["intent"]),
+        "first_policy": rate(lambda result: (result["policy"] or {}).get("first_policy")),
+        "policy_pair": rate(lambda result: ((result["policy"] or {}).get("first_policy"), (result["policy"] or {}).get("second_policy"))),
+        "next_question": rate(lambda result: (result["policy"] or {}).get("next_question"))
+    }
+
+
+async def benchmark(turns, base_client, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(turn):
+        async with semaphore:
+            baseline = await measure(run_two_call, turn, base_client)
+            planner = await measure(run_planner, turn, base_client)
+            return turn, baseline, planner
+
+    return await asyncio.gather(*[run(turn) for turn in turns])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기존 NLU→DP 2회 호출과 통합 플래너의 지연 시간/토큰/정책 일치율 비교")
+    parser.add_argument('--logs', nargs='*', help="재생할 로그 파일 (기본값: logs/ai-service-*.log)")
+    parser.add_argument('--limit', type=int, default=50, help="재생할 최대 턴 수")
+    parser.add_argument('--concurrency', type=int, default=4, help="동시에 재생할 턴 수")
+    parser.add_argument('--output', help="턴별 결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    load_dotenv()
+    turns = [turn for turn in load_turns(args.logs) if turn["message"] and turn["message"] != "NO_RESPONSE"][:args.limit]
+    print(f"재생할 턴: {len(turns)}개")
+
+    base_client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)  # 재시도는 llm_client에서 처리
+    results = asyncio.run(benchmark(turns, base_client, args.concurrency))
+    # 플래너가 최종 실패한 턴(기존 경로로 대체되는 턴)은 비교에서 제외하고 개수만 보고
+    completed = [result for result in results if result[2]["policy"] is not None]
+    pairs = [(baseline, planner) for _, baseline, planner in completed]
+
+    report = {
+        "turns": len(pairs),
+        "planner_failures": len(results) - len(completed),
+        "two_call": summarize([baseline for baseline, _ in pairs]),
+        "planner": summarize([planner for _, planner in pairs]),
+        "agreement": agreement(pairs)
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "report": report,
+                "turns": [
+                    {"message": turn["message"], "two_call": baseline, "planner": planner}
+                    for turn, baseline, planner in completed
+                ]
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
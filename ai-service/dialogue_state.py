@@ -0,0 +1,168 @@
+# dialogue_state.py - questionId로 색인된 문진 상태 모델과 규칙 기반 상태 전이 (DST의 결정적 업데이트 엔진)
+from logger_config import ai_logger
+from metrics import increment_counter
+
+EXPERIENCE_VALUES = ("yes", "no", "unknown")
+STATUS_VALUES = ("unanswered", "checking", "asking", "answered", "conflict")
+# GPT가 문항별 변경사항(delta)으로 반환할 수 있는 필드 (status, rawUserInput, updated는 규칙으로 결정)
+DELTA_FIELDS = ("experience", "frequency", "condition", "note", "conflict")
+
+
+class QuestionState:
+    """문항 하나의 상태 (API 서버 Status.questions 항목과 같은 필드, 모르는 필드는 extra에 그대로 보관)"""
+
+    __slots__ = ("question_id", "question_text", "experience", "status", "raw_user_input",
+                 "frequency", "condition", "note", "conflict", "updated", "extra")
+
+    def __init__(self, question):
+        question = dict(question)
+        self.question_id = question.pop("questionId")
+        self.question_text = question.pop("questionText", None)
+        self.experience = question.pop("experience", None) or "unknown"
+        self.status = question.pop("status", None) or "unanswered"
+        self.raw_user_input = question.pop("rawUserInput", None) or []
+        self.frequency = question.pop("frequency", None)
+        self.condition = question.pop("condition", None)
+        self.note = question.pop("note", None)
+        self.conflict = question.pop("conflict", None)
+        self.updated = False
+        question.pop("updated", None)
+        self.extra = question
+
+    def to_dict(self):
+        return {
+            "questionId": self.question_id,
+            "questionText": self.question_text,
+            "experience": self.experience,
+            "status": self.status,
+            "rawUserInput": self.raw_user_input,
+            "frequency": self.frequency,
+            "condition": self.condition,
+            "note": self.note,
+            "conflict": self.conflict,
+            "updated": self.updated,
+            **self.extra
+        }
+
+
+def next_status(current, experience, has_detail, new_conflict, reported_experience=None):
+    """
+    문항 상태 전이 규칙
+
+        conflict  --(정정된 experience 수집)--> checking
+        *         --(이전 답변과 모순)-------> conflict
+        *         --(experience: no)--------> answered
+        *         --(experience: yes)-------> asking (빈도/조건 없음) 또는 answered (빈도/조건 있음)
+        *         --(experience: unknown)---> checking (언급은 있으나 모호함)
+
+    Args:
+        current (str): 현재 status
+        experience (str): 이번 변경사항을 반영한 experience
+        has_detail (bool): 빈도나 조건이 수집되었는지 여부
+        new_conflict (bool): 이번 턴에 새로운 모순이 보고되었는지 여부
+        reported_experience (str): 이번 변경사항에 포함된 experience (없으면 None)
+        (conflict 상태에서는 이번 변경사항의 experience가 yes/no로 정정된 경우에만 해소, 저장된 이전 답변은 무시)
+
+    Returns:
+        str: 다음 status
+    """
+    if current == "conflict":
+        return "checking" if reported_experience in ("yes", "no") else "conflict"
+    if new_conflict:
+        return "conflict"
+    if experience == "no":
+        return "answered"
+    if experience == "yes":
+        return "answered" if has_detail else "asking"
+    return "checking"
+
+
+class DialogueState:
+    """questionId로 색인된 전체 문진 상태 (문항 외 필드는 header에 그대로 보관)"""
+
+    def __init__(self, status):
+        status = status or {}
+        self.header = {key: value for key, value in status.items() if key != "questions"}
+        self.questions = {}
+        for question in status.get("questions", []):
+            if question.get("questionId"):
+                self.questions[question["questionId"]] = QuestionState(question)
+
+    def apply_delta(self, delta, user_message):
+        """
+        GPT가 반환한 문항 하나의 변경사항을 규칙에 따라 반영하는 함수
+
+        Args:
+            delta (dict): {"questionId": ..., 그리고 DELTA_FIELDS 중 바뀐 필드만}
+            user_message (str): 이번 사용자 발화 (rawUserInput에 추가)
+
+        Returns:
+            QuestionState: 반영된 문항 (알 수 없는 questionId면 None)
+        """
+        question = self.questions.get(delta.get("questionId"))
+        if question is None:
+            ai_logger.warning(f"⚠️ 알 수 없는 문항의 변경사항 무시: {delta}")
+            increment_counter("dst_deltas_total", outcome="unknown_question")
+            return None
+
+        previous_status = question.status
+        experience = delta.get("experience")
+        if experience in ("yes", "no") or (experience == "unknown" and question.experience == "unknown"):
+            question.experience = experience
+        for field in ("frequency", "condition", "note"):
+            if delta.get(field):
+                setattr(question, field, delta[field])
+
+        new_conflict = bool(delta.get("conflict"))
+        question.status = next_status(previous_status, question.experience,
+                                      bool(question.frequency or question.condition), new_conflict, experience)
+        if previous_status == "conflict" and question.status == "checking":
+            # 충돌이 해소된 경우 해소 기록을 남김 (GPT가 기록을 주지 않으면 규칙으로 작성)
+            question.conflict = delta.get("conflict") or f"{question.conflict} → 정정: {user_message}"
+        elif new_conflict:
+            question.conflict = delta["conflict"]
+
+        if user_message and (not question.raw_user_input or question.raw_user_input[-1] != user_message):
+            question.raw_user_input = question.raw_user_input + [user_message]
+        question.updated = True
+
+        increment_counter("dst_transitions_total", from_status=previous_status, to_status=question.status)
+        return question
+
+    def to_status(self, last_answered_question):
+        """DP/NLG가 사용하는 상태 형식(questions 배열)으로 변환"""
+        return {
+            **self.header,
+            "questions": [question.to_dict() for question in self.questions.values()],
+            "last_answered_question": last_answered_question
+        }
+
+
+def apply_updates(status, deltas, user_message):
+    """
+    GPT가 반환한 문항별 변경사항을 상태에 반영하는 함수 (입력 status는 변경하지 않음)
+
+    Args:
+        status (dict): 현재 상태 정보
+        deltas (list): 문항별 변경사항 목록
+        user_message (str): 이번 사용자 발화
+
+    Returns:
+        tuple: (updated_slots, updated_status, last_answered_question)
+            - updated_slots: 이번 턴에 바뀐 문항들의 전체 필드 (API 서버 DB 업데이트용)
+            - updated_status: 업데이트 후 전체 상태 (DP 정책 선택용)
+            - last_answered_question: 마지막으로 업데이트된 문항 ID (없으면 None)
+    """
+    state = DialogueState(status)
+    touched = {}
+    for delta in deltas:
+        if not isinstance(delta, dict):
+            continue
+        question = state.apply_delta(delta, user_message)
+        if question is not None:
+            touched.pop(question.question_id, None)
+            touched[question.question_id] = question
+
+    last_answered_question = next(reversed(touched), None)
+    updated_slots = [question.to_dict() for question in touched.values()]
+    return updated_slots, state.to_status(last_answered_question), last_answered_question
@@ -0,0 +1,230 @@
+# intent_classifier.py - 로그로 학습하는 경량 의도 분류기 (문자 n-gram + 로지스틱 회귀, CPU 전용)
+import argparse
+import json
+import math
+import os
+import random
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+
+# NLU.INTENT_ANALYSIS_PROMPT에 정의된 12가지 의도
+INTENT_LABELS = (
+    "greeting", "answer_symptom", "answer_frequency", "answer_condition",
+    "question", "request", "off_topic", "modify_tone", "modify_conversation_style",
+    "answer_tone", "answer_conversation_style", "other"
+)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'intent_model.json')
+NGRAM_RANGE = (1, 3)
+
+
+def normalize_intent_label(label):
+    """로그에 기록된 의도 값을 12가지 의도 중 하나로 정규화 (other 변형은 other로, 그 외 값은 None)"""
+    if not label:
+        return None
+    label = str(label).strip()
+    if label in INTENT_LABELS:
+        return label
+    if label.lower().startswith("other"):
+        return "other"
+    return None
+
+
+def extract_features(user_message, previous_policy):
+    """사용자 발화의 문자 n-gram과 직전 정책을 특징으로 변환 (값은 L2 정규화)"""
+    text = re.sub(r"\s+", " ", (user_message or "").strip().lower())
+    padded = f"^{text}$"
+    counts = Counter()
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            counts[f"c{n}:{padded[i:i + n]}"] += 1
+    counts[f"prev:{previous_policy or 'start'}"] += 1
+    counts[f"len:{min(len(text) // 5, 10)}"] += 1
+
+    features = {name: 1.0 + math.log(count) for name, count in counts.items()}
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {name: value / norm for name, value in features.items()}
+
+
+def extract_training_pairs(turns):
+    """
+    로그 턴 목록에서 (사용자 발화, 직전 정책, 의도) 학습 쌍을 추출하는 함수
+    GPT가 분석한 의도만 사용하며, 12가지 의도로 정규화할 수 없는 값은 제외합니다.
+    """
+    pairs = []
+    for turn in turns:
+        intent = normalize_intent_label((turn.get("intent") or {}).get("intent"))
+        message = turn.get("message")
+        if not intent or not message or message == "NO_RESPONSE":
+            continue
+        selected_policies = turn.get("selected_policies") or []
+        previous_policy = selected_policies[-1] if selected_policies else "start"
+        pairs.append({
+            "message": message,
+            "previous_policy": previous_policy,
+            "intent": intent,
+            "session_id": turn.get("session_id")
+        })
+    return pairs
+
+
+class IntentClassifier:
+    """다중 클래스 로지스틱 회귀 의도 분류기 (가중치는 특징 이름 → 클래스별 가중치 리스트)"""
+
+    def __init__(self, labels, weights=None, bias=None, metadata=None):
+        self.labels = list(labels)
+        self.weights = weights or {}
+        self.bias = bias or [0.0] * len(self.labels)
+        self.metadata = metadata or {}
+
+    def _scores(self, features):
+        scores = list(self.bias)
+        for name, value in features.items():
+            row = self.weights.get(name)
+            if row:
+                for k, weight in enumerate(row):
+                    scores[k] += weight * value
+        return scores
+
+    @staticmethod
+    def _softmax(scores):
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict_proba(self, user_message, previous_policy):
+        """의도별 확률을 {의도: 확률} 형태로 반환"""
+        probabilities = self._softmax(self._scores(extract_features(user_message, previous_policy)))
+        return dict(zip(self.labels, probabilities))
+
+    def predict(self, user_message, previous_policy):
+        """가장 확률이 높은 의도와 그 확률(신뢰도)을 반환"""
+        probabilities = self.predict_proba(user_message, previous_policy)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    @classmethod
+    def train(cls, pairs, epochs=30, learning_rate=0.5, l2=1e-4, seed=42):
+        """SGD로 소프트맥스 회귀를 학습"""
+        labels = [label for label in INTENT_LABELS if any(pair["intent"] == label for pair in pairs)]
+        label_index = {label: k for k, label in enumerate(labels)}
+        samples = [(extract_features(pair["message"], pair["previous_policy"]), label_index[pair["intent"]]) for pair in pairs]
+
+        model = cls(labels)
+        weights = defaultdict(lambda: [0.0] * len(labels))
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            step = learning_rate / (1.0 + epoch * 0.2)
+            for features, target in samples:
+                model.weights = weights
+                probabilities = cls._softmax(model._scores(features))
+                for k, probability in enumerate(probabilities):
+                    gradient = probability - (1.0 if k == target else 0.0)
+                    model.bias[k] -= step * gradient
+                    for name, value in features.items():
+                        row = weights[name]
+                        row[k] -= step * (gradient * value + l2 * row[k])
+
+        # 영향이 거의 없는 가중치는 제거하여 모델 크기를 줄임
+        model.weights = {
+            name: [round(weight, 5) for weight in row]
+            for name, row in weights.items() if max(abs(weight) for weight in row) > 1e-4
+        }
+        model.bias = [round(value, 5) for value in model.bias]
+        return model
+
+    def evaluate(self, pairs, threshold):
+        """정확도와, 신뢰도 threshold 이상인 예측의 비율(coverage) 및 정확도를 계산"""
+        correct = covered = covered_correct = 0
+        for pair in pairs:
+            label, confidence = self.predict(pair["message"], pair["previous_policy"])
+            hit = label == pair["intent"]
+            correct += hit
+            if confidence >= threshold:
+                covered += 1
+                covered_correct += hit
+        total = len(pairs) or 1
+        return {
+            "samples": len(pairs),
+            "accuracy": correct / total,
+            "coverage": covered / total,
+            "covered_accuracy": covered_correct / covered if covered else 0.0
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "labels": self.labels,
+                "bias": self.bias,
+                "weights": self.weights,
+                "metadata": self.metadata
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["labels"], data["weights"], data["bias"], data.get("metadata"))
+
+
+def split_by_session(pairs, holdout_ratio=0.2, seed=42):
+    """같은 세션의 발화가 학습/검증에 섞이지 않도록 세션 단위로 분할"""
+    sessions = sorted({pair["session_id"] for pair in pairs}, key=str)
+    random.Random(seed).shuffle(sessions)
+    holdout_sessions = set(sessions[:max(1, int(len(sessions) * holdout_ratio))])
+    train = [pair for pair in pairs if pair["session_id"] not in holdout_sessions]
+    holdout = [pair for pair in pairs if pair["session_id"] in holdout_sessions]
+    return train, holdout
+
+
+def train_command(args):
+    from log_corpus import load_turns
+
+    pairs = extract_training_pairs(load_turns(args.logs))
+    print(f"학습 데이터: {len(pairs)}개 발화, 의도 분포: {dict(Counter(pair['intent'] for pair in pairs))}")
+
+    train, holdout = split_by_session(pairs)
+    report = IntentClassifier.train(train, epochs=args.epochs).evaluate(holdout, args.threshold)
+    print(f"검증 결과 (세션 단위 홀드아웃 {report['samples']}개): "
+          f"정확도 {report['accuracy']:.1%}, 신뢰도 {args.threshold} 이상 비율 {report['coverage']:.1%}, "
+          f"해당 구간 정확도 {report['covered_accuracy']:.1%}")
+
+    model = IntentClassifier.train(pairs, epochs=args.epochs)
+    model.metadata = {
+        "trained_at": datetime.now().isoformat(timespec='seconds'),
+        "samples": len(pairs),
+        "holdout": report
+    }
+    model.save(args.output)
+    print(f"모델 저장 완료: {args.output} (특징 {len(model.weights)}개)")
+
+
+def predict_command(args):
+    model = IntentClassifier.load(args.model)
+    label, confidence = model.predict(args.message, args.previous_policy)
+    print(json.dumps({"intent": label, "confidence": round(confidence, 4)}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="로그 기반 경량 의도 분류기 학습/예측")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help="logs/*.log에서 학습 데이터를 추출하여 모델 학습")
+    train_parser.add_argument('--logs', nargs='*', help="학습에 사용할 로그 파일 (기본값: logs/ai-service-*.log)")
+    train_parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help="모델 저장 경로")
+    train_parser.add_argument('--epochs', type=int, default=30)
+    train_parser.add_argument('--threshold', type=float, default=0.85, help="검증 리포트에 사용할 신뢰도 기준")
+    train_parser.set_defaults(func=train_command)
+
+    predict_parser = subparsers.add_parser('predict', help="학습된 모델로 발화의 의도를 예측")
+    predict_parser.add_argument('message')
+    predict_parser.add_argument('--previous-policy', default='start')
+    predict_parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    predict_parser.set_defaults(func=predict_command)
+
+    args = parser.parse_args()
+    args.func(args)
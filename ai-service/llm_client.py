@@ -0,0 +1,319 @@
+# llm_client.py - 모든 단계가 공유하는 GPT 호출 계층 (단계별 타임아웃/예산, 지수 백오프+지터, 서킷 브레이커, 헤지 요청)
+import asyncio
+import os
+import random
+import time
+
+import openai
+
+from logger_config import ai_logger, log_api_call
+from metrics import format_token_usage, increment_counter, observe_histogram, record_llm_call, timed_completion
+from schemas import SchemaValidationError
+from turn_budget import call_deadline
+
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+# 재시도 대기 시간: 0 ~ min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2^(재시도 회차-1)) 사이의 임의 값 (full jitter)
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "4"))
+
+# 단계별 호출 1회 타임아웃과, 재시도/대기를 포함한 전체 예산 (초, LLM_TIMEOUT_<STAGE>, LLM_BUDGET_<STAGE>로 변경)
+DEFAULT_STAGE_TIMEOUTS = {"nlu": 8, "dp": 8, "planner": 10, "dst": 15, "nlg": 20, "summary": 60, "memory": 30}
+DEFAULT_STAGE_BUDGETS = {"nlu": 15, "dp": 15, "planner": 20, "dst": 30, "nlg": 40, "summary": 120, "memory": 60}
+STAGE_TIMEOUTS = {
+    stage: float(os.environ.get(f"LLM_TIMEOUT_{stage.upper()}", timeout))
+    for stage, timeout in DEFAULT_STAGE_TIMEOUTS.items()
+}
+STAGE_BUDGETS = {
+    stage: float(os.environ.get(f"LLM_BUDGET_{stage.upper()}", budget))
+    for stage, budget in DEFAULT_STAGE_BUDGETS.items()
+}
+
+# 연속 실패가 LLM_BREAKER_THRESHOLD회에 도달하면 LLM_BREAKER_COOLDOWN초 동안 호출하지 않고 바로 실패 처리
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+
+# 헤지 요청: 지정한 단계(예: "nlu,dp")의 호출이 LLM_HEDGE_DELAY초 안에 끝나지 않으면 같은 요청을 하나 더 보내 먼저 끝난 응답을 사용
+LLM_HEDGE_STAGES = {stage.strip() for stage in os.environ.get("LLM_HEDGE_STAGES", "").split(",") if stage.strip()}
+LLM_HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY", "1.5"))
+
+# 재시도해도 결과가 달라지지 않는 오류 (잘못된 요청, 인증 실패 등)
+NON_RETRYABLE_ERRORS = (
+    openai.BadRequestError, openai.AuthenticationError, openai.PermissionDeniedError,
+    openai.NotFoundError, openai.UnprocessableEntityError
+)
+
+
+class LLMUnavailable(Exception):
+    """서킷 브레이커가 열려 있거나 단계 예산을 모두 사용하여 GPT를 호출할 수 없는 경우"""
+
+
+class CircuitBreaker:
+    """
+    프로바이더 장애 시 모든 단계의 호출을 빠르게 실패시키는 서킷 브레이커 (단계 간 공유)
+
+    closed → (연속 실패 threshold회) → open → (cooldown초 경과) → half_open (시험 호출 1건만 허용)
+    → 성공 시 closed, 실패 시 다시 open
+    """
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def _set_state(self, state):
+        if self.state != state:
+            ai_logger.warning(f"⚡ LLM 서킷 브레이커 상태 변경: {self.state} → {state}")
+            increment_counter("llm_circuit_transitions_total", state=state)
+            self.state = state
+
+    def before_call(self, stage):
+        """
+        호출 가능 여부를 확인 (불가능하면 LLMUnavailable)
+
+        Returns:
+            bool: 이 호출이 half_open 상태의 시험 호출인지 여부
+        """
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self._set_state("half_open")
+        if self.state == "open" or (self.state == "half_open" and self.probing):
+            increment_counter("llm_circuit_rejected_total", stage=stage)
+            raise LLMUnavailable(f"LLM 서킷 브레이커가 열려 있습니다 ({stage})")
+        if self.state == "half_open":
+            self.probing = True
+            return True
+        return False
+
+    def release_probe(self, probe):
+        """성공/실패로 판단할 수 없이 끝난 호출(취소, 잘못된 요청 등)이 시험 호출이면 다음 호출이 시험할 수 있도록 해제"""
+        if probe:
+            self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+        self._set_state("closed")
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.probing = False
+            self.opened_at = time.monotonic()
+            self._set_state("open")
+
+
+breaker = CircuitBreaker()
+
+
+def stage_timeout(stage):
+    return STAGE_TIMEOUTS.get(stage, 30.0)
+
+
+def backoff_delay(retry):
+    """retry번째 재시도 전 대기 시간 (지수 백오프 + full jitter)"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (retry - 1)))
+
+
+def is_retryable(error):
+    return not isinstance(error, NON_RETRYABLE_ERRORS)
+
+
+def counts_as_provider_failure(error):
+    """서킷 브레이커에 반영할 실패인지 여부 (응답 형식 오류와 잘못된 요청은 프로바이더 장애가 아님)"""
+    return not isinstance(error, (SchemaValidationError, LLMUnavailable) + NON_RETRYABLE_ERRORS)
+
+
+async def _hedged_completion(client, stage, prompt_type, attempt, kwargs):
+    primary = asyncio.create_task(timed_completion(client, stage, prompt_type, attempt, **kwargs))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=LLM_HEDGE_DELAY)
+        if done:
+            return primary.result()
+
+        increment_counter("llm_hedges_total", stage=stage, outcome="launched")
+        hedge = asyncio.create_task(timed_completion(client, stage, f"{prompt_type}_hedge", attempt, **kwargs))
+        tasks.append(hedge)
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    increment_counter("llm_hedges_total", stage=stage, outcome="hedge_won" if task is hedge else "primary_won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _call_deadline(stage, loop):
+    """단계 예산과 턴 예산 중 먼저 끝나는 시각 (이벤트 루프 시간 기준)"""
+    deadline = loop.time() + STAGE_BUDGETS.get(stage, 60.0)
+    turn_deadline = call_deadline(stage, loop.time())
+    if turn_deadline is not None:
+        # 턴 예산이 단계 예산보다 먼저 끝나면 턴 마감 시각에 맞춤
+        deadline = min(deadline, turn_deadline)
+    return deadline
+
+
+async def call_llm(client, stage, prompt_type, parse=None, **kwargs):
+    """
+    GPT를 호출하고, 실패하면 단계 예산 안에서 재시도하는 함수
+
+    Args:
+        client: OpenAI 비동기 클라이언트
+        stage (str): 파이프라인 단계 (타임아웃/예산/헤지 설정과 지표 라벨에 사용)
+        prompt_type (str): 로그에 기록할 호출 유형
+        parse (callable): 응답 텍스트를 결과로 변환하는 함수 (SchemaValidationError 발생 시 대기 없이 재시도)
+        **kwargs: chat.completions.create에 전달할 인자
+
+    Returns:
+        parse가 있으면 parse(응답 텍스트), 없으면 chat.completions.create의 응답
+
+    Raises:
+        LLMUnavailable: 서킷 브레이커가 열려 있거나 예산을 모두 사용한 경우
+        Exception: 재시도할 수 없는 오류이거나 마지막 시도의 오류
+    """
+    loop = asyncio.get_running_loop()
+    deadline = _call_deadline(stage, loop)
+    last_error = None
+
+    for attempt in range(1, LLM_MAX_RETRIES + 1):
+        if attempt > 1:
+            # 응답 형식 오류는 대기 없이 바로 재시도
+            delay = 0 if isinstance(last_error, SchemaValidationError) else backoff_delay(attempt - 1)
+            if loop.time() + delay >= deadline:
+                break
+            ai_logger.info(f"🔄 {stage} 재시도 {attempt - 1}/{LLM_MAX_RETRIES - 1} ({delay:.2f}초 후)")
+            await asyncio.sleep(delay)
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        probe = breaker.before_call(stage)
+        try:
+            if stage in LLM_HEDGE_STAGES:
+                call = _hedged_completion(client, stage, prompt_type, attempt, kwargs)
+            else:
+                call = timed_completion(client, stage, prompt_type, attempt, **kwargs)
+            response = await asyncio.wait_for(call, min(stage_timeout(stage), remaining))
+            breaker.record_success()
+            if parse is None:
+                return response
+            return parse(response.choices[0].message.content)
+        except asyncio.TimeoutError:
+            last_error = TimeoutError(f"{stage} 호출 시간 초과")
+            increment_counter("llm_timeouts_total", stage=stage)
+            breaker.record_failure()
+        except asyncio.CancelledError:
+            # 호출이 취소된 경우(추측 실행 취소, 헤지 패배, 클라이언트 연결 종료)는 성공도 실패도 아님
+            breaker.release_probe(probe)
+            raise
+        except Exception as e:
+            last_error = e
+            if counts_as_provider_failure(e):
+                breaker.record_failure()
+            elif not isinstance(e, SchemaValidationError):
+                # 잘못된 요청 등은 다시 보내도 같은 결과이므로 프로바이더 상태와 무관하게 시험 호출을 끝냄
+                breaker.release_probe(probe)
+            if not is_retryable(e):
+                raise
+        ai_logger.warning(f"⚠️ {stage} 호출 시도 {attempt} 실패: {type(last_error).__name__}: {last_error}")
+
+    if last_error is None:
+        raise LLMUnavailable(f"{stage} 단계 예산을 모두 사용했습니다")
+    raise last_error
+
+
+async def stream_llm(client, stage, prompt_type, **kwargs):
+    """
+    GPT 스트리밍 응답을 열고, 모델이 생성한 텍스트 조각을 도착하는 즉시 반환하는 비동기 제너레이터
+
+    재시도, 예산, 서킷 브레이커 처리는 call_llm과 같으며, 첫 조각을 받기 전에 실패한 경우에만 재시도합니다.
+    이미 일부를 전달한 뒤의 실패는 재시도하지 않고 그대로 예외를 전파합니다.
+    소비자가 중간에 그만 읽는 경우 서킷 브레이커의 시험 호출이 해제되도록 contextlib.aclosing으로 감싸서 사용합니다.
+
+    Args:
+        client: OpenAI 비동기 클라이언트
+        stage (str): 파이프라인 단계 (타임아웃/예산 설정과 지표 라벨에 사용)
+        prompt_type (str): 로그에 기록할 호출 유형
+        **kwargs: chat.completions.create에 전달할 인자 (stream, stream_options는 자동으로 설정)
+
+    Yields:
+        str: 응답 텍스트 조각
+
+    Raises:
+        LLMUnavailable: 서킷 브레이커가 열려 있거나 예산을 모두 사용한 경우
+        Exception: 재시도할 수 없는 오류, 마지막 시도의 오류, 또는 일부를 전달한 뒤의 오류
+    """
+    loop = asyncio.get_running_loop()
+    deadline = _call_deadline(stage, loop)
+    model = kwargs.get("model")
+    request_options = {
+        "timeout": stage_timeout(stage),  # 연결 및 청크 사이 대기 시간 제한
+        **kwargs,
+        "stream": True,
+        "stream_options": {"include_usage": True}  # 마지막 청크로 토큰 사용량 수신
+    }
+    last_error = None
+
+    for attempt in range(1, LLM_MAX_RETRIES + 1):
+        if attempt > 1:
+            delay = backoff_delay(attempt - 1)
+            if loop.time() + delay >= deadline:
+                break
+            ai_logger.info(f"🔄 {stage} 스트리밍 재시도 {attempt - 1}/{LLM_MAX_RETRIES - 1} ({delay:.2f}초 후)")
+            await asyncio.sleep(delay)
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        probe = breaker.before_call(stage)
+        streamed = False
+        started = time.perf_counter()
+        try:
+            stream = await asyncio.wait_for(client.chat.completions.create(**request_options), min(stage_timeout(stage), remaining))
+            usage = None
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not streamed:
+                        observe_histogram("llm_time_to_first_token_seconds", time.perf_counter() - started, stage=stage)
+                    streamed = True
+                    yield delta
+
+            breaker.record_success()
+            record_llm_call(stage, model, attempt, "success", time.perf_counter() - started, usage)
+            log_api_call(model, f"{prompt_type}_stream", attempt, format_token_usage(usage))
+            return
+        except (asyncio.CancelledError, GeneratorExit):
+            # 취소되거나 소비자가 스트림을 닫은 경우(클라이언트 연결 종료)는 성공도 실패도 아님
+            breaker.release_probe(probe)
+            raise
+        except Exception as e:
+            last_error = e
+            if isinstance(e, asyncio.TimeoutError):
+                last_error = TimeoutError(f"{stage} 스트림 연결 시간 초과")
+                increment_counter("llm_timeouts_total", stage=stage)
+            record_llm_call(stage, model, attempt, "error", time.perf_counter() - started)
+            if counts_as_provider_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.release_probe(probe)
+            if streamed or not is_retryable(e):
+                raise last_error
+        ai_logger.warning(f"⚠️ {stage} 스트리밍 시도 {attempt} 실패: {type(last_error).__name__}: {last_error}")
+
+    if last_error is None:
+        raise LLMUnavailable(f"{stage} 단계 예산을 모두 사용했습니다")
+    raise last_error
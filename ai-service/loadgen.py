@@ -0,0 +1,152 @@
+# loadgen.py - 여러 세션을 동시에 실행하여 /api/chat 처리량과 지연 시간을 측정하는 부하 생성기
+# (API 서버 대신 세션별 히스토리/상태를 직접 관리하므로 MongoDB 없이 AI 서비스만 단독으로 측정)
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from metrics import percentile
+
+DEFAULT_MESSAGES = (
+    "요즘 좀 우울해요", "거의 매일 그런 것 같아요", "잠을 잘 못 자요", "일주일에 서너 번 정도요",
+    "회사 일이 너무 많아서 그래요", "걱정이 많아졌어요", "아니요 그런 건 없어요", "가끔 그래요"
+)
+WINDOW_SIZE = 10  # api-server의 기본 WINDOW_SIZE (최근 WINDOW_SIZE * 2개 메시지만 히스토리에 포함)
+
+
+def initial_status(corpus=None):
+    """세션 시작 시의 문진 상태 (코퍼스가 있으면 기록된 문항 텍스트 사용)"""
+    questions = next((turn["status"]["questions"] for turn in corpus or [] if len(turn["status"]["questions"]) >= 10), None)
+    return {
+        "is_completed": False,
+        "last_answered_question": None,
+        "last_asked_question": None,
+        "questions": [
+            {"questionId": f"Q{i}", "questionText": questions[i - 1]["questionText"] if questions else f"문항 {i}",
+             "experience": "unknown", "status": "unanswered", "rawUserInput": [], "frequency": None,
+             "condition": None, "note": None, "conflict": None, "updated": False}
+            for i in range(1, 11)
+        ]
+    }
+
+
+class Session:
+    """API 서버(routes/agent.js)처럼 히스토리, 정책 이력, 문진 상태를 누적하는 가상 세션"""
+
+    def __init__(self, index, messages, status):
+        self.user_id = f"load_user_{index}"
+        self.session_id = f"load_session_{index}_{int(time.time())}"
+        self.messages = messages
+        self.status = status
+        self.chat = [("bot", "안녕하세요? 요즘 어떻게 지내세요?")]
+        self.selected_policies = []
+
+    def payload(self, message):
+        recent = self.chat[-WINDOW_SIZE * 2:]
+        return {
+            "message": message,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "timestamp": int(time.time() * 1000),
+            "history": "\n".join(f"{'Bot' if sender == 'bot' else 'User'}: {text}" for sender, text in recent),
+            "last_bot_message": next((text for sender, text in reversed(self.chat) if sender == "bot"), None),
+            "status": self.status,
+            "messageCount": len(self.chat),
+            "selectedPolicies": self.selected_policies,
+            "tonePreference": "미선택",
+            "conversationStyle": "미선택"
+        }
+
+    def apply(self, message, data):
+        """응답을 히스토리와 상태에 반영"""
+        self.chat += [("user", message), ("bot", data.get("response", ""))]
+        self.selected_policies += [policy for policy in (data.get("first_policy"), data.get("second_policy")) if policy]
+        for slot in data.get("updated_slots") or []:
+            for index, question in enumerate(self.status["questions"]):
+                if question["questionId"] == slot.get("questionId"):
+                    self.status["questions"][index] = {**question, **slot}
+        if data.get("last_asked_question"):
+            self.status["last_asked_question"] = data["last_asked_question"]
+        if data.get("last_answered_question"):
+            self.status["last_answered_question"] = data["last_answered_question"]
+
+
+async def run_session(http, url, session, turns, think_time, results):
+    for turn_index in range(turns):
+        message = session.messages[turn_index % len(session.messages)]
+        started = time.perf_counter()
+        try:
+            response = await http.post(f"{url}/api/chat", json=session.payload(message))
+            outcome = str(response.status_code)
+            if response.status_code == 200:
+                session.apply(message, response.json())
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        results.append((time.perf_counter() - started, outcome))
+        if think_time > 0:
+            await asyncio.sleep(think_time)
+
+
+async def run_step(url, sessions, turns, think_time, timeout, corpus):
+    """sessions개 세션을 동시에 실행하고 결과를 요약"""
+    messages = [turn["message"] for turn in corpus] if corpus else list(DEFAULT_MESSAGES)
+    results = []
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as http:
+        await asyncio.gather(*[
+            run_session(http, url, Session(index, messages[index::sessions] or messages, initial_status(corpus)),
+                        turns, think_time, results)
+            for index in range(sessions)
+        ])
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, outcome in results if outcome == "200"]
+    return {
+        "sessions": sessions,
+        "turns": len(results),
+        "elapsed": elapsed,
+        "throughput_turns_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "outcomes": dict(Counter(outcome for _, outcome in results)),
+        "latency_mean": statistics.mean(latencies) if latencies else 0.0,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/chat 동시 세션 부하 생성기 (세션 수를 늘려가며 처리량 한계 확인)")
+    parser.add_argument('--url', default='http://localhost:5002', help="AI 서비스 주소")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10], help="동시 세션 수 (여러 개를 주면 차례로 측정, 예: 10 50 100)")
+    parser.add_argument('--turns', type=int, default=5, help="세션당 턴 수")
+    parser.add_argument('--think-time', type=float, default=0.0, help="턴 사이 대기 시간 (초)")
+    parser.add_argument('--timeout', type=float, default=60.0, help="요청 타임아웃 (초)")
+    parser.add_argument('--corpus', help="사용자 발화를 가져올 replay.py 코퍼스 (없으면 기본 발화)")
+    parser.add_argument('--output', help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    corpus = None
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            corpus = [json.loads(line) for line in f if line.strip()]
+
+    report = []
+    for sessions in args.sessions:
+        step = asyncio.run(run_step(args.url, sessions, args.turns, args.think_time, args.timeout, corpus))
+        print(json.dumps(step, ensure_ascii=False))
+        report.append(step)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
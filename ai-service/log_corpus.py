@@ -0,0 +1,162 @@
+# log_corpus.py - AI 서비스 로그(logs/ai-service-*.log)에서 대화 턴 정보를 추출하는 모듈
+import ast
+import glob
+import os
+import re
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), 'logs')
+
+# logger_config.setup_logger의 포맷: 시간 | 레벨 | 로거 이름 | 함수:라인 | 메시지
+LOG_LINE_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\w+)\s*\| [^|]+\| ([^|:]+):(\d+) \| (.*)$"
+)
+QUESTION_ROW_PATTERN = re.compile(r"^\s+\S+ (Q\d+): (.*) \((\w+)\)$")
+USER_SESSION_PATTERN = re.compile(r"^👤 User ID: (.*), Session ID: (.*)$")
+
+
+def default_log_paths():
+    """logs 디렉토리의 일별 로그 파일 경로를 날짜순으로 반환"""
+    return sorted(glob.glob(os.path.join(LOG_DIR, 'ai-service-*.log')))
+
+
+def read_log_records(path):
+    """
+    로그 파일을 레코드 단위로 읽는 제너레이터
+    타임스탬프가 없는 줄(여러 줄로 기록된 대화 히스토리 등)은 직전 레코드의 메시지에 이어 붙입니다.
+
+    Yields:
+        dict: {"time", "level", "function", "message"}
+    """
+    record = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            match = LOG_LINE_PATTERN.match(line)
+            if match:
+                if record:
+                    yield record
+                record = {
+                    "time": match.group(1),
+                    "level": match.group(2),
+                    "function": match.group(3).strip(),
+                    "message": match.group(5)
+                }
+            elif record:
+                record["message"] += "\n" + line
+    if record:
+        yield record
+
+
+def _literal(text):
+    """로그에 repr로 기록된 파이썬 값을 복원 (실패 시 None)"""
+    try:
+        return ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError):
+        return None
+
+
+def _new_turn(record):
+    return {
+        "started_at": record["time"],
+        "user_id": None,
+        "session_id": None,
+        "timestamp": None,
+        "message": None,
+        "message_count": 0,
+        "selected_policies": [],
+        "last_bot_message": None,
+        "tone_preference": None,
+        "conversation_style": None,
+        "history": "",
+        "status": {
+            "is_completed": False,
+            "last_answered_question": None,
+            "last_asked_question": None,
+            "questions": []
+        },
+        "intent": None,
+        "dst_raw": None,
+        "policy": None,
+        "response": None
+    }
+
+
+def _none_or(text):
+    return None if text == "None" else text
+
+
+def parse_turns(records):
+    """
+    로그 레코드에서 /api/chat 요청 단위의 턴 정보를 추출하는 제너레이터
+    API_REQUEST 레코드가 새 턴의 시작이며, 각 단계의 결과가 기록되지 않은 항목은 None으로 남습니다.
+
+    Yields:
+        dict: 요청 입력(메시지, 히스토리, 상태, 이전 정책 등)과 단계별 출력(의도, DST, 정책, 응답)
+    """
+    turn = None
+    for record in records:
+        message = record["message"]
+
+        if message.startswith("API_REQUEST |"):
+            if turn:
+                yield turn
+            turn = _new_turn(record)
+            continue
+        if turn is None:
+            continue
+
+        if message.startswith("💬 User Message: "):
+            turn["message"] = message[len("💬 User Message: "):]
+        elif message.startswith("👤 User ID: "):
+            match = USER_SESSION_PATTERN.match(message)
+            if match:
+                turn["user_id"], turn["session_id"] = match.group(1), match.group(2)
+        elif message.startswith("⏰ Timestamp: "):
+            turn["timestamp"] = message[len("⏰ Timestamp: "):]
+        elif message.startswith("📊 Message Count: "):
+            count = message[len("📊 Message Count: "):]
+            turn["message_count"] = int(count) if count.isdigit() else 0
+        elif message.startswith("📋 Selected Policies: "):
+            turn["selected_policies"] = _literal(message[len("📋 Selected Policies: "):]) or []
+        elif message.startswith("🤖 Last Bot Message: "):
+            turn["last_bot_message"] = _none_or(message[len("🤖 Last Bot Message: "):])
+        elif message.startswith("🗣️ Tone Preference: "):
+            turn["tone_preference"] = _none_or(message[len("🗣️ Tone Preference: "):])
+        elif message.startswith("💬 Conversation Style: "):
+            turn["conversation_style"] = _none_or(message[len("💬 Conversation Style: "):])
+        elif message.startswith("📚 Conversation History:"):
+            turn["history"] = message[len("📚 Conversation History:"):].lstrip("\n")
+        elif message.startswith("✅ Is Completed: "):
+            turn["status"]["is_completed"] = message.endswith("True")
+        elif message.startswith("🔄 Last Answered: "):
+            turn["status"]["last_answered_question"] = _none_or(message[len("🔄 Last Answered: "):])
+        elif message.startswith("❓ Last Asked: "):
+            turn["status"]["last_asked_question"] = _none_or(message[len("❓ Last Asked: "):])
+        elif QUESTION_ROW_PATTERN.match(message):
+            match = QUESTION_ROW_PATTERN.match(message)
+            turn["status"]["questions"].append({
+                "questionId": match.group(1),
+                "questionText": match.group(2),
+                "status": match.group(3)
+            })
+        elif message.startswith("✅ 의도 분석 완료: "):
+            turn["intent"] = _literal(message[len("✅ 의도 분석 완료: "):])
+        elif message.startswith("🤖 GPT 분석 결과: "):
+            # 이전 로그는 업데이트된 문항 전체, 현재 로그는 문항별 변경사항의 JSON 배열 (대상 문항 분석 후 전체 분석을 다시 하면 마지막 결과 사용)
+            turn["dst_raw"] = message[len("🤖 GPT 분석 결과: "):]
+        elif message.startswith("📊 정책 선택 결과: "):
+            turn["policy"] = _literal(message[len("📊 정책 선택 결과: "):])
+        elif message.startswith("✅ 응답 생성 완료: "):
+            turn["response"] = message[len("✅ 응답 생성 완료: "):]
+        elif message.startswith("✅ 복합 정책 응답 생성 완료: "):
+            turn["response"] = message[len("✅ 복합 정책 응답 생성 완료: "):]
+    if turn:
+        yield turn
+
+
+def load_turns(log_paths=None):
+    """주어진 로그 파일들(기본값: logs 디렉토리 전체)에서 턴 목록을 추출하여 반환"""
+    turns = []
+    for path in log_paths or default_log_paths():
+        turns.extend(parse_turns(read_log_records(path)))
+    return turns
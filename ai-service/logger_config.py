@@ -1,8 +1,49 @@
 # logger_config.py - AI 서비스용 로깅 설정
+import atexit
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# 비동기 로깅: 요청 처리 흐름에서는 큐에 레코드만 넣고, 콘솔/파일 출력은 백그라운드 스레드에서 수행
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() == "true"
+# 큐 최대 크기 (가득 차면 새 레코드를 버리고 버린 개수를 기록하여 메모리 사용량을 제한)
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+_listeners = []
+
+
+class DroppingQueueHandler(QueueHandler):
+    """큐가 가득 차면 기다리지 않고 레코드를 버리는 QueueHandler (버린 개수는 dropped에 누적)"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # 버린 레코드가 처음 생겼을 때와 이후 1000개마다 표준 에러로만 알림 (로그 큐를 다시 채우지 않도록)
+            if dropped == 1 or dropped % 1000 == 0:
+                logging.lastResort.handle(logging.makeLogRecord({
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"로그 큐가 가득 차 레코드를 버렸습니다 (누적 {dropped}개)"
+                }))
+
+class BlockingStopQueueListener(QueueListener):
+    """종료 신호를 넣을 때는 큐에 자리가 날 때까지 기다리는 QueueListener (가득 찬 큐에서도 남은 로그를 모두 출력 후 종료)"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
 
 def setup_logger(name='ai_service', log_level=logging.INFO):
     """
@@ -63,11 +104,33 @@ def setup_logger(name='ai_service', log_level=logging.INFO):
     daily_handler.setLevel(log_level)
     daily_handler.setFormatter(formatter)
     logger.addHandler(daily_handler)
+
+    if LOG_ASYNC:
+        # 위 핸들러들을 QueueListener(백그라운드 스레드)로 옮기고, 로거에는 큐 핸들러만 남김
+        handlers = list(logger.handlers)
+        logger.handlers.clear()
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        logger.addHandler(DroppingQueueHandler(log_queue))
+        listener = BlockingStopQueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
     
     return logger
 
+
+def stop_logging():
+    """백그라운드 로깅 스레드를 멈추고 큐에 남은 레코드를 모두 출력 (프로세스 종료 시 호출)"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def get_dropped_log_count():
+    """큐가 가득 차 버려진 로그 레코드 수를 반환"""
+    return sum(handler.dropped for handler in ai_logger.handlers if isinstance(handler, DroppingQueueHandler))
+
 # 전역 로거 인스턴스
 ai_logger = setup_logger()
+atexit.register(stop_logging)
 
 def log_api_request(user_id, session_id, message, timestamp):
     """API 요청 로깅"""
@@ -0,0 +1,171 @@
+# memory.py - 세션별 누적 대화 요약 메모리 (오래된 대화는 요약으로 압축하고 최근 대화만 원문으로 유지)
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+
+from logger_config import ai_logger, log_error
+from llm_client import call_llm
+from metrics import increment_counter
+from prompt_layout import build_messages
+
+MEMORY_ENABLED = os.environ.get("MEMORY_ENABLED", "false").lower() == "true"
+# 프롬프트에 원문으로 남길 최근 메시지 수 (사용자/챗봇 발화 각각 1개로 계산)
+MEMORY_RAW_MESSAGES = int(os.environ.get("MEMORY_RAW_MESSAGES", "8"))
+# 요약되지 않은 오래된 메시지가 이 개수 이상 쌓이면 요약을 갱신
+MEMORY_SUMMARY_BATCH = int(os.environ.get("MEMORY_SUMMARY_BATCH", "4"))
+MEMORY_MAX_SESSIONS = int(os.environ.get("MEMORY_MAX_SESSIONS", "1000"))
+MEMORY_SESSION_TTL = int(os.environ.get("MEMORY_SESSION_TTL", "7200"))
+
+MEMORY_SUMMARY_PROMPT = """
+당신은 정신건강 문진 대화를 기록하는 전문가입니다.
+기존 요약과 그 이후의 대화를 바탕으로, 이후 문진 대화를 이어가는 데 필요한 정보가 빠짐없이 담긴 요약을 새로 작성하세요.
+
+반드시 포함할 내용:
+- 사용자가 언급한 증상, 경험 여부, 빈도, 발생 조건이나 이유 (사용자의 표현을 최대한 보존)
+- 사용자의 감정 상태와 주요 스트레스 요인
+- 사용자가 한 질문이나 요청, 챗봇이 이미 물어본 내용 (같은 질문을 반복하지 않도록)
+- 답변이 서로 모순되었던 내용과 그 정리 결과
+
+작성 규칙:
+- 챗봇의 인사말, 공감 표현 등 정보가 없는 발화는 생략하세요.
+- 새로운 사실을 추측하거나 진단하지 마세요.
+- 간결한 문장 목록으로 500자 이내로 작성하세요.
+"""
+
+HISTORY_LINE_PATTERN = re.compile(r"^(Bot|User): ", re.MULTILINE)
+
+
+def parse_history(history):
+    """'Bot: ...' / 'User: ...' 형식의 히스토리 텍스트를 메시지 목록으로 분리 (여러 줄 메시지는 하나로 유지)"""
+    if not history:
+        return []
+    starts = [match.start() for match in HISTORY_LINE_PATTERN.finditer(history)]
+    if not starts:
+        return [history.strip()]
+    return [history[start:end].strip() for start, end in zip(starts, starts[1:] + [len(history)])]
+
+
+class SessionMemory:
+    """세션 하나의 대화 기록과 누적 요약 (summary는 transcript[:summarized_count]를 요약한 내용)"""
+
+    def __init__(self):
+        self.transcript = []
+        self.summary = ""
+        self.summarized_count = 0
+        self.updating = False
+        self.last_used = time.time()
+
+    def merge(self, messages):
+        """
+        이번 요청의 히스토리를 저장된 기록에 이어 붙임
+        히스토리가 최근 메시지만 담고 있어도(WINDOW_SIZE) 저장된 기록의 끝부분과 겹치는 위치를 찾아 새 메시지만 추가합니다.
+        """
+        if not self.transcript:
+            self.transcript = list(messages)
+            return
+        for overlap in range(min(len(self.transcript), len(messages)), 0, -1):
+            if self.transcript[-overlap:] == messages[:overlap]:
+                self.transcript.extend(messages[overlap:])
+                return
+        # 겹치는 부분이 없으면(대화가 새로 시작되었거나 기록이 어긋난 경우) 기록을 새로 시작
+        self.transcript = list(messages)
+        self.summary = ""
+        self.summarized_count = 0
+
+    def pending_messages(self):
+        """원문으로 남길 최근 메시지를 제외하고, 아직 요약에 반영되지 않은 메시지 목록"""
+        end = max(self.summarized_count, len(self.transcript) - MEMORY_RAW_MESSAGES)
+        return self.transcript[self.summarized_count:end]
+
+
+class ConversationMemory:
+    """세션별 누적 요약 메모리 (프로세스 내부, 최근 사용 순으로 MEMORY_MAX_SESSIONS개까지 유지)"""
+
+    def __init__(self, max_sessions=MEMORY_MAX_SESSIONS, ttl=MEMORY_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._tasks = set()
+
+    def _get_session(self, key):
+        now = time.time()
+        expired = [k for k, session in self._sessions.items() if now - session.last_used > self.ttl and not session.updating]
+        for k in expired:
+            del self._sessions[k]
+
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = SessionMemory()
+        session.last_used = now
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def build_context(self, user_id, session_id, history, client):
+        """
+        프롬프트에 넣을 대화 맥락을 구성하고, 필요하면 백그라운드 요약 갱신을 예약하는 함수
+
+        Args:
+            user_id, session_id: 세션 식별자
+            history (str): API 서버가 전달한 대화 히스토리
+            client: OpenAI 비동기 클라이언트 (요약 갱신용)
+
+        Returns:
+            str: 요약이 있으면 "이전 대화 요약 + 요약 이후의 원문 대화", 없으면 전달받은 히스토리 그대로
+        """
+        session = self._get_session((user_id, session_id))
+        session.merge(parse_history(history))
+
+        if len(session.pending_messages()) >= MEMORY_SUMMARY_BATCH and not session.updating:
+            session.updating = True
+            task = asyncio.create_task(self._update_summary(session, client))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if not session.summary:
+            return history
+
+        recent = "\n".join(session.transcript[session.summarized_count:])
+        increment_counter("memory_context_total", outcome="summarized")
+        return f"[이전 대화 요약]\n{session.summary}\n\n[최근 대화]\n{recent}"
+
+    async def _update_summary(self, session, client):
+        pending = session.pending_messages()
+        target_count = session.summarized_count + len(pending)
+        previous_summary = session.summary or "(없음)"
+        try:
+            ai_logger.info(f"🧠 대화 요약 갱신 중... (새로 요약할 메시지 {len(pending)}개)")
+            response = await call_llm(
+                client, "memory", "conversation_memory",
+                model="gpt-4o-mini",
+                messages=build_messages(MEMORY_SUMMARY_PROMPT, [
+                    ("기존 요약", previous_summary),
+                    ("이후 대화", "\n".join(pending))
+                ]),
+                max_tokens=400,
+                temperature=0.3
+            )
+            summary = response.choices[0].message.content.strip()
+            # 갱신 중에 기록이 새로 시작된 경우에는 결과를 버림
+            if session.transcript[:target_count][-len(pending):] == pending:
+                session.summary = summary
+                session.summarized_count = target_count
+            increment_counter("memory_updates_total", outcome="success")
+            ai_logger.info(f"🧠 대화 요약 갱신 완료 ({len(summary)}자, 누적 메시지 {target_count}개)")
+        except Exception as e:
+            increment_counter("memory_updates_total", outcome="error")
+            log_error("대화 요약 갱신 실패", e)
+        finally:
+            session.updating = False
+
+    async def stop(self):
+        """진행 중인 요약 갱신 작업을 취소 (서버 종료 시 호출)"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+conversation_memory = ConversationMemory()
@@ -0,0 +1,238 @@
+# metrics.py - AI 서비스 운영 지표(카운터, 히스토그램) 관리 및 Prometheus 텍스트 형식 출력
+import threading
+import time
+from contextlib import contextmanager
+
+from logger_config import log_api_call, get_dropped_log_count
+from prompt_layout import prompt_cache_key
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def increment_counter(name, value=1, **labels):
+    """
+    카운터 값을 증가시키는 함수
+
+    Args:
+        name (str): 카운터 이름 (예: "dp_speculation_total")
+        value (int): 증가시킬 값
+        **labels: 카운터를 구분하는 라벨 (예: outcome="discarded")
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def get_counter(name, **labels):
+    """라벨까지 일치하는 카운터 값을 반환 (없으면 0)"""
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def sum_counter(name):
+    """라벨과 무관하게 같은 이름의 카운터 값을 모두 합산하여 반환"""
+    with _lock:
+        return sum(value for (counter_name, _), value in _counters.items() if counter_name == name)
+
+
+def snapshot_counters():
+    """현재 모든 카운터 값을 {(이름, 라벨튜플): 값} 형태로 복사하여 반환"""
+    with _lock:
+        return dict(_counters)
+
+
+# 히스토그램 버킷 (지연 시간: 초, 토큰: 개수)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+
+_histograms = {}
+_histogram_buckets = {}
+# 원본 관측값 (collect_samples()를 호출한 경우에만 보관, 재생 벤치마크의 백분위수 계산용)
+_samples = None
+
+
+def observe_histogram(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    히스토그램에 관측값을 기록하는 함수
+
+    Args:
+        name (str): 히스토그램 이름 (예: "llm_call_duration_seconds")
+        value (float): 관측값
+        buckets (tuple): 버킷 상한값 목록 (이름별로 처음 기록할 때의 값을 사용)
+        **labels: 히스토그램을 구분하는 라벨 (예: stage="nlu")
+    """
+    key = _key(name, labels)
+    with _lock:
+        bounds = _histogram_buckets.setdefault(name, tuple(buckets))
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(bounds), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+        if _samples is not None:
+            _samples.setdefault(key, []).append(value)
+
+
+def collect_samples():
+    """이후 기록되는 히스토그램 관측값을 버킷과 별도로 원본 그대로 보관 (운영 서버에서는 사용하지 않음)"""
+    global _samples
+    with _lock:
+        _samples = {}
+
+
+def get_samples(name):
+    """collect_samples() 이후 기록된 name 히스토그램의 관측값을 {라벨 dict 튜플: [값, ...]} 형태로 반환"""
+    with _lock:
+        return {labels: list(values) for (sample_name, labels), values in (_samples or {}).items() if sample_name == name}
+
+
+def percentile(values, ratio):
+    """정렬된 값에서 가장 가까운 순위의 백분위수를 반환 (get_samples로 받은 관측값 요약에 사용)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def snapshot_histograms():
+    """현재 모든 히스토그램을 {(이름, 라벨튜플): {"buckets", "sum", "count"}} 형태로 복사하여 반환"""
+    with _lock:
+        return {key: {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+                for key, value in _histograms.items()}
+
+
+@contextmanager
+def stage_timer(stage):
+    """파이프라인 단계 전체(재시도 포함)의 소요 시간을 pipeline_stage_duration_seconds에 기록하는 컨텍스트 매니저"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_histogram("pipeline_stage_duration_seconds", time.perf_counter() - started, stage=stage)
+
+
+def record_llm_call(stage, model, attempt, outcome, latency, usage=None):
+    """
+    GPT 호출 한 번의 결과를 단계별 지표로 기록하는 함수
+
+    Args:
+        stage (str): 파이프라인 단계 (nlu, dst, dp, planner, nlg, summary)
+        model (str): 모델 이름
+        attempt (int): 재시도 회차 (1부터 시작)
+        outcome (str): "success" 또는 "error"
+        latency (float): 호출 소요 시간 (초)
+        usage: 응답의 usage 객체 (prompt_tokens, completion_tokens, prompt_tokens_details.cached_tokens)
+
+    지연 시간은 프롬프트 캐시 적중 여부(prompt_cache=hit/miss)로도 나누어 기록하여 캐시에 따른 지연 시간 차이를 비교할 수 있습니다.
+    """
+    increment_counter("llm_calls_total", stage=stage, model=model, attempt=str(attempt), outcome=outcome)
+    if usage is None:
+        observe_histogram("llm_call_duration_seconds", latency, LATENCY_BUCKETS, stage=stage, outcome=outcome, prompt_cache="unknown")
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    cached_tokens = get_cached_tokens(usage)
+    observe_histogram(
+        "llm_call_duration_seconds", latency, LATENCY_BUCKETS,
+        stage=stage, outcome=outcome, prompt_cache="hit" if cached_tokens else "miss"
+    )
+    increment_counter("llm_tokens_total", prompt_tokens, stage=stage, kind="prompt")
+    increment_counter("llm_tokens_total", cached_tokens, stage=stage, kind="cached")
+    increment_counter("llm_tokens_total", completion_tokens, stage=stage, kind="completion")
+    observe_histogram("llm_prompt_tokens", prompt_tokens, TOKEN_BUCKETS, stage=stage)
+    observe_histogram("llm_completion_tokens", completion_tokens, TOKEN_BUCKETS, stage=stage)
+
+
+def get_cached_tokens(usage):
+    """usage에서 프로바이더 프롬프트 캐시로 처리된 입력 토큰 수를 반환 (정보가 없으면 0)"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def format_token_usage(usage):
+    """로그에 기록할 토큰 사용량 문자열 (예: "1530 (cached 1280)")"""
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    cached = get_cached_tokens(usage)
+    return f"{total} (cached {cached})" if cached else total
+
+
+async def timed_completion(client, stage, prompt_type, attempt=1, **kwargs):
+    """
+    GPT 호출을 실행하고 지연 시간, 토큰 사용량, 결과를 기록하는 함수 (실패 시 예외를 그대로 전달)
+
+    Args:
+        client: OpenAI 비동기 클라이언트
+        stage (str): 파이프라인 단계 (지표 라벨)
+        prompt_type (str): 로그에 기록할 호출 유형 (예: "intent_analysis")
+        attempt (int): 재시도 회차 (1부터 시작)
+        **kwargs: chat.completions.create에 전달할 인자
+
+    Returns:
+        chat.completions.create의 응답
+    """
+    model = kwargs.get("model")
+    cache_key = prompt_cache_key(stage)
+    if cache_key and not kwargs.get("stream"):
+        kwargs.setdefault("prompt_cache_key", cache_key)
+    started = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**kwargs)
+    except Exception:
+        record_llm_call(stage, model, attempt, "error", time.perf_counter() - started)
+        log_api_call(model, prompt_type, attempt)
+        raise
+
+    usage = getattr(response, "usage", None)
+    record_llm_call(stage, model, attempt, "success", time.perf_counter() - started, usage)
+    log_api_call(model, prompt_type, attempt, format_token_usage(usage))
+    return response
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus():
+    """모든 카운터와 히스토그램을 Prometheus 텍스트 형식(0.0.4)으로 변환하여 반환"""
+    lines = []
+    counters = snapshot_counters()
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    # 비동기 로깅 큐가 가득 차 버려진 로그 레코드 수
+    lines.append("# TYPE log_records_dropped_total counter")
+    lines.append(f"log_records_dropped_total {get_dropped_log_count()}")
+
+    histograms = snapshot_histograms()
+    for name in sorted({name for name, _ in histograms}):
+        bounds = _histogram_buckets[name]
+        lines.append(f"# TYPE {name} histogram")
+        for (histogram_name, labels), histogram in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+            for bound, count in zip(bounds, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,238 @@
+# mock_openai.py - 네트워크/비용 없이 파이프라인을 실행하기 위한 OpenAI 모의 클라이언트 (단계별 지연 시간·토큰 분포 설정, 로그에 기록된 출력 재생)
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import types
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from DP import POLICY_SELECTION_PROMPT
+from DST import SYMPTOM_ANALYSIS_PROMPT
+from memory import MEMORY_SUMMARY_PROMPT
+from NLU import INTENT_ANALYSIS_PROMPT
+from Planner import PLANNER_PROMPT
+from Summary import SUMMARY_ANALYSIS_PROMPT
+from schemas import INTENT_RESULT, PLAN_RESULT, POLICY_RESULT, SYMPTOM_UPDATES, SchemaValidationError, validate
+
+# system 메시지로 단계를 구분 (나머지는 정책/말투별로 프롬프트가 달라지는 NLG)
+STAGE_PROMPTS = {
+    INTENT_ANALYSIS_PROMPT: "nlu",
+    POLICY_SELECTION_PROMPT: "dp",
+    PLANNER_PROMPT: "planner",
+    SYMPTOM_ANALYSIS_PROMPT: "dst",
+    SUMMARY_ANALYSIS_PROMPT: "summary",
+    MEMORY_SUMMARY_PROMPT: "memory"
+}
+
+# 단계별 첫 토큰까지의 지연 시간 중앙값 (초)
+DEFAULT_LATENCY_MEDIANS = {"nlu": 0.6, "planner": 0.9, "dst": 1.2, "dp": 0.7, "nlg": 0.5, "summary": 3.0, "memory": 1.5}
+
+# 단계별 응답 스키마 (기록된 출력이 현재 스키마와 맞지 않으면 기본 응답으로 대체)
+STAGE_RESULTS = {"nlu": INTENT_RESULT, "dp": POLICY_RESULT, "planner": PLAN_RESULT, "dst": SYMPTOM_UPDATES}
+
+# 기록된 출력이 없을 때 사용하는 단계별 기본 응답 (각 단계의 응답 스키마를 만족)
+CANNED_OUTPUTS = {
+    "nlu": {"intent": "answer_symptom"},
+    "dp": {"first_policy": "empathize", "second_policy": "ask_new_symptom", "next_question": "Q1",
+           "is_completed": False, "is_finished": False},
+    "planner": {"intent": "answer_symptom", "first_policy": "empathize", "second_policy": "ask_new_symptom",
+                "next_question": "Q1", "is_completed": False, "is_finished": False},
+    "dst": {"updates": []},
+    "summary": {"depression": "모의 우울 상태 분석", "anxiety": "모의 불안 상태 분석", "suggestion": "모의 제안사항"},
+    "memory": "사용자는 최근 스트레스와 수면 문제를 이야기했다.",
+    "nlg": "그러셨군요. 조금 더 자세히 이야기해 주실 수 있을까요?"
+}
+
+# 사용자 메시지에서 이번 사용자 발화를 담은 항목 (DST는 "사용자 답변")
+USER_MESSAGE_PATTERN = re.compile(r"^(?:현재 사용자 메시지|사용자 답변): (.*)$", re.MULTILINE)
+
+
+def detect_stage(messages):
+    """요청 messages의 system 메시지로 파이프라인 단계를 판별"""
+    system_prompt = messages[0]["content"] if messages and messages[0].get("role") == "system" else ""
+    return STAGE_PROMPTS.get(system_prompt, "nlg")
+
+
+def current_user_message(messages):
+    """요청의 user 메시지에서 이번 사용자 발화를 추출 (없으면 None)"""
+    content = messages[-1].get("content", "") if messages else ""
+    found = USER_MESSAGE_PATTERN.findall(content or "")
+    return found[-1] if found else None
+
+
+def parse_latency_medians(spec):
+    """"nlu=0.6,dp=0.8" 형식의 문자열을 단계별 지연 시간 중앙값으로 변환 (지정하지 않은 단계는 기본값)"""
+    medians = dict(DEFAULT_LATENCY_MEDIANS)
+    for item in (spec or "").split(","):
+        if "=" in item:
+            stage, value = item.split("=", 1)
+            medians[stage.strip()] = float(value)
+    return medians
+
+
+class LatencyModel:
+    """
+    모의 응답의 지연 시간 모델
+
+    첫 토큰까지의 시간은 단계별 중앙값을 갖는 로그정규분포에서 뽑고, 이후 출력 토큰은 tokens_per_second 속도로 생성됩니다.
+    """
+
+    def __init__(self, medians=None, sigma=0.3, tokens_per_second=50.0, seed=None):
+        self.medians = medians or dict(DEFAULT_LATENCY_MEDIANS)
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.random = random.Random(seed)
+
+    def first_token_delay(self, stage):
+        median = self.medians.get(stage, 1.0)
+        if median <= 0:
+            return 0.0
+        return self.random.lognormvariate(math.log(median), self.sigma) if self.sigma > 0 else median
+
+    def generation_delay(self, tokens):
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+class MockResponder:
+    """
+    요청에 대한 응답 텍스트와 토큰 사용량을 만드는 클래스
+
+    replay 코퍼스의 턴(recorded 필드)을 넘기면 사용자 발화가 같은 턴의 기록된 출력을 재생하고,
+    기록이 없으면 CANNED_OUTPUTS를 사용합니다.
+    """
+
+    def __init__(self, turns=None, chars_per_token=1.5, cached_ratio=0.0):
+        self.chars_per_token = chars_per_token
+        self.cached_ratio = cached_ratio
+        self.turns_by_message = {}
+        for turn in turns or []:
+            if turn.get("message"):
+                self.turns_by_message.setdefault(turn["message"], []).append(turn)
+
+    def _recorded(self, stage, messages):
+        candidates = self.turns_by_message.get(current_user_message(messages))
+        if not candidates:
+            return None
+        # 같은 발화가 여러 턴에 있으면 대화 히스토리가 일치하는 턴을 우선 사용
+        content = messages[-1].get("content", "")
+        turn = next((turn for turn in candidates if turn.get("history") and turn["history"].strip() in content), candidates[0])
+        recorded = turn.get("recorded") or {}
+        output = None
+        if stage == "nlu":
+            output = recorded.get("intent")
+        elif stage in ("dp", "planner") and recorded.get("policy"):
+            # 이전 로그의 정책에는 없는 필드가 있을 수 있으므로 응답 스키마의 필드만 기본값과 함께 사용
+            defaults = CANNED_OUTPUTS[stage]
+            output = {key: recorded["policy"].get(key, defaults[key]) for key in defaults if key != "intent"}
+            if stage == "planner":
+                output["intent"] = (recorded.get("intent") or {}).get("intent")
+        elif stage == "dst" and recorded.get("dst_updates") is not None:
+            output = {"updates": recorded["dst_updates"]}
+        elif stage == "nlg":
+            output = recorded.get("response")
+
+        result = STAGE_RESULTS.get(stage)
+        if output is not None and result is not None:
+            try:
+                validate(output, result.schema)
+                if result.check:
+                    result.check(output)
+            except SchemaValidationError:
+                return None
+        return output
+
+    def respond(self, kwargs):
+        """
+        chat.completions.create 인자에 대한 (단계, 응답 텍스트)를 반환
+
+        Args:
+            kwargs (dict): chat.completions.create에 전달된 인자
+
+        Returns:
+            tuple: (stage, text)
+        """
+        messages = kwargs.get("messages", [])
+        stage = detect_stage(messages)
+        output = self._recorded(stage, messages)
+        if output is None:
+            output = CANNED_OUTPUTS[stage]
+        text = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        return stage, text
+
+    def count_tokens(self, text):
+        return max(1, int(len(text or "") / self.chars_per_token))
+
+    def usage(self, messages, text):
+        prompt_tokens = sum(self.count_tokens(message.get("content", "")) for message in messages)
+        completion_tokens = self.count_tokens(text)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": int(prompt_tokens * self.cached_ratio)}
+        }
+
+
+def build_completion(model, text, usage):
+    """OpenAI chat.completion 응답 객체를 생성"""
+    return ChatCompletion.model_validate({
+        "id": f"chatcmpl-mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model or "mock",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage
+    })
+
+
+def build_chunk(model, content=None, usage=None, finish_reason=None):
+    """OpenAI chat.completion.chunk 스트리밍 조각을 생성 (usage만 담은 마지막 조각은 choices가 비어 있음)"""
+    choices = [] if usage is not None else [
+        {"index": 0, "delta": {"content": content} if content else {}, "finish_reason": finish_reason}
+    ]
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model or "mock",
+        "choices": choices,
+        "usage": usage
+    })
+
+
+def split_stream_text(text, size=4):
+    """스트리밍 응답을 size 글자 단위 조각으로 분할"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class MockOpenAIClient:
+    """AsyncOpenAI와 같은 방식(client.chat.completions.create)으로 호출할 수 있는 모의 클라이언트 (stream 포함)"""
+
+    def __init__(self, responder=None, latency=None):
+        self.responder = responder or MockResponder()
+        self.latency = latency or LatencyModel()
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        messages = kwargs.get("messages", [])
+        stage, text = self.responder.respond(kwargs)
+        usage = self.responder.usage(messages, text)
+        await asyncio.sleep(self.latency.first_token_delay(stage))
+        if kwargs.get("stream"):
+            return self._stream(kwargs, text, usage)
+        await asyncio.sleep(self.latency.generation_delay(usage["completion_tokens"]))
+        return build_completion(kwargs.get("model"), text, usage)
+
+    async def _stream(self, kwargs, text, usage):
+        model = kwargs.get("model")
+        for piece in split_stream_text(text):
+            yield build_chunk(model, piece)
+            await asyncio.sleep(self.latency.generation_delay(self.responder.count_tokens(piece)))
+        yield build_chunk(model, finish_reason="stop")
+        if (kwargs.get("stream_options") or {}).get("include_usage"):
+            yield build_chunk(model, usage=usage)
@@ -0,0 +1,142 @@
+# openai_stub.py - 부하 테스트용 로컬 OpenAI 호환 서버 (POST /v1/chat/completions, 지연 시간/오류/429 주입)
+# AI 서비스를 OPENAI_BASE_URL=http://localhost:<port>/v1 로 실행하면 실제 API 대신 이 서버를 호출합니다.
+import argparse
+import asyncio
+import random
+import time
+
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from quart import Quart, jsonify, make_response, request
+
+from mock_openai import LatencyModel, MockOpenAIClient, MockResponder, parse_latency_medians
+
+
+class RequestBudget:
+    """분당 요청 수(RPM) 한도를 흉내 내는 토큰 버킷 (한도를 넘으면 429)"""
+
+    def __init__(self, rpm):
+        self.rate = rpm / 60.0
+        self.capacity = float(rpm)
+        self.tokens = float(rpm)
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class StubConfig:
+    """주입할 장애 설정"""
+
+    def __init__(self, error_rate=0.0, rate_limit_rate=0.0, slow_rate=0.0, slow_seconds=30.0, rpm=0, seed=None):
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.budget = RequestBudget(rpm) if rpm > 0 else None
+        self.random = random.Random(seed)
+
+
+def error_body(message, error_type, code=None):
+    """OpenAI API 오류 응답 형식"""
+    return {"error": {"message": message, "type": error_type, "param": None, "code": code}}
+
+
+def create_stub_app(client=None, config=None):
+    """
+    모의 클라이언트(MockOpenAIClient)를 HTTP로 노출하는 Quart 앱을 생성
+
+    Args:
+        client (MockOpenAIClient): 응답과 지연 시간을 만드는 모의 클라이언트
+        config (StubConfig): 오류/429/지연 주입 설정
+    """
+    client = client or MockOpenAIClient()
+    config = config or StubConfig()
+    stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "slow": 0, "in_flight": 0, "max_in_flight": 0}
+    app = Quart(__name__)
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    async def chat_completions():
+        body = await request.get_json()
+        stats["requests"] += 1
+
+        if (config.budget and not config.budget.try_acquire()) or config.random.random() < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return jsonify(error_body("Rate limit reached (stub)", "requests", "rate_limit_exceeded")), 429, {"retry-after": "1"}
+        if config.random.random() < config.error_rate:
+            stats["errors"] += 1
+            return jsonify(error_body("The server had an error while processing your request (stub)", "server_error")), 500
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            if config.random.random() < config.slow_rate:
+                # 프로바이더 지연: 클라이언트 타임아웃 확인용
+                stats["slow"] += 1
+                await asyncio.sleep(config.slow_seconds)
+            result = await client.chat.completions.create(**body)
+        finally:
+            stats["in_flight"] -= 1
+
+        stats["ok"] += 1
+        if not body.get("stream"):
+            return result.model_dump(exclude_none=True)
+
+        async def events():
+            async for chunk in result:
+                yield f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        response = await make_response(events(), 200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        response.timeout = None
+        return response
+
+    @app.route('/stats', methods=['GET'])
+    async def get_stats():
+        """결과별 요청 수와 최대 동시 처리 수"""
+        return jsonify(stats)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="부하 테스트용 로컬 OpenAI 호환 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5100)
+    parser.add_argument('--corpus', help="기록된 출력을 재생할 replay.py 코퍼스 (없으면 기본 응답)")
+    parser.add_argument('--latency', help="단계별 첫 토큰 지연 시간 중앙값 (예: nlu=0.6,dp=0.8,nlg=0.4)")
+    parser.add_argument('--latency-sigma', type=float, default=0.3, help="지연 시간 로그정규분포의 sigma (0이면 고정값)")
+    parser.add_argument('--tokens-per-second', type=float, default=50.0, help="출력 토큰 생성 속도 (0이면 즉시)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="500 오류를 반환할 비율")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="429 오류를 반환할 비율")
+    parser.add_argument('--rpm', type=int, default=0, help="분당 요청 한도 (초과 시 429, 0이면 제한 없음)")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="--slow-seconds만큼 추가로 지연시킬 비율")
+    parser.add_argument('--slow-seconds', type=float, default=30.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    turns = None
+    if args.corpus:
+        from replay import load_corpus
+        turns = load_corpus(args.corpus)
+    client = MockOpenAIClient(
+        MockResponder(turns),
+        LatencyModel(parse_latency_medians(args.latency), args.latency_sigma, args.tokens_per_second, args.seed)
+    )
+    config = StubConfig(args.error_rate, args.rate_limit_rate, args.slow_rate, args.slow_seconds, args.rpm, args.seed)
+
+    hypercorn_config = Config()
+    hypercorn_config.bind = [f"{args.host}:{args.port}"]
+    hypercorn_config.accesslog = None
+    print(f"OpenAI 스텁 서버: http://{args.host}:{args.port}/v1")
+    asyncio.run(serve(create_stub_app(client, config), hypercorn_config))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# prompt_layout.py - 프로바이더 프롬프트 캐시를 활용하기 위한 메시지 구성 (정적 지시사항 → 턴마다 바뀌는 입력 순서)
+import os
+
+# OpenAI는 요청 앞부분(prefix)이 이전 요청과 바이트 단위로 같을 때 캐시된 토큰을 재사용하므로,
+# system 메시지에는 턴마다 바뀌지 않는 지시사항만 두고, 바뀌는 입력은 모두 user 메시지에 둡니다.
+PROMPT_CACHE_KEY_ENABLED = os.environ.get("PROMPT_CACHE_KEY_ENABLED", "true").lower() == "true"
+
+
+def render_section(label, value):
+    """입력 항목 하나를 '항목: 값' 형태로 변환 (값이 여러 줄이면 다음 줄부터 기록)"""
+    value = "" if value is None else str(value)
+    if "\n" in value:
+        return f"{label}:\n{value}"
+    return f"{label}: {value}"
+
+
+def build_messages(system_prompt, sections):
+    """
+    정적 system 메시지와 턴별 입력으로 구성된 user 메시지를 만드는 함수
+
+    Args:
+        system_prompt (str): 턴마다 바뀌지 않는 지시사항 (모듈 상수를 그대로 전달하고, format 등으로 값을 넣지 않음)
+        sections (list): (항목 이름, 값) 목록. 변화가 적은 항목부터 순서대로 전달
+            (예: 대화 스타일 → 뒤에만 추가되는 대화 히스토리 → 문진 상태 → 현재 사용자 메시지)
+            값이 None인 항목은 제외합니다.
+
+    Returns:
+        list: chat.completions.create에 전달할 messages
+    """
+    user_content = "\n".join(render_section(label, value) for label, value in sections if value is not None)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
+
+
+def prompt_cache_key(stage):
+    """같은 단계의 요청이 같은 캐시로 라우팅되도록 전달할 prompt_cache_key (비활성화 시 None)"""
+    return f"ai-service-{stage}" if PROMPT_CACHE_KEY_ENABLED else None
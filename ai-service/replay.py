@@ -0,0 +1,300 @@
+# replay.py - 로그에 기록된 턴을 모의 OpenAI 클라이언트(또는 --base-url의 스텁 서버)로 재생하여 파이프라인 전체 또는 단계별 지연 시간(p50/p95/p99)을 측정하는 오프라인 벤치마크
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+
+from dialogue_state import DELTA_FIELDS, EXPERIENCE_VALUES
+from log_corpus import load_turns
+from logger_config import ai_logger
+from metrics import collect_samples, get_samples, percentile, snapshot_counters, stage_timer, sum_counter
+from mock_openai import LatencyModel, MockOpenAIClient, MockResponder, parse_latency_medians
+
+TARGETS = ("chat", "nlu", "planner", "dst", "dp", "nlg")
+
+
+#----------------------------TURN CORPUS------------------------------------#
+def dst_updates_from_log(dst_raw):
+    """
+    로그에 기록된 DST 출력(업데이트된 문항 목록)을 현재 DST 응답 형식(문항별 변경사항)으로 변환
+
+    Returns:
+        list: 변경사항 목록 (기록이 없거나 해석할 수 없으면 None)
+    """
+    if not dst_raw:
+        return None
+    try:
+        questions = json.loads(dst_raw.replace("```json", "").replace("```", "").strip())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(questions, list):
+        return None
+
+    updates = []
+    for question in questions:
+        if not isinstance(question, dict) or not question.get("questionId"):
+            continue
+        delta = {"questionId": question["questionId"]}
+        for field in DELTA_FIELDS:
+            # 이전 로그의 문항 형식은 condition 대신 context 필드를 사용
+            value = question.get(field, question.get("context") if field == "condition" else None)
+            delta[field] = value if isinstance(value, str) else None
+        if delta["experience"] not in EXPERIENCE_VALUES:
+            delta["experience"] = None
+        updates.append(delta)
+    return updates
+
+
+def compact_turn(turn):
+    """log_corpus 턴에서 재생에 필요한 입력과 단계별 기록된 출력만 남긴 턴을 만듦"""
+    return {
+        "user_id": turn["user_id"],
+        "session_id": turn["session_id"],
+        "message": turn["message"],
+        "message_count": turn["message_count"],
+        "selected_policies": turn["selected_policies"],
+        "last_bot_message": turn["last_bot_message"],
+        "tone_preference": turn["tone_preference"],
+        "conversation_style": turn["conversation_style"],
+        "history": turn["history"],
+        "status": turn["status"],
+        "recorded": {
+            "intent": turn["intent"],
+            "dst_updates": dst_updates_from_log(turn["dst_raw"]),
+            "policy": turn["policy"],
+            "response": turn["response"]
+        }
+    }
+
+
+def build_corpus(log_paths=None, limit=None):
+    """로그에서 사용자 발화가 있는 턴만 골라 재생용 코퍼스를 생성"""
+    turns = [compact_turn(turn) for turn in load_turns(log_paths) if turn["message"] and turn["message"] != "NO_RESPONSE"]
+    return turns[:limit] if limit else turns
+
+
+def save_corpus(turns, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for turn in turns:
+            f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+#----------------------------REPLAY TARGETS---------------------------------#
+def previous_policy(turn):
+    return turn["selected_policies"][-1] if turn["selected_policies"] else "start"
+
+
+def chat_payload(turn):
+    """턴을 /api/chat 요청 본문(API 서버가 보내는 형식)으로 변환"""
+    return {
+        "message": turn["message"],
+        "user_id": turn["user_id"] or "replay_user",
+        "session_id": turn["session_id"] or "replay_session",
+        "timestamp": int(time.time() * 1000),
+        "history": turn["history"],
+        "last_bot_message": turn["last_bot_message"],
+        "status": turn["status"],
+        "messageCount": turn["message_count"],
+        "selectedPolicies": turn["selected_policies"],
+        "tonePreference": turn["tone_preference"],
+        "conversationStyle": turn["conversation_style"]
+    }
+
+
+async def run_stage(target, turn, client):
+    """단일 단계를 기록된 입력(이전 단계 출력은 기록값)으로 실행"""
+    recorded = turn["recorded"]
+    intent = recorded["intent"] or {"intent": "answer_symptom"}
+    if target == "nlu":
+        from NLU import analyze_intent
+        return await analyze_intent(turn["message"], turn["history"], client, previous_policy(turn))
+    if target == "planner":
+        from Planner import plan_turn
+        return await plan_turn(turn["message"], turn["history"], client, previous_policy(turn), turn["message_count"],
+                               turn["status"], turn["selected_policies"], turn["conversation_style"])
+    if target == "dst":
+        from DST import update_dialogue_state
+        return await update_dialogue_state(turn["last_bot_message"], turn["status"], turn["message"], intent.get("intent"), client)
+    if target == "dp":
+        from DP import select_policy
+        return await select_policy(intent, turn["message"], turn["history"], client, turn["message_count"],
+                                   turn["status"], turn["selected_policies"], turn["conversation_style"])
+    from NLG import generate_response
+    policy = recorded["policy"] or {"first_policy": "empathize", "second_policy": None}
+    return await generate_response(policy, turn["message"], turn["history"], turn["status"], client, turn["tone_preference"])
+
+
+async def replay(turns, target, client, concurrency):
+    """
+    턴을 동시에 최대 concurrency개씩 재생하고 턴별 (지연 시간, 성공 여부) 목록을 입력 순서대로 반환
+
+    target이 chat이면 run_chatbot의 /api/chat 전체(NLU → DST → DP → NLG)를, 그 외에는 해당 단계만 실행합니다.
+    chat은 같은 세션의 턴을 코퍼스 순서대로 하나씩 실행하므로 대화 순서가 유지되고 세션별 동시 턴 제한(409)에 걸리지 않습니다.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    test_client = None
+    if target == "chat":
+        # 레포트 사전 생성은 API 서버 조회가 필요하므로 재생 중에는 사용하지 않음
+        os.environ.setdefault("SUMMARY_PRECOMPUTE", "false")
+        # run_chatbot은 불러올 때 AsyncOpenAI 클라이언트를 만들므로 키가 없으면 임시 값을 사용 (호출은 전달받은 클라이언트로 대체)
+        os.environ.setdefault("OPENAI_API_KEY", "replay")
+        import run_chatbot
+        run_chatbot.client = client
+        test_client = run_chatbot.app.test_client()
+
+    async def run(turn):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if test_client is not None:
+                    response = await test_client.post("/api/chat", json=chat_payload(turn))
+                    ok = response.status_code == 200
+                else:
+                    with stage_timer(target):
+                        await run_stage(target, turn, client)
+                    ok = True
+            except Exception as e:
+                ai_logger.warning(f"⚠️ 재생 실패: {type(e).__name__}: {e}")
+                ok = False
+            return time.perf_counter() - started, ok
+
+    # chat은 세션별로, 단일 단계는 턴별로 묶어서 묶음 안에서는 순서대로 실행
+    groups = {}
+    for index, turn in enumerate(turns):
+        if test_client is not None:
+            payload = chat_payload(turn)
+            key = (payload["user_id"], payload["session_id"])
+        else:
+            key = index
+        groups.setdefault(key, []).append(index)
+
+    results = [None] * len(turns)
+
+    async def run_group(indexes):
+        for index in indexes:
+            results[index] = await run(turns[index])
+
+    await asyncio.gather(*[run_group(indexes) for indexes in groups.values()])
+    return results
+
+
+#----------------------------REPORT-----------------------------------------#
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "mean": statistics.mean(values) if values else 0.0,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99)
+    }
+
+
+def build_report(target, results, llm_calls, elapsed, transport):
+    """
+    재생 결과 레포트를 만드는 함수
+
+    Args:
+        llm_calls (int): 재생 중 GPT 호출 수 (재시도 포함)
+        transport (dict): GPT 호출 경로 (in_process: 모의 클라이언트를 직접 호출하여 HTTP/SDK 전송 계층과 연결 제한은 측정에서 제외,
+            http: OpenAI SDK로 OpenAI 호환 서버(openai_stub.py)를 호출)
+    """
+    turn_latencies = [latency for latency, _ in results]
+    count = len(results) or 1
+    stages = {}
+    for labels, values in get_samples("pipeline_stage_duration_seconds").items():
+        stages[dict(labels).get("stage")] = latency_summary(values)
+
+    tokens = {"prompt": 0, "cached": 0, "completion": 0}
+    for (name, labels), value in snapshot_counters().items():
+        if name == "llm_tokens_total":
+            kind = dict(labels).get("kind")
+            tokens[kind] = tokens.get(kind, 0) + value
+
+    return {
+        "target": target,
+        "transport": transport,
+        "turns": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput_turns_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "turn": latency_summary(turn_latencies),
+        "stages": stages,
+        "llm_calls_per_turn": llm_calls / count,
+        "tokens_per_turn": {kind: value / count for kind, value in tokens.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로그 기반 턴 코퍼스를 모의 OpenAI 클라이언트로 재생하는 오프라인 벤치마크")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    corpus_parser = subparsers.add_parser('corpus', help="로그에서 재생용 턴 코퍼스(JSONL) 생성")
+    corpus_parser.add_argument('--logs', nargs='*', help="로그 파일 (기본값: logs/ai-service-*.log)")
+    corpus_parser.add_argument('--limit', type=int, help="저장할 최대 턴 수")
+    corpus_parser.add_argument('--output', default='replay_corpus.jsonl', help="코퍼스 저장 경로")
+
+    run_parser = subparsers.add_parser('run', help="코퍼스를 재생하여 지연 시간 측정")
+    run_parser.add_argument('--corpus', help="replay.py corpus로 만든 코퍼스 (없으면 로그에서 바로 생성)")
+    run_parser.add_argument('--logs', nargs='*', help="코퍼스가 없을 때 사용할 로그 파일")
+    run_parser.add_argument('--target', choices=TARGETS, default='chat', help="재생 대상: chat(파이프라인 전체) 또는 단일 단계")
+    run_parser.add_argument('--limit', type=int, default=200, help="재생할 최대 턴 수")
+    run_parser.add_argument('--concurrency', type=int, default=8, help="동시에 재생할 턴 수")
+    run_parser.add_argument('--latency', help="단계별 첫 토큰 지연 시간 중앙값 (예: nlu=0.6,dp=0.8,nlg=0.4)")
+    run_parser.add_argument('--latency-sigma', type=float, default=0.3, help="지연 시간 로그정규분포의 sigma (0이면 고정값)")
+    run_parser.add_argument('--tokens-per-second', type=float, default=50.0, help="출력 토큰 생성 속도 (0이면 즉시)")
+    run_parser.add_argument('--chars-per-token', type=float, default=1.5, help="토큰 수 추정에 사용할 토큰당 글자 수")
+    run_parser.add_argument('--cached-ratio', type=float, default=0.0, help="입력 토큰 중 캐시 적중으로 보고할 비율")
+    run_parser.add_argument('--seed', type=int, help="지연 시간 난수 시드")
+    run_parser.add_argument('--base-url', help="모의 클라이언트 대신 OpenAI SDK로 호출할 OpenAI 호환 서버 주소 "
+                                               "(예: openai_stub.py의 http://localhost:5100/v1, 지정하면 지연 시간 관련 옵션은 스텁 서버에서 설정)")
+    run_parser.add_argument('--verbose', action='store_true', help="재생 중 INFO 로그 출력 (기본값: WARNING 이상만)")
+    run_parser.add_argument('--output', help="결과 레포트 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.command == 'corpus':
+        turns = build_corpus(args.logs, args.limit)
+        save_corpus(turns, args.output)
+        print(f"코퍼스 저장 완료: {args.output} ({len(turns)}턴)")
+        return
+
+    if not args.verbose:
+        # 재생한 턴이 INFO 로그(API_REQUEST)로 남으면 다음 코퍼스에 섞이므로 기본적으로 기록하지 않음
+        ai_logger.setLevel(logging.WARNING)
+
+    turns = load_corpus(args.corpus) if args.corpus else build_corpus(args.logs)
+    turns = turns[:args.limit]
+    print(f"재생할 턴: {len(turns)}개 (대상: {args.target}, 동시성: {args.concurrency})")
+
+    if args.base_url:
+        # 서비스와 같은 SDK/HTTP 경로(연결 풀, 스트리밍 파싱 포함)로 스텁 서버를 호출
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY") or "replay", base_url=args.base_url, max_retries=0)
+        transport = {"mode": "http", "base_url": args.base_url}
+    else:
+        client = MockOpenAIClient(
+            MockResponder(turns, chars_per_token=args.chars_per_token, cached_ratio=args.cached_ratio),
+            LatencyModel(parse_latency_medians(args.latency), args.latency_sigma, args.tokens_per_second, args.seed)
+        )
+        transport = {"mode": "in_process", "excluded": "HTTP/SDK 전송 계층과 연결 제한은 측정에서 제외"}
+    print(f"GPT 호출 경로: {transport}")
+    collect_samples()
+    calls_before = sum_counter("llm_calls_total")
+    started = time.perf_counter()
+    results = asyncio.run(replay(turns, args.target, client, args.concurrency))
+    report = build_report(args.target, results, sum_counter("llm_calls_total") - calls_before, time.perf_counter() - started, transport)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
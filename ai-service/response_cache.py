@@ -0,0 +1,158 @@
+# response_cache.py - NLG 응답 캐시 (메모리 LRU / SQLite 백엔드, TTL 지원)
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from logger_config import ai_logger
+
+# 사용자 발화와 무관하게 같은 안내/질문을 하는 정형 정책 (이 정책들로만 이루어진 조합만 캐시)
+# ask_frequency, ask_condition, ask_new_symptom, handle_crisis 등은 직전 사용자 발화를 반영하여 응답하므로 제외
+DEFAULT_CACHEABLE_POLICIES = (
+    "self_introduction", "purpose_guidance", "ask_current_state", "request_agreement",
+    "ask_tone_preference", "ask_conversation_style", "explain_limitations", "announce_completion",
+    "ask_additional_concerns", "express_gratitude", "farewell_message", "ask_completion"
+)
+# 캐시 대상이지만 사용자 요청 내용에 맞춰 응답하는 정책 (이 정책이 포함된 조합만 사용자 메시지를 캐시 키에 포함)
+DEFAULT_MESSAGE_DEPENDENT_POLICIES = ("explain_limitations",)
+
+
+class MemoryResponseCache:
+    """프로세스 내부 LRU 캐시 (항목별 TTL 적용)"""
+
+    def __init__(self, max_entries=1000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteResponseCache:
+    """SQLite 파일 기반 캐시 (프로세스 재시작 및 여러 워커 간 공유, 마지막 접근 시각 기준 LRU 제거)"""
+
+    def __init__(self, path, max_entries=1000, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._connection.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now)
+            )
+            self._connection.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+            self._connection.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+
+def create_response_cache(backend, max_entries=1000, ttl=86400, path=None):
+    """
+    설정값에 맞는 캐시 백엔드를 생성하는 함수
+
+    Args:
+        backend (str): "memory", "sqlite" 또는 "none"
+        max_entries (int): 최대 저장 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+        ttl (int): 항목 유지 시간 (초)
+        path (str): SQLite 파일 경로
+
+    Returns:
+        캐시 객체 또는 None (캐시 미사용)
+    """
+    if backend == "memory":
+        return MemoryResponseCache(max_entries=max_entries, ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteResponseCache(path, max_entries=max_entries, ttl=ttl)
+    if backend not in ("none", ""):
+        ai_logger.warning(f"⚠️ 알 수 없는 응답 캐시 백엔드: {backend} (캐시 미사용)")
+    return None
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", str(text or "")).strip().lower()
+
+
+def build_cache_key(policy, status, tone_preference, user_message, message_dependent_policies=DEFAULT_MESSAGE_DEPENDENT_POLICIES):
+    """
+    정책 조합, 다음 질문, 말투, 그리고 응답에 영향을 주는 입력의 정규화된 지문으로 캐시 키를 생성하는 함수
+    (응답에 영향을 주는 입력: 선택된 문진문항 텍스트와 해당 문항의 현재 상태,
+     조합에 message_dependent_policies의 정책이 있으면 현재 사용자 메시지)
+
+    정형 정책만으로 이루어진 조합은 사용자 메시지와 무관하게 같은 키를 사용하여 다른 발화에도 캐시가 적중합니다.
+    """
+    policies = (policy.get('first_policy'), policy.get('second_policy'))
+    uses_message = any(name in message_dependent_policies for name in policies if name)
+    next_question = policy.get('next_question')
+    question_status = None
+    if next_question and status:
+        question = next((q for q in status.get('questions', []) if q.get('questionId') == next_question), None)
+        question_status = question.get('status') if question else None
+
+    fingerprint = hashlib.sha256(json.dumps([
+        _normalize(policy.get('next_question_text')),
+        question_status,
+        _normalize(user_message) if uses_message else None
+    ], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    return "|".join([
+        str(policy.get('first_policy')),
+        str(policy.get('second_policy')),
+        str(next_question),
+        tone_preference or '미선택',
+        fingerprint
+    ])
+
+
+def is_cacheable(policy, cacheable_policies):
+    """정책 조합의 모든 정책이 캐시 대상(정형 정책)일 때만 캐시"""
+    if policy.get('first_policy') in (None, 'failed'):
+        return False
+    policies = [policy.get('first_policy'), policy.get('second_policy')]
+    return all(name in cacheable_policies for name in policies if name)
@@ -1,143 +1,351 @@
 # simple_chatbot.py - 간단한 정신건강 공감 챗봇
-import logging
+import asyncio
 import os
 import json
-import requests
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from openai import OpenAI
+import math
+from quart import Quart, request, jsonify, make_response
+from quart_cors import cors
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from NLU import analyze_intent, is_symptom_intent
+from NLU import analyze_intent, is_symptom_intent, match_option, TONE_OPTIONS, CONVERSATION_STYLE_OPTIONS
 from DST import update_dialogue_state
-from DP import select_policy
-from NLG import generate_response
+from DP import select_policy, select_policy_by_rules, policy_relevant_changes
+from Planner import plan_turn
+from NLG import generate_response, stream_response, StreamPostProcessor, RESPONSE_FAILURE_MESSAGE
 from Summary import generate_summary_report, format_conversation_history
+from api_server_client import fetch_summary_inputs, close_api_server_client
+from summary_jobs import SummaryJobQueue, SummaryQueueFull
+from memory import conversation_memory, MEMORY_ENABLED
 from logger_config import (
     ai_logger, log_api_request, log_error
 )
+from metrics import increment_counter, get_counter, sum_counter, stage_timer, render_prometheus
+from turn_budget import start_turn, use_turn, TURN_DEGRADE_DST_BELOW, TURN_DEGRADE_DP_BELOW
+from admission import admission, AdmissionRejected
+from singleflight import SingleFlight
 
 # 환경 설정
 load_dotenv()
-app = Flask(__name__)
+app = Quart(__name__)
 
 # .env에서 SERVER_URL 읽어오기
 server_url = os.environ.get("API_SERVER_URL", "http://localhost:3002")
-CORS(app, supports_credentials=True, origins=[server_url])
+app = cors(app, allow_credentials=True, allow_origin=server_url)
 
-# OpenAI 클라이언트 설정
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# OpenAI 비동기 클라이언트 설정 (요청마다 스레드를 점유하지 않도록 asyncio 기반으로 호출)
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)  # 재시도는 llm_client에서 처리
+
+# DST와 DP를 동시에 실행하는 추측 실행 모드 (DST가 정책 관련 상태를 바꾼 경우에만 DP 재실행)
+SPECULATIVE_DP = os.environ.get("SPECULATIVE_DP", "false").lower() == "true"
+
+# 파이프라인 모드: two_call (NLU와 DP를 각각 호출, 기본값) 또는 planner (NLU+DP를 한 번의 호출로 통합)
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "two_call").lower()
+
+# 대화 종료(is_finished) 시 Summary 레포트를 미리 생성 (API 서버가 마지막 턴을 저장할 시간만큼 대기 후 조회)
+SUMMARY_PRECOMPUTE = os.environ.get("SUMMARY_PRECOMPUTE", "true").lower() == "true"
+SUMMARY_PRECOMPUTE_DELAY = float(os.environ.get("SUMMARY_PRECOMPUTE_DELAY", "5"))
+# 레포트 요청이 작업 완료를 기다리는 최대 시간 (API 서버의 30초 타임아웃보다 짧게)
+SUMMARY_WAIT_TIMEOUT = float(os.environ.get("SUMMARY_WAIT_TIMEOUT", "25"))
+summary_jobs = SummaryJobQueue()
+chat_flight = SingleFlight()
+
+
+async def run_speculative_dst_dp(intent, user_message, history, last_bot_message, status, message_count, selected_policies, conversation_style):
+    """
+    DST와 DP를 이전 상태 기준으로 동시에 실행하고, DST 결과가 정책 선택에 영향을 주는 경우에만 DP를 다시 실행하는 함수
+
+    Returns:
+        tuple: (updated_slots, updated_status, last_answered_question, policy)
+    """
+    dst_task = asyncio.create_task(update_dialogue_state(
+        last_bot_message=last_bot_message,
+        status=status,
+        user_message=user_message,
+        intent=intent.get('intent'),
+        client=client
+    ))
+    dp_task = asyncio.create_task(select_policy(intent, user_message, history, client, message_count, status, selected_policies, conversation_style))
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
     try:
-        data = request.get_json()
-        user_message = data.get('message', '')
-        user_id = data.get('user_id', '')
-        session_id = data.get('session_id', '')
-        timestamp = data.get('timestamp', '')
-        history = data.get('history', '')  # 서버에서 보내는 히스토리 데이터
-        last_bot_message = data.get('last_bot_message', '')  # 마지막 챗봇 발화
-        status = data.get('status', {})  # 서버에서 보내는 상태 정보
-        message_count = data.get('messageCount', 0)  # Session의 messageCount 저장
-        selected_policies = data.get('selectedPolicies', [])  # 이전에 선택된 정책들
-        tone_preference = data.get('tonePreference')  # 사용자 말투 선호
-        conversation_style = data.get('conversationStyle')  # 사용자 대화 스타일 선호
-        
-        # API 요청 로깅
-        log_api_request(user_id, session_id, user_message, timestamp)
-        ai_logger.info("----------------------------------------------------------")
-        ai_logger.info(f"💬 User Message: {user_message}")
-        ai_logger.info(f"👤 User ID: {user_id}, Session ID: {session_id}")
-        ai_logger.info(f"⏰ Timestamp: {timestamp}")
-        ai_logger.info(f"📊 Message Count: {message_count}")
-        ai_logger.info(f"📋 Selected Policies: {selected_policies}")
-        ai_logger.info(f"🤖 Last Bot Message: {last_bot_message}")
-        ai_logger.info(f"🗣️ Tone Preference: {tone_preference}")
-        ai_logger.info(f"💬 Conversation Style: {conversation_style}")
-        ai_logger.info(f"📚 Conversation History:\n{history}")
-
-        is_completed = status.get('is_completed', False)
-        last_answered_question = status.get('last_answered_question', None)
-        last_asked_question = status.get('last_asked_question', None)
-        questions = status.get('questions', [])
-
-        ai_logger.info(f"✅ Is Completed: {is_completed}")
-        ai_logger.info(f"🔄 Last Answered: {last_answered_question}")
-        ai_logger.info(f"❓ Last Asked: {last_asked_question}")
-        
-        # Q1-Q10 상태 출력
-        ai_logger.info("📋 Question Status:")
-        for q in questions:
-            question_id = q.get('questionId', 'Unknown')
-            question_text = q.get('questionText', '')
-            status_val = q.get('status', 'unknown')
-            status_emoji = "✅" if status_val == "answered" else "❌"
-            ai_logger.info(f"  {status_emoji} {question_id}: {question_text} ({status_val})")
-
-        ai_logger.info("----------------------------------------------------------")
-
-
-        #----------------------------INTENT ANALYSIS------------------------------------#
-        previous_policy = selected_policies[-1] if selected_policies else "start"
-        intent = analyze_intent(user_message, history, client, previous_policy)
-        if intent.get('intent') == 'answer_tone':
-            tone_preference = user_message
-        elif intent.get('intent') == 'answer_conversation_style':
-            conversation_style = user_message
-            
-        #----------------------------SYMPTOM-RELEVANT PROCESS---------------------------#
-        if is_symptom_intent(intent.get('intent')):
-            ai_logger.info("🧠 Symptom 관련 의도 감지: DST 실행")
-            
-            #-------------------------DIALOGUE STATE TRACKING----------------------------#
-            updated_slots, updated_status, last_answered_question = update_dialogue_state(
-                last_bot_message=last_bot_message,
-                status=status, 
-                user_message=user_message,
-                intent=intent.get('intent'),
-                client=client
+        updated_slots, updated_status, last_answered_question = await dst_task
+    except BaseException:
+        dp_task.cancel()
+        raise
+
+    changed_questions = policy_relevant_changes(status, updated_status)
+    if changed_questions:
+        # 정책 관련 상태가 바뀌었으므로 추측 결과를 폐기하고 업데이트된 상태로 DP 재실행
+        dp_task.cancel()
+        increment_counter("dp_speculation_total", outcome="discarded")
+        ai_logger.info(f"🔮 DP 추측 실행 폐기 - 변경된 문항: {', '.join(changed_questions)}")
+        with stage_timer("dp"):
+            policy = await select_policy(intent, user_message, history, client, message_count, updated_status, selected_policies, conversation_style)
+    else:
+        increment_counter("dp_speculation_total", outcome="accepted")
+        ai_logger.info("🔮 DP 추측 실행 채택 - 정책 관련 상태 변경 없음")
+        policy = await dp_task
+
+    total = sum_counter("dp_speculation_total")
+    discarded = get_counter("dp_speculation_total", outcome="discarded")
+    ai_logger.info(f"🔮 DP 추측 실행 누적 폐기율: {discarded}/{total} ({discarded / total:.1%})")
+    return updated_slots, updated_status, last_answered_question, policy
+
+
+async def run_dialogue_turn(data):
+    """
+    요청 데이터를 바탕으로 NLU → DST → DP 단계를 실행하여 응답 생성에 필요한 정보를 반환하는 함수
+
+    Args:
+        data (dict): /api/chat 요청 본문
+
+    Returns:
+        dict: 응답 생성(NLG)과 응답 데이터 구성에 필요한 턴 정보
+    """
+    # 턴 예산 시작 (이후 모든 GPT 호출이 턴 마감 시각을 넘지 않도록 제한)
+    budget = start_turn()
+    user_message = data.get('message', '')
+    user_id = data.get('user_id', '')
+    session_id = data.get('session_id', '')
+    timestamp = data.get('timestamp', '')
+    history = data.get('history', '')  # 서버에서 보내는 히스토리 데이터
+    last_bot_message = data.get('last_bot_message', '')  # 마지막 챗봇 발화
+    status = data.get('status', {})  # 서버에서 보내는 상태 정보
+    message_count = data.get('messageCount', 0)  # Session의 messageCount 저장
+    selected_policies = data.get('selectedPolicies', [])  # 이전에 선택된 정책들
+    tone_preference = data.get('tonePreference')  # 사용자 말투 선호
+    conversation_style = data.get('conversationStyle')  # 사용자 대화 스타일 선호
+
+    # API 요청 로깅
+    log_api_request(user_id, session_id, user_message, timestamp)
+    ai_logger.info("----------------------------------------------------------")
+    ai_logger.info(f"💬 User Message: {user_message}")
+    ai_logger.info(f"👤 User ID: {user_id}, Session ID: {session_id}")
+    ai_logger.info(f"⏰ Timestamp: {timestamp}")
+    ai_logger.info(f"📊 Message Count: {message_count}")
+    ai_logger.info(f"📋 Selected Policies: {selected_policies}")
+    ai_logger.info(f"🤖 Last Bot Message: {last_bot_message}")
+    ai_logger.info(f"🗣️ Tone Preference: {tone_preference}")
+    ai_logger.info(f"💬 Conversation Style: {conversation_style}")
+    ai_logger.info(f"📚 Conversation History:\n{history}")
+
+    is_completed = status.get('is_completed', False)
+    last_answered_question = status.get('last_answered_question', None)
+    last_asked_question = status.get('last_asked_question', None)
+    questions = status.get('questions', [])
+
+    ai_logger.info(f"✅ Is Completed: {is_completed}")
+    ai_logger.info(f"🔄 Last Answered: {last_answered_question}")
+    ai_logger.info(f"❓ Last Asked: {last_asked_question}")
+
+    # Q1-Q10 상태 출력
+    ai_logger.info("📋 Question Status:")
+    for q in questions:
+        question_id = q.get('questionId', 'Unknown')
+        question_text = q.get('questionText', '')
+        status_val = q.get('status', 'unknown')
+        status_emoji = "✅" if status_val == "answered" else "❌"
+        ai_logger.info(f"  {status_emoji} {question_id}: {question_text} ({status_val})")
+
+    ai_logger.info("----------------------------------------------------------")
+
+
+    #----------------------------CONVERSATION MEMORY--------------------------------#
+    # 오래된 대화는 누적 요약으로 대체하여 단계별 프롬프트 크기를 일정하게 유지 (요약 갱신은 백그라운드)
+    if MEMORY_ENABLED:
+        history = conversation_memory.build_context(user_id, session_id, history, client)
+        ai_logger.info(f"🧠 대화 메모리 적용 후 히스토리: {len(history)}자 (원본 {len(data.get('history', '') or '')}자)")
+
+    #----------------------------INTENT ANALYSIS------------------------------------#
+    previous_policy = selected_policies[-1] if selected_policies else "start"
+    planned_policy = None
+    intent = None
+    if PIPELINE_MODE == "planner":
+        with stage_timer("planner"):
+            intent, planned_policy = await plan_turn(
+                user_message, history, client, previous_policy, message_count, status, selected_policies, conversation_style
             )
+        if intent is None:
+            ai_logger.warning("⚠️ 통합 플래너 실패: 기존 NLU/DP 호출로 대체")
+            increment_counter("planner_turn_total", outcome="fallback")
+    if intent is None:
+        with stage_timer("nlu"):
+            intent = await analyze_intent(user_message, history, client, previous_policy)
+    if intent.get('intent') == 'answer_tone':
+        tone_preference = match_option(user_message, TONE_OPTIONS) or user_message
+    elif intent.get('intent') == 'answer_conversation_style':
+        conversation_style = match_option(user_message, CONVERSATION_STYLE_OPTIONS) or user_message
 
-        # Non-symptom-relevant Intent
-        else:
-            ai_logger.info("💬 Non-symptom 프로세스 실행")
+    #----------------------------SYMPTOM-RELEVANT PROCESS---------------------------#
+    policy = None
+    if is_symptom_intent(intent.get('intent')):
+        ai_logger.info("🧠 Symptom 관련 의도 감지: DST 실행")
+
+        if budget.degrade("skip_dst", TURN_DEGRADE_DST_BELOW):
+            # 턴 예산 부족: DST를 생략하고 이전 상태를 그대로 사용
             updated_slots = None
             updated_status = status
-        
-        #----------------------------DIAOUGE POLICY SELECTION----------------------------#
-        policy = select_policy(intent, user_message, history, client, message_count, updated_status, selected_policies, conversation_style)
-        
-        # next_question에 questionText 추가
-        if policy.get('next_question') and updated_status and updated_status.get('questions'):
-            question_id = policy['next_question']
-            # questions 배열에서 해당 questionId의 questionText 찾기
-            matching_question = next((q for q in updated_status['questions'] if q.get('questionId') == question_id), None)
-            if matching_question:
-                policy['next_question_text'] = matching_question.get('questionText', None)
-                ai_logger.info(f"📝 Question Text 추가: {question_id} - {matching_question.get('questionText', '')}")
+        elif SPECULATIVE_DP and planned_policy is None:
+            #-------------------DIALOGUE STATE TRACKING + POLICY (SPECULATIVE)-------------------#
+            with stage_timer("dst_dp_speculative"):
+                updated_slots, updated_status, last_answered_question, policy = await run_speculative_dst_dp(
+                    intent, user_message, history, last_bot_message, status, message_count, selected_policies, conversation_style
+                )
+        else:
+            #-------------------------DIALOGUE STATE TRACKING----------------------------#
+            with stage_timer("dst"):
+                updated_slots, updated_status, last_answered_question = await update_dialogue_state(
+                    last_bot_message=last_bot_message,
+                    status=status, 
+                    user_message=user_message,
+                    intent=intent.get('intent'),
+                    client=client
+                )
+
+    # Non-symptom-relevant Intent
+    else:
+        ai_logger.info("💬 Non-symptom 프로세스 실행")
+        updated_slots = None
+        updated_status = status
+
+    #----------------------------DIAOUGE POLICY SELECTION----------------------------#
+    if policy is None and planned_policy is not None:
+        # 플래너는 DST 이전 상태로 정책을 골랐으므로, DST가 정책 관련 상태를 바꾼 경우에만 DP를 다시 실행
+        changed = policy_relevant_changes(status, updated_status)
+        if changed:
+            ai_logger.info(f"🔁 DST가 정책 관련 상태 변경 ({', '.join(changed)}): 플래너 정책 대신 DP 재실행")
+            increment_counter("planner_turn_total", outcome="replanned")
+        else:
+            policy = planned_policy
+            increment_counter("planner_turn_total", outcome="accepted")
+
+    if policy is None and budget.degrade("rule_policy", TURN_DEGRADE_DP_BELOW):
+        # 턴 예산 부족: DP 호출 대신 규칙 기반 정책 사용
+        policy = select_policy_by_rules(intent, updated_status)
+        ai_logger.info(f"📏 규칙 기반 정책 선택 결과: {policy}")
+
+    if policy is None:
+        with stage_timer("dp"):
+            policy = await select_policy(intent, user_message, history, client, message_count, updated_status, selected_policies, conversation_style)
+
+    # next_question에 questionText 추가
+    if policy.get('next_question') and updated_status and updated_status.get('questions'):
+        question_id = policy['next_question']
+        # questions 배열에서 해당 questionId의 questionText 찾기
+        matching_question = next((q for q in updated_status['questions'] if q.get('questionId') == question_id), None)
+        if matching_question:
+            policy['next_question_text'] = matching_question.get('questionText', None)
+            ai_logger.info(f"📝 Question Text 추가: {question_id} - {matching_question.get('questionText', '')}")
+
+    return {
+        "user_id": user_id,
+        "session_id": session_id,
+        "user_message": user_message,
+        "history": history,
+        "intent": intent,
+        "policy": policy,
+        "updated_slots": updated_slots,
+        "updated_status": updated_status,
+        "last_answered_question": last_answered_question,
+        "tone_preference": tone_preference,
+        "budget": budget
+    }
+
+
+def build_response_data(response, turn):
+    """생성된 응답과 턴 정보를 API 서버(routes/agent.js)가 기대하는 응답 형식으로 구성하는 함수"""
+    policy = turn["policy"]
+    return {
+        "response": response,
+        "intent": turn["intent"],
+        "first_policy": policy.get('first_policy', None),
+        "second_policy": policy.get('second_policy', None),
+        "updated_slots": turn["updated_slots"],
+        "is_completed": policy.get('is_completed', False),
+        "is_finished": policy.get('is_finished', False),
+        "last_asked_question": policy.get('next_question', None),
+        "last_asked_question_text": policy.get('next_question_text', None),
+        "last_answered_question": turn["last_answered_question"],
+        "degradations": list(turn["budget"].degradations)  # 턴 예산 부족으로 적용된 축소 (skip_dst, rule_policy, short_nlg)
+    }
+
+
+def admission_key(data):
+    """세션별 동시 턴 제한에 사용하는 키 (user_id, session_id)"""
+    return (data.get('user_id'), data.get('session_id'))
+
+
+def admission_rejected_response(e):
+    """수락 거절(AdmissionRejected)을 /api/chat 오류 형식의 응답으로 변환 (대기 후 재시도가 가능하면 Retry-After 포함)"""
+    ai_logger.warning(f"⚠️ 턴 수락 거절 ({e.reason}): {e}")
+    headers = {"Retry-After": str(max(1, math.ceil(e.retry_after)))} if e.retry_after is not None else {}
+    return jsonify({"error": str(e), "reason": e.reason, "response": str(e)}), e.status_code, headers
+
+
+def format_sse(event, data):
+    """Server-Sent Events 형식의 메시지 문자열을 생성하는 함수"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def singleflight_key(data):
+    """중복 턴 판단 키 (같은 세션에서 같은 메시지 수일 때 보낸 같은 메시지는 같은 턴)"""
+    return (data.get('user_id'), data.get('session_id'), data.get('message'), data.get('messageCount'))
+
+
+def is_reusable_response(response_data):
+    """
+    중복 요청에 재사용할 수 있는 정상 응답인지 여부
+    (NLG 실패 안내 메시지, NLU/DP 실패, 턴 예산 부족으로 축소된 응답은 재시도하면 달라질 수 있으므로 재사용하지 않음)
+    """
+    intent = response_data.get("intent")
+    return (
+        bool(response_data.get("response"))
+        and response_data["response"] != RESPONSE_FAILURE_MESSAGE
+        and not (isinstance(intent, dict) and intent.get("intent") == "failed")
+        and response_data.get("first_policy") != "failed"
+        and not response_data.get("degradations")
+    )
+
+
+async def run_chat_turn(data):
+    """
+    수락 제어를 거쳐 턴 하나를 처리하고 /api/chat 응답 데이터를 반환하는 함수
+
+    Args:
+        data (dict): /api/chat 요청 본문
+
+    Returns:
+        dict: 응답 데이터
+    """
+    await admission.acquire(admission_key(data))
+    try:
+        turn = await run_dialogue_turn(data)
 
         #----------------------------RESPONSE GENERATION---------------------------------#
-        response = generate_response(policy, user_message, history, updated_status, client, tone_preference)
+        with stage_timer("nlg"):
+            response = await generate_response(turn["policy"], turn["user_message"], turn["history"], turn["updated_status"], client, turn["tone_preference"])
 
         # post-processing
         response = response.replace("\n\n", "\n").strip()
         
         # 응답 데이터 구성
-        response_data = {
-            "response": response,
-            "intent": intent,
-            "first_policy": policy.get('first_policy', None),
-            "second_policy": policy.get('second_policy', None),
-            "updated_slots": updated_slots,
-            "is_completed": policy.get('is_completed', False),
-            "is_finished": policy.get('is_finished', False),
-            "last_asked_question": policy.get('next_question', None),
-            "last_asked_question_text": policy.get('next_question_text', None),
-            "last_answered_question": last_answered_question
-        }
-        
+        response_data = build_response_data(response, turn)
+        schedule_summary_precompute(turn)
+        return response_data
+    finally:
+        admission.release(admission_key(data))
+
+
+@app.route('/api/chat', methods=['POST'])
+async def chat():
+    data = await request.get_json() or {}
+    try:
+        # 중복 전송된 턴은 파이프라인을 다시 실행하지 않고 처리 중이거나 방금 완료된 결과를 사용
+        response_data, _ = await chat_flight.run(singleflight_key(data), lambda: run_chat_turn(data),
+                                                   cacheable=is_reusable_response)
         return jsonify(response_data)
-        
+
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         log_error("챗봇 응답 생성 중 오류 발생", e)
         return jsonify({
@@ -146,68 +354,84 @@ def chat():
         }), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+async def chat_stream():
+    """
+    /api/chat의 스트리밍 버전 (Server-Sent Events)
+    - token 이벤트: 모델이 생성한 응답 텍스트 조각 (후처리 적용)
+    - done 이벤트: /api/chat과 동일한 형식의 최종 응답 데이터
+    - error 이벤트: 스트리밍 도중 발생한 오류
+    """
+    data = await request.get_json() or {}
+    try:
+        await admission.acquire(admission_key(data))
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+    # 세션 제한은 요청 처리 태스크가 끝날 때 해제 (마지막 이벤트를 보낸 뒤, 또는 본문을 보내기 전후에 클라이언트 연결이 끊긴 뒤)
+    admission.release_when_done(admission_key(data), asyncio.current_task())
 
-
-
-@app.route('/api/summary/<user_id>/<session_id>', methods=['GET'])
-def generate_summary(user_id, session_id):
     try:
-        ai_logger.info(f"📊 Summary 요청 수신 - User: {user_id}, Session: {session_id}")
-        
-        # API 서버에서 대화 내용을 가져오는 요청
-        api_server_url = os.environ.get("API_SERVER_URL", "http://localhost:3002")
-        
-        # 세션의 대화 내용과 상태 정보 가져오기
+        turn = await run_dialogue_turn(data)
+    except Exception as e:
+        log_error("챗봇 스트리밍 응답 준비 중 오류 발생", e)
+        return jsonify({
+            "error": "챗봇 응답 생성 중 오류가 발생했습니다.",
+            "response": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요."
+        }), 500
+
+    async def events():
+        # 스트리밍 응답은 요청 핸들러와 다른 컨텍스트에서 실행되므로 턴 예산을 다시 설정
+        use_turn(turn["budget"])
+        post_processor = StreamPostProcessor()
+        response_parts = []
         try:
-            # 1. 대화 내용 가져오기
-            history_response = requests.get(f"{api_server_url}/api/history/{user_id}/{session_id}")
-            if history_response.status_code != 200:
-                ai_logger.error(f"대화 내용 조회 실패: {history_response.status_code}")
-                return jsonify({
-                    "error": "대화 내용을 가져올 수 없습니다.",
-                    "success": False
-                }), 500
-                
-            history_data = history_response.json()
-            messages = history_data.get('messages', [])
-            
-            if not messages:
-                ai_logger.warning("대화 내용이 없습니다.")
-                return jsonify({
-                    "error": "분석할 대화 내용이 없습니다.",
-                    "success": False
-                }), 400
-            
-            # 2. 세션 정보 가져오기
-            session_response = requests.get(f"{api_server_url}/api/session/{user_id}/{session_id}")
-            session_data = {}
-            if session_response.status_code == 200:
-                session_data = session_response.json()
-                ai_logger.info("세션 정보 조회 성공")
-            else:
-                ai_logger.warning(f"세션 정보 조회 실패: {session_response.status_code}")
-            
-            # 3. 상태 정보 가져오기
-            status_response = requests.get(f"{api_server_url}/api/state/{user_id}/{session_id}")
-            status_data = {}
-            if status_response.status_code == 200:
-                status_data = status_response.json()
-                ai_logger.info("상태 정보 조회 성공")
-            else:
-                ai_logger.warning(f"상태 정보 조회 실패: {status_response.status_code}")
-            
-        except requests.RequestException as e:
-            ai_logger.error(f"API 서버 연결 실패: {e}")
-            return jsonify({
-                "error": "데이터를 가져오는 중 오류가 발생했습니다.",
-                "success": False
-            }), 500
-        
-        # 대화 내용을 문자열로 변환
-        conversation_history = format_conversation_history(messages)
-        
-        # Summary 레포트 생성 (추가 정보 포함)
-        summary_result = generate_summary_report(
+            #----------------------------RESPONSE GENERATION (STREAMING)------------------------#
+            with stage_timer("nlg"):
+                async for chunk in stream_response(turn["policy"], turn["user_message"], turn["history"], turn["updated_status"], client, turn["tone_preference"]):
+                    text = post_processor.feed(chunk)
+                    if text:
+                        response_parts.append(text)
+                        yield format_sse("token", {"text": text})
+
+            yield format_sse("done", build_response_data("".join(response_parts), turn))
+            schedule_summary_precompute(turn)
+
+        except Exception as e:
+            log_error("챗봇 스트리밍 응답 생성 중 오류 발생", e)
+            yield format_sse("error", {
+                "error": "챗봇 응답 생성 중 오류가 발생했습니다.",
+                "response": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요."
+            })
+
+    response = await make_response(events(), 200, {
+        "Content-Type": "text/event-stream; charset=utf-8",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    response.timeout = None
+    return response
+
+
+async def build_summary_result(user_id, session_id, messages, session_data, status_data):
+    """
+    대화 내용, 세션 정보, 상태 정보로 Summary 레포트를 생성하는 함수
+
+    Returns:
+        tuple: (응답 데이터, HTTP 상태 코드)
+    """
+    if not messages:
+        ai_logger.warning("대화 내용이 없습니다.")
+        return {
+            "error": "분석할 대화 내용이 없습니다.",
+            "success": False
+        }, 400
+
+    # 대화 내용을 문자열로 변환
+    conversation_history = format_conversation_history(messages)
+
+    # Summary 레포트 생성 (추가 정보 포함)
+    with stage_timer("summary"):
+        summary_result = await generate_summary_report(
             user_id, 
             session_id, 
             conversation_history, 
@@ -215,23 +439,162 @@ def generate_summary(user_id, session_id):
             session_data=session_data,
             status_data=status_data
         )
-        
-        if summary_result['success']:
-            ai_logger.info(f"✅ Summary 레포트 생성 완료 - User: {user_id}, Session: {session_id}")
-            return jsonify({
-                "success": True,
-                "data": summary_result['data'],
-                "user_id": user_id,
-                "session_id": session_id
-            })
-        else:
-            ai_logger.error(f"❌ Summary 레포트 생성 실패 - User: {user_id}, Session: {session_id}")
+
+    if summary_result['success']:
+        ai_logger.info(f"✅ Summary 레포트 생성 완료 - User: {user_id}, Session: {session_id}")
+        return {
+            "success": True,
+            "data": summary_result['data'],
+            "user_id": user_id,
+            "session_id": session_id
+        }, 200
+    else:
+        ai_logger.error(f"❌ Summary 레포트 생성 실패 - User: {user_id}, Session: {session_id}")
+        return {
+            "error": "레포트 생성 중 오류가 발생했습니다.",
+            "success": False,
+            "details": summary_result.get('error', 'Unknown error')
+        }, 500
+
+
+async def fetch_and_build_summary(user_id, session_id):
+    """
+    API 서버에서 대화 내용, 세션 정보, 상태 정보를 조회하여 Summary 레포트를 생성하는 함수
+
+    Returns:
+        tuple: (응답 데이터, HTTP 상태 코드)
+    """
+    # API 서버에서 대화 내용, 세션 정보, 상태 정보를 동시에 조회 (공유 연결 풀 사용)
+    summary_inputs = await fetch_summary_inputs(user_id, session_id)
+
+    # 1. 대화 내용
+    history_status, history_data = summary_inputs["history"]
+    if history_status is None:
+        return {
+            "error": "데이터를 가져오는 중 오류가 발생했습니다.",
+            "success": False
+        }, 500
+    if history_status != 200:
+        ai_logger.error(f"대화 내용 조회 실패: {history_status}")
+        return {
+            "error": "대화 내용을 가져올 수 없습니다.",
+            "success": False
+        }, 500
+
+    messages = history_data.get('messages', [])
+
+    # 2. 세션 정보
+    session_status, session_data = summary_inputs["session"]
+    if session_data is not None:
+        ai_logger.info("세션 정보 조회 성공")
+    else:
+        session_data = {}
+        ai_logger.warning(f"세션 정보 조회 실패: {session_status}")
+
+    # 3. 상태 정보
+    state_status, status_data = summary_inputs["state"]
+    if status_data is not None:
+        ai_logger.info("상태 정보 조회 성공")
+    else:
+        status_data = {}
+        ai_logger.warning(f"상태 정보 조회 실패: {state_status}")
+
+    return await build_summary_result(user_id, session_id, messages, session_data, status_data)
+
+
+def schedule_summary_precompute(turn):
+    """DP가 대화 종료(is_finished)를 선택한 턴이면 Summary 레포트 생성 작업을 미리 등록하는 함수"""
+    if not SUMMARY_PRECOMPUTE or str(turn["policy"].get('is_finished')).lower() != "true":
+        return
+    user_id, session_id = turn["user_id"], turn["session_id"]
+
+    async def job():
+        await asyncio.sleep(SUMMARY_PRECOMPUTE_DELAY)
+        return await fetch_and_build_summary(user_id, session_id)
+
+    try:
+        summary_jobs.submit(user_id, session_id, job, reason="session_finished", force=True)
+    except SummaryQueueFull as e:
+        ai_logger.warning(f"⚠️ Summary 사전 생성 생략: {e}")
+
+
+def summary_job_response(job):
+    """작업 상태를 응답으로 변환 (완료된 작업은 레포트 결과를 그대로 반환, 진행 중이면 202)"""
+    if job.finished and job.result is not None:
+        body, status_code = job.result
+        return jsonify(body), status_code
+    if job.finished:
+        return jsonify({
+            "error": "레포트 생성 중 오류가 발생했습니다.",
+            "success": False,
+            "details": job.error
+        }), 500
+    return jsonify({"success": False, "pending": True, "job": job.to_dict()}), 202
+
+
+@app.route('/api/summary/<user_id>/<session_id>', methods=['GET'])
+async def generate_summary(user_id, session_id):
+    try:
+        ai_logger.info(f"📊 Summary 요청 수신 - User: {user_id}, Session: {session_id}")
+
+        # 미리 생성 중이거나 완료된 작업이 있으면 그 결과를 사용하고, 없으면 새 작업을 등록하여 완료를 기다림
+        job = summary_jobs.submit(user_id, session_id, lambda: fetch_and_build_summary(user_id, session_id))
+        await summary_jobs.wait(job, SUMMARY_WAIT_TIMEOUT)
+        return summary_job_response(job)
+
+    except SummaryQueueFull as e:
+        ai_logger.warning(f"⚠️ {e}")
+        return jsonify({
+            "error": "레포트 생성 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            "success": False
+        }), 503
+    except Exception as e:
+        log_error(f"Summary 엔드포인트 오류 - User: {user_id}, Session: {session_id}", e)
+        return jsonify({
+            "error": "서버 내부 오류가 발생했습니다.",
+            "success": False
+        }), 500
+
+
+@app.route('/api/summary', methods=['POST'])
+async def generate_summary_from_body():
+    """
+    요청 본문으로 받은 대화 내용, 세션 정보, 상태 정보로 Summary 레포트를 생성 (API 서버 재조회 없음)
+
+    Request body:
+        user_id, session_id: 사용자/세션 ID
+        messages: 대화 메시지 배열 (sender, text) - /api/history 응답의 messages와 같은 형식
+        session: 세션 정보 (messageCount, totalDuration, isFinished, tonePreference, conversationStyle, selectedPolicies)
+        status: 문진 상태 (questions 포함)
+    """
+    data = await request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    session_id = data.get('session_id')
+    try:
+        ai_logger.info(f"📊 Summary 요청 수신 (본문 전달) - User: {user_id}, Session: {session_id}")
+
+        messages = data.get('messages')
+        if not isinstance(messages, list):
             return jsonify({
-                "error": "레포트 생성 중 오류가 발생했습니다.",
-                "success": False,
-                "details": summary_result.get('error', 'Unknown error')
-            }), 500
-            
+                "error": "messages 배열이 필요합니다.",
+                "success": False
+            }), 400
+
+        # 본문이 최신 데이터이므로 이전에 완료된 작업 결과는 사용하지 않음 (진행 중인 작업은 기다림)
+        job = summary_jobs.submit(
+            user_id, session_id,
+            lambda: build_summary_result(user_id, session_id, messages, data.get('session') or {}, data.get('status') or {}),
+            force=True
+        )
+        await summary_jobs.wait(job, SUMMARY_WAIT_TIMEOUT)
+        return summary_job_response(job)
+
+    except SummaryQueueFull as e:
+        ai_logger.warning(f"⚠️ {e}")
+        return jsonify({
+            "error": "레포트 생성 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            "success": False
+        }), 503
     except Exception as e:
         log_error(f"Summary 엔드포인트 오류 - User: {user_id}, Session: {session_id}", e)
         return jsonify({
@@ -240,11 +603,94 @@ def generate_summary(user_id, session_id):
         }), 500
 
 
+@app.route('/api/summary/jobs', methods=['POST'])
+async def submit_summary_job():
+    """
+    Summary 레포트 생성 작업을 등록하고 바로 반환 (결과는 GET /api/summary/jobs/<user_id>/<session_id>로 조회)
+
+    Request body:
+        user_id, session_id: 사용자/세션 ID
+        messages, session, status (선택): 전달하면 API 서버를 조회하지 않고 본문 데이터로 생성
+    """
+    data = await request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    session_id = data.get('session_id')
+    if not user_id or not session_id:
+        return jsonify({"error": "user_id와 session_id가 필요합니다.", "success": False}), 400
+
+    messages = data.get('messages')
+    if isinstance(messages, list):
+        job_factory = lambda: build_summary_result(user_id, session_id, messages, data.get('session') or {}, data.get('status') or {})
+    else:
+        job_factory = lambda: fetch_and_build_summary(user_id, session_id)
+
+    try:
+        job = summary_jobs.submit(user_id, session_id, job_factory, force=bool(data.get('force')))
+    except SummaryQueueFull as e:
+        ai_logger.warning(f"⚠️ {e}")
+        return jsonify({"error": str(e), "success": False}), 503
+    return jsonify({"success": True, "job": job.to_dict()}), 202
+
+
+@app.route('/api/summary/jobs/<user_id>/<session_id>', methods=['GET'])
+async def get_summary_job(user_id, session_id):
+    """세션의 최근 Summary 작업 상태 조회 (완료된 경우 레포트 결과 포함)"""
+    job = summary_jobs.get(user_id, session_id)
+    if job is None:
+        return jsonify({"error": "등록된 레포트 생성 작업이 없습니다.", "success": False}), 404
+
+    response_data = {"success": True, "job": job.to_dict()}
+    if job.status == "completed":
+        response_data["data"] = job.result[0].get("data")
+    return jsonify(response_data)
+
+
+# 워커가 요청을 받을 준비가 되었는지 여부 (/ready)
+serving_state = {"ready": False, "draining": False}
+
+
+def mark_draining():
+    """종료가 시작되었음을 표시 (이후 /ready는 503을 반환하여 로드밸런서가 새 요청을 보내지 않도록 함)"""
+    if not serving_state["draining"]:
+        serving_state["draining"] = True
+        ai_logger.info(f"🛑 종료 시작: 준비 상태 해제 후 처리 중인 요청 대기 (pid {os.getpid()})")
+
+
+@app.before_serving
+async def mark_ready():
+    serving_state["ready"] = True
+    ai_logger.info(f"🚀 Running Chatbot... (pid {os.getpid()})")
+
+
+@app.after_serving
+async def shutdown_http_clients():
+    mark_draining()
+    serving_state["ready"] = False
+    await summary_jobs.stop()
+    await conversation_memory.stop()
+    await close_api_server_client()
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """단계별 GPT 호출 지연 시간/토큰 사용량/재시도 결과 등 운영 지표 (Prometheus 텍스트 형식)"""
+    return render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
 
 @app.route('/', methods=['GET'])
-def run_chatbot():
+async def run_chatbot():
     return jsonify({"status": True, "message": "챗봇 서비스가 정상적으로 동작 중입니다."})
 
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    """준비 상태 확인 (워커 시작 완료 후 200, 시작 전이나 종료(드레인) 중에는 503)"""
+    if not serving_state["ready"] or serving_state["draining"]:
+        return jsonify({"ready": False, "draining": serving_state["draining"]}), 503
+    return jsonify({"ready": True, "pid": os.getpid()})
+
+
 if __name__ == '__main__':
-    ai_logger.info("🚀 Running Chatbot...")
-    app.run(host='0.0.0.0', port=os.environ.get("AI_SERVICE_PORT"), debug=True)
+    # 로컬 개발용 단일 프로세스 실행 (운영 환경은 serve.py 사용, 코드 변경 시 자동 재시작은 AI_SERVICE_DEBUG=true)
+    app.run(host='0.0.0.0', port=os.environ.get("AI_SERVICE_PORT"),
+            debug=os.environ.get("AI_SERVICE_DEBUG", "false").lower() == "true")
@@ -0,0 +1,149 @@
+# schemas.py - 단계별 구조화 응답 형식 (JSON Schema로 GPT 응답을 제한하고, 받은 응답을 같은 스키마로 검증)
+import json
+import os
+
+from dialogue_state import DELTA_FIELDS, EXPERIENCE_VALUES
+from intent_classifier import normalize_intent_label
+from metrics import increment_counter
+from prompts import POLICY_PROMPTS_SINGLE
+
+# true: response_format=json_schema(strict)로 스키마에 맞는 응답만 생성, false: 기존처럼 텍스트 응답을 파싱
+STRUCTURED_OUTPUTS = os.environ.get("STRUCTURED_OUTPUTS", "true").lower() == "true"
+
+POLICY_NAMES = tuple(POLICY_PROMPTS_SINGLE)
+QUESTION_IDS = tuple(f"Q{i}" for i in range(1, 11))
+
+
+class SchemaValidationError(ValueError):
+    """GPT 응답이 JSON이 아니거나 스키마와 맞지 않는 경우"""
+
+
+def _type_matches(value, expected):
+    if expected == "null":
+        return value is None
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "object":
+        return isinstance(value, dict)
+    if expected == "array":
+        return isinstance(value, list)
+    return True
+
+
+def validate(value, schema, path="$"):
+    """구조화 응답에 사용하는 JSON Schema 범위(type, enum, properties, required, additionalProperties, items)로 값을 검증"""
+    types = schema.get("type")
+    if types is not None:
+        types = types if isinstance(types, list) else [types]
+        if not any(_type_matches(value, expected) for expected in types):
+            raise SchemaValidationError(f"{path}: {'/'.join(types)} 타입이 아님 ({value!r})")
+    if "enum" in schema and value not in schema["enum"]:
+        raise SchemaValidationError(f"{path}: 허용되지 않은 값 ({value!r})")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                raise SchemaValidationError(f"{path}: {key} 항목 없음")
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                validate(item, properties[key], f"{path}.{key}")
+            elif schema.get("additionalProperties") is False:
+                raise SchemaValidationError(f"{path}: 정의되지 않은 항목 {key}")
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            validate(item, schema["items"], f"{path}[{index}]")
+
+
+def _strip_code_fence(text):
+    return text.replace("```json", "").replace("```", "").strip()
+
+
+class StructuredResult:
+    """
+    단계 하나의 응답 형식
+
+    - request_options(): chat.completions.create에 전달할 response_format
+    - parse(): 응답 텍스트를 dict로 변환하고 스키마로 검증 (실패 시 SchemaValidationError)
+    """
+
+    def __init__(self, stage, name, schema, check=None, legacy_options=None):
+        self.stage = stage
+        self.name = name
+        self.schema = schema
+        self.check = check
+        self.legacy_options = legacy_options or {}
+
+    def request_options(self):
+        if not STRUCTURED_OUTPUTS:
+            return dict(self.legacy_options)
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": self.name, "strict": True, "schema": self.schema}
+            }
+        }
+
+    def parse(self, text):
+        mode = "structured" if STRUCTURED_OUTPUTS else "legacy"
+        try:
+            if not text:
+                raise SchemaValidationError("응답 내용 없음 (거부 또는 길이 초과)")
+            try:
+                value = json.loads(_strip_code_fence(text))
+            except json.JSONDecodeError as e:
+                raise SchemaValidationError(f"JSON 파싱 실패: {e}")
+            validate(value, self.schema)
+            if self.check:
+                self.check(value)
+        except SchemaValidationError:
+            # 검증 실패 1건 = GPT 재호출 1회 (mode=legacy와 비교하면 구조화 응답으로 없어진 재시도 수를 확인할 수 있음)
+            increment_counter("llm_parse_total", stage=self.stage, mode=mode, outcome="invalid")
+            raise
+        increment_counter("llm_parse_total", stage=self.stage, mode=mode, outcome="valid")
+        return value
+
+
+def _check_intent(value):
+    # "other" 의도는 프롬프트 지침에 따라 "other: 설명" 형태로 올 수 있음
+    if normalize_intent_label(value["intent"]) is None:
+        raise SchemaValidationError(f"$.intent: 알 수 없는 의도 ({value['intent']!r})")
+
+
+def _object(properties):
+    # strict 모드에서는 모든 항목이 required이고 추가 항목이 없어야 함 (값이 없을 수 있는 항목은 null 허용)
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+INTENT_PROPERTIES = {"intent": {"type": "string"}}
+
+POLICY_PROPERTIES = {
+    "first_policy": {"type": "string", "enum": list(POLICY_NAMES)},
+    "second_policy": {"type": ["string", "null"], "enum": [*POLICY_NAMES, None]},
+    "next_question": {"type": ["string", "null"], "enum": [*QUESTION_IDS, None]},
+    "is_completed": {"type": "boolean"},
+    "is_finished": {"type": "boolean"}
+}
+
+SYMPTOM_DELTA_PROPERTIES = {
+    "questionId": {"type": "string", "enum": list(QUESTION_IDS)},
+    "experience": {"type": ["string", "null"], "enum": [*EXPERIENCE_VALUES, None]},
+    **{field: {"type": ["string", "null"]} for field in DELTA_FIELDS if field != "experience"}
+}
+
+INTENT_RESULT = StructuredResult("nlu", "intent_result", _object(INTENT_PROPERTIES), check=_check_intent)
+POLICY_RESULT = StructuredResult("dp", "policy_result", _object(POLICY_PROPERTIES))
+PLAN_RESULT = StructuredResult(
+    "planner", "plan_result", _object({**INTENT_PROPERTIES, **POLICY_PROPERTIES}),
+    check=_check_intent, legacy_options={"response_format": {"type": "json_object"}}
+)
+SYMPTOM_UPDATES = StructuredResult(
+    "dst", "symptom_updates",
+    _object({"updates": {"type": "array", "items": _object(SYMPTOM_DELTA_PROPERTIES)}})
+)
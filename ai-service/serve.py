@@ -0,0 +1,136 @@
+# serve.py - AI 서비스 운영 실행 진입점 (hypercorn 멀티 프로세스 워커, 정상 종료 대기, 리로더 없음)
+# 각 워커 프로세스가 run_chatbot 모듈을 직접 불러오므로 OpenAI 클라이언트, 로거, 작업 큐 등 모듈 상태는 워커마다 한 번씩만 초기화됩니다.
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+
+from dotenv import load_dotenv
+from hypercorn.asyncio.run import asyncio_worker, uvloop_worker
+from hypercorn.config import Config
+
+APPLICATION_PATH = "run_chatbot:app"
+WORKER_FUNCS = {"asyncio": asyncio_worker, "uvloop": uvloop_worker}
+# 이 시간(초) 안에 종료된 워커는 다시 시작하지 않음
+WORKER_MIN_UPTIME = 10
+
+
+def build_config():
+    """환경 변수로 hypercorn 설정을 구성"""
+    load_dotenv()
+    config = Config()
+    config.application_path = APPLICATION_PATH
+    host = os.environ.get("AI_SERVICE_HOST", "0.0.0.0")
+    port = os.environ.get("AI_SERVICE_PORT", "5002")
+    config.bind = [f"{host}:{port}"]
+    # 워커(프로세스) 수: CPU 코어 수에 맞춰 늘리면 처리량이 코어 수에 비례 (요약 작업/대화 메모리는 워커별로 관리됨)
+    config.workers = int(os.environ.get("AI_SERVICE_WORKERS", "1"))
+    # 워커 내부 동시성은 asyncio 이벤트 루프 (uvloop 설치 시 AI_SERVICE_WORKER_CLASS=uvloop)
+    config.worker_class = os.environ.get("AI_SERVICE_WORKER_CLASS", "asyncio")
+    config.backlog = int(os.environ.get("AI_SERVICE_BACKLOG", "1024"))
+    config.keep_alive_timeout = float(os.environ.get("AI_SERVICE_KEEP_ALIVE", "75"))
+    # 종료 신호(SIGTERM/SIGINT)를 받으면 새 연결을 받지 않고, 처리 중인 턴이 끝날 때까지 최대 이 시간만큼 대기
+    config.graceful_timeout = float(os.environ.get("AI_SERVICE_GRACEFUL_TIMEOUT", "30"))
+    config.accesslog = os.environ.get("AI_SERVICE_ACCESS_LOG") or None
+    config.errorlog = "-"
+    return config
+
+
+def drain_delay():
+    """종료 신호를 받은 뒤 연결을 닫기 전까지 /ready만 503으로 바꾸고 요청을 계속 받는 시간 (초)"""
+    return float(os.environ.get("AI_SERVICE_DRAIN_DELAY", "5"))
+
+
+def run_worker(config, sockets, shutdown_event, draining_event):
+    """워커 프로세스 본체 (종료는 부모 프로세스가 draining_event, shutdown_event로 알리므로 신호는 무시)"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from run_chatbot import mark_draining
+
+    def watch_draining():
+        draining_event.wait()
+        mark_draining()
+
+    threading.Thread(target=watch_draining, daemon=True).start()
+    WORKER_FUNCS[config.worker_class](config, sockets, shutdown_event)
+
+
+def serve(config, drain_delay=0.0):
+    """
+    워커 프로세스를 실행하고 감시하는 함수
+
+    hypercorn 기본 실행기는 먼저 끝난 워커가 생기면 나머지 워커를 바로 종료시키므로, 여기서는 종료 신호를 받으면
+    모든 워커가 처리 중인 요청을 마칠 때까지(최대 graceful_timeout) 기다립니다. 비정상 종료된 워커는 다시 시작합니다.
+    종료 신호를 받으면 먼저 drain_delay초 동안 /ready만 503으로 바꾼 채 요청을 계속 받아 로드밸런서가 워커를 제외할
+    시간을 주고, 그 뒤에 새 연결 수락을 멈춥니다 (이 사이에 신호를 한 번 더 받으면 바로 멈춤).
+
+    Returns:
+        int: 종료 코드
+    """
+    sockets = config.create_sockets()
+    context = get_context("spawn")
+    shutdown_event = context.Event()
+    draining_event = context.Event()
+
+    started_at = {}
+
+    def start_worker():
+        process = context.Process(target=run_worker, args=(config, sockets, shutdown_event, draining_event))
+        process.start()
+        started_at[process.pid] = time.monotonic()
+        return process
+
+    processes = [start_worker() for _ in range(max(1, config.workers))]
+
+    drain_until = []
+
+    def shutdown(*args):
+        if draining_event.is_set():
+            shutdown_event.set()
+            return
+        draining_event.set()
+        drain_until.append(time.monotonic() + drain_delay)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    exitcode = 0
+    while not shutdown_event.is_set():
+        if drain_until and time.monotonic() >= drain_until[0]:
+            shutdown_event.set()
+            break
+        wait([process.sentinel for process in processes], timeout=1)
+        for index, process in enumerate(processes):
+            if process.is_alive() or draining_event.is_set() or shutdown_event.is_set():
+                continue
+            exitcode = exitcode or process.exitcode
+            if time.monotonic() - started_at.pop(process.pid) < WORKER_MIN_UPTIME:
+                # 시작 직후 종료(설정 오류 등)는 재시작해도 반복되므로 전체 종료
+                print(f"워커 {process.pid}가 시작 직후 종료됨 (코드 {process.exitcode}): 서버를 종료합니다", file=sys.stderr)
+                shutdown_event.set()
+                break
+            print(f"워커 {process.pid} 종료 (코드 {process.exitcode}): 다시 시작합니다", file=sys.stderr)
+            processes[index] = start_worker()
+
+    deadline = time.monotonic() + config.graceful_timeout + 5
+    for process in processes:
+        process.join(max(0, deadline - time.monotonic()))
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    for sock in sockets.secure_sockets + sockets.insecure_sockets:
+        sock.close()
+    return exitcode
+
+
+def main():
+    config = build_config()
+    return serve(config, drain_delay())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# singleflight.py - 같은 턴이 중복 전송되었을 때 파이프라인을 한 번만 실행하는 요청 병합 (처리 중이면 같은 결과를 기다리고, 직후면 저장된 결과를 반환)
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from logger_config import ai_logger
+from metrics import increment_counter
+
+SINGLEFLIGHT_ENABLED = os.environ.get("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+# 완료된 결과를 중복 요청에 재사용하는 시간 (초, api-server의 중복 저장 방지 간격과 동일)
+SINGLEFLIGHT_TTL = float(os.environ.get("SINGLEFLIGHT_TTL", "10"))
+SINGLEFLIGHT_MAX_ENTRIES = int(os.environ.get("SINGLEFLIGHT_MAX_ENTRIES", "1000"))
+
+
+class SingleFlight:
+    """
+    키가 같은 요청을 하나의 실행으로 병합
+
+    - 처음 도착한 요청(leader)이 작업을 실행하고, 실행 중에 도착한 같은 키의 요청(joined)은 그 결과를 함께 기다림
+    - 작업이 성공하면 결과를 ttl초 동안 보관하여 직후에 도착한 요청(cached)에 그대로 반환
+      (예외로 끝났거나 cacheable이 거짓인 결과(오류/대체 응답)는 보관하지 않으므로 재시도하면 다시 실행)
+    - 작업은 별도 태스크로 실행되므로 먼저 보낸 요청의 연결이 끊겨도 기다리는 요청은 결과를 받음
+    """
+
+    def __init__(self, enabled=SINGLEFLIGHT_ENABLED, ttl=SINGLEFLIGHT_TTL, max_entries=SINGLEFLIGHT_MAX_ENTRIES):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.in_flight = {}
+        # 키 -> (만료 시각, 결과)
+        self.recent = OrderedDict()
+
+    def _cached(self, key):
+        entry = self.recent.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self.recent[key]
+            return None
+        return entry
+
+    def _finish(self, key, task, cacheable):
+        self.in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if cacheable is not None and not cacheable(task.result()):
+            increment_counter("singleflight_total", outcome="not_cached")
+            return
+        if self.ttl > 0:
+            self.recent[key] = (time.monotonic() + self.ttl, task.result())
+            self.recent.move_to_end(key)
+            while len(self.recent) > self.max_entries:
+                self.recent.popitem(last=False)
+
+    async def run(self, key, factory, cacheable=None):
+        """
+        키에 해당하는 작업 결과를 반환 (같은 키의 작업이 실행 중이거나 최근에 완료되었으면 새로 실행하지 않음)
+
+        Args:
+            key (tuple): 중복 판단 키
+            factory (callable): 작업 코루틴을 만드는 함수
+            cacheable (callable): 결과를 보관할지 판단하는 함수 (None이면 성공한 결과는 모두 보관)
+
+        Returns:
+            tuple: (결과, outcome) - outcome은 leader, joined, cached 중 하나
+        """
+        if not self.enabled:
+            return await factory(), "leader"
+
+        cached = self._cached(key)
+        if cached is not None:
+            increment_counter("singleflight_total", outcome="cached")
+            ai_logger.info(f"🔁 중복 요청: {self.ttl - (cached[0] - time.monotonic()):.1f}초 전에 완료된 결과 재사용")
+            return cached[1], "cached"
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            increment_counter("singleflight_total", outcome="joined")
+            ai_logger.info("🔁 중복 요청: 처리 중인 요청의 결과를 함께 대기")
+            return await asyncio.shield(task), "joined"
+
+        increment_counter("singleflight_total", outcome="leader")
+        task = asyncio.ensure_future(factory())
+        self.in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done, cacheable))
+        return await asyncio.shield(task), "leader"
@@ -0,0 +1,96 @@
+# status_encoder.py - 문진 상태(status)를 LLM 프롬프트용 압축 텍스트로 변환하는 모듈
+import os
+
+# compact: 단계별 필요한 필드만 한 줄씩 기록 / raw: 기존처럼 dict 전체를 그대로 기록
+STATUS_ENCODING = os.environ.get("STATUS_ENCODING", "compact").lower()
+
+# rawUserInput은 최근 발화 몇 개만, 발화별 최대 길이를 제한하여 기록
+RAW_INPUT_LIMIT = int(os.environ.get("STATUS_RAW_INPUT_LIMIT", "2"))
+RAW_INPUT_MAX_CHARS = int(os.environ.get("STATUS_RAW_INPUT_MAX_CHARS", "40"))
+
+# 행에 기록하는 필드 순서 (단계별로 선언한 필드 중 이 순서대로 출력되어 프롬프트 형식이 항상 같음)
+FIELD_ORDER = (
+    "status", "experience", "frequency", "condition", "context", "note", "conflict", "score", "rawUserInput"
+)
+
+
+def _truncate(text, max_chars):
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def summarize_raw_inputs(raw_inputs, limit=None, max_chars=None):
+    """rawUserInput 리스트를 최근 발화 위주로 요약 (생략된 발화 수를 함께 표시)"""
+    limit = RAW_INPUT_LIMIT if limit is None else limit
+    max_chars = RAW_INPUT_MAX_CHARS if max_chars is None else max_chars
+    if not raw_inputs:
+        return None
+    if isinstance(raw_inputs, str):
+        raw_inputs = [raw_inputs]
+    recent = [f'"{_truncate(text, max_chars)}"' for text in raw_inputs[-limit:]] if limit > 0 else []
+    omitted = len(raw_inputs) - len(recent)
+    if omitted > 0:
+        recent.insert(0, f"(이전 {omitted}건 생략)")
+    return " / ".join(recent)
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == "null"
+
+
+def encode_question(question, fields):
+    """
+    문항 하나를 한 줄로 변환하는 함수 (값이 없는 필드는 생략)
+
+    Example:
+        - Q2: 거의 매일 우울하거나 절망감을 느낀다 (status: asking, experience: yes, rawUserInput: "요즘 계속 우울해요")
+    """
+    values = []
+    for field in FIELD_ORDER:
+        if field not in fields:
+            continue
+        value = question.get(field)
+        if field == "rawUserInput":
+            value = summarize_raw_inputs(value)
+        if _is_empty(value):
+            continue
+        values.append(f"{field}: {value}")
+
+    row = f"- {question.get('questionId')}"
+    if "questionText" in fields:
+        row += f": {question.get('questionText', '')}"
+    if values:
+        row += f" ({', '.join(values)})"
+    return row
+
+
+def encode_status(status, fields, include_header=True, question_filter=None):
+    """
+    문진 상태를 단계별로 필요한 필드만 포함한 압축 텍스트로 변환하는 함수
+
+    Args:
+        status (dict): 문진 상태 (is_completed, last_answered_question, last_asked_question, questions)
+        fields (tuple): 해당 단계에서 필요한 문항 필드 (questionText, status, experience, rawUserInput 등)
+        include_header (bool): 완료 여부와 마지막 질문/답변 문항을 첫 줄에 포함할지 여부
+        question_filter (callable): 포함할 문항을 고르는 함수 (기본값: 전체 문항)
+
+    Returns:
+        str: 헤더 한 줄과 문항별 한 줄로 구성된 텍스트 (STATUS_ENCODING=raw이면 기존 dict 문자열)
+    """
+    if not status:
+        return str(status)
+    if STATUS_ENCODING == "raw":
+        return str(status)
+
+    lines = []
+    if include_header:
+        lines.append(
+            f"is_completed: {str(bool(status.get('is_completed'))).lower()}, "
+            f"last_asked_question: {status.get('last_asked_question')}, "
+            f"last_answered_question: {status.get('last_answered_question')}"
+        )
+    for question in status.get("questions", []):
+        if question_filter and not question_filter(question):
+            continue
+        lines.append(encode_question(question, fields))
+    return "\n".join(lines)
@@ -0,0 +1,155 @@
+# summary_jobs.py - Summary 레포트 백그라운드 생성 작업 큐 (제한된 워커 수, 세션별 작업 상태 조회)
+import asyncio
+import os
+import time
+import uuid
+
+from logger_config import ai_logger, log_error
+from metrics import increment_counter, observe_histogram
+
+SUMMARY_WORKERS = int(os.environ.get("SUMMARY_WORKERS", "2"))
+SUMMARY_QUEUE_SIZE = int(os.environ.get("SUMMARY_QUEUE_SIZE", "100"))
+# 완료된 작업 결과를 보관하는 시간 (초)
+SUMMARY_JOB_TTL = int(os.environ.get("SUMMARY_JOB_TTL", "1800"))
+
+
+class SummaryQueueFull(Exception):
+    """대기 중인 작업이 SUMMARY_QUEUE_SIZE를 넘어 새 작업을 받을 수 없는 경우"""
+
+
+class SummaryJob:
+    """세션 하나의 레포트 생성 작업 (상태: queued → running → completed 또는 failed)"""
+
+    def __init__(self, user_id, session_id, job_factory, reason):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.session_id = session_id
+        self.reason = reason
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._job_factory = job_factory
+        self._done = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "reason": self.reason,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class SummaryJobQueue:
+    """
+    레포트 생성 작업을 제한된 수의 워커로 처리하는 큐
+
+    - 같은 세션의 작업이 대기/실행 중이면 새로 만들지 않고 기존 작업을 반환합니다.
+    - 작업 함수(job_factory)는 (응답 데이터, HTTP 상태 코드)를 반환하는 코루틴 함수입니다.
+    """
+
+    def __init__(self, workers=SUMMARY_WORKERS, max_queued=SUMMARY_QUEUE_SIZE, ttl=SUMMARY_JOB_TTL):
+        self.workers = workers
+        self.ttl = ttl
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._worker_tasks = []
+
+    def _ensure_workers(self):
+        if not self._worker_tasks:
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _prune(self):
+        now = time.time()
+        expired = [key for key, job in self._jobs.items() if job.finished and now - job.finished_at > self.ttl]
+        for key in expired:
+            del self._jobs[key]
+
+    def get(self, user_id, session_id):
+        """세션의 가장 최근 작업을 반환 (없으면 None)"""
+        self._prune()
+        return self._jobs.get((user_id, session_id))
+
+    def submit(self, user_id, session_id, job_factory, reason="on_demand", force=False):
+        """
+        작업을 큐에 추가하는 함수
+
+        Args:
+            user_id, session_id: 세션 식별자
+            job_factory: 작업 실행 시 호출할 코루틴 함수 (인자 없음, (응답 데이터, 상태 코드) 반환)
+            reason (str): 작업 생성 사유 (session_finished, on_demand)
+            force (bool): 완료된 작업이 있어도 새로 생성할지 여부
+
+        Returns:
+            SummaryJob: 새로 만든 작업 또는 대기/실행 중인(force=False이면 완료된) 기존 작업
+
+        Raises:
+            SummaryQueueFull: 대기 중인 작업 수가 최대치에 도달한 경우
+        """
+        existing = self.get(user_id, session_id)
+        if existing and (not existing.finished or (not force and existing.status == "completed")):
+            return existing
+
+        job = SummaryJob(user_id, session_id, job_factory, reason)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            increment_counter("summary_jobs_total", outcome="rejected", reason=reason)
+            raise SummaryQueueFull(f"Summary 작업 대기열이 가득 찼습니다 ({self._queue.maxsize}개)")
+
+        self._jobs[(user_id, session_id)] = job
+        self._ensure_workers()
+        increment_counter("summary_jobs_total", outcome="queued", reason=reason)
+        ai_logger.info(f"🗂️ Summary 작업 등록 ({reason}) - User: {user_id}, Session: {session_id}, 대기 {self._queue.qsize()}개")
+        return job
+
+    async def wait(self, job, timeout):
+        """작업이 끝날 때까지 최대 timeout초 기다린 뒤 작업을 반환 (시간 초과 시에도 그대로 반환)"""
+        try:
+            await asyncio.wait_for(asyncio.shield(job._done.wait()), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            observe_histogram("summary_job_wait_seconds", job.started_at - job.created_at)
+            try:
+                job.result = await job._job_factory()
+                body, status_code = job.result
+                job.status = "completed" if status_code == 200 else "failed"
+                if job.status == "failed":
+                    job.error = body.get("details") or body.get("error")
+            except Exception as e:
+                log_error(f"Summary 작업 실패 - User: {job.user_id}, Session: {job.session_id}", e)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job._done.set()
+                self._queue.task_done()
+                increment_counter("summary_jobs_total", outcome=job.status, reason=job.reason)
+                observe_histogram("summary_job_duration_seconds", job.finished_at - job.started_at)
+                ai_logger.info(f"🗂️ Summary 작업 종료 ({job.status}) - User: {job.user_id}, Session: {job.session_id}")
+
+    async def stop(self):
+        """워커를 모두 종료 (서버 종료 시 호출, 대기 중인 작업은 버림)"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
@@ -0,0 +1,7 @@
+# conftest.py - ai-service 테스트 공통 설정 (모듈을 직접 불러올 수 있도록 경로 추가, 실제 API 호출 없이 실행)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["LOG_ASYNC"] = "false"
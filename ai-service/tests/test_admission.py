@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+from loadgen import initial_status
+
+
+def rejection(controller, session_key):
+    with pytest.raises(AdmissionRejected) as info:
+        asyncio.run(controller.acquire(session_key))
+    return info.value
+
+
+def exhausted_controller(**options):
+    # 100초에 토큰 1개, 처음 토큰 1개는 바로 사용
+    controller = AdmissionController(rpm=0.6, calls_per_turn=1, burst=1, **options)
+    asyncio.run(controller.acquire(("other", "busy")))
+    return controller
+
+
+def test_same_session_is_rejected_until_released():
+    controller = AdmissionController(session_ttl=120)
+    asyncio.run(controller.acquire(("user", "s1")))
+    rejected = rejection(controller, ("user", "s1"))
+    assert (rejected.reason, rejected.status_code, rejected.retry_after) == ("session_busy", 409, None)
+
+    # 다른 세션은 영향 없음, 해제 후에는 같은 세션도 수락
+    asyncio.run(controller.acquire(("user", "s2")))
+    controller.release(("user", "s1"))
+    asyncio.run(controller.acquire(("user", "s1")))
+
+
+def test_stale_session_mark_expires_after_ttl():
+    controller = AdmissionController(session_ttl=120)
+    asyncio.run(controller.acquire(("user", "s1")))
+    controller.active_sessions[("user", "s1")] -= 121
+    asyncio.run(controller.acquire(("user", "s1")))
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = exhausted_controller(queue_size=0)
+    rejected = rejection(controller, ("user", "s1"))
+    assert (rejected.reason, rejected.status_code) == ("queue_full", 503)
+    assert 99 < rejected.retry_after <= 100
+    # 거절된 턴은 세션 제한을 남기지 않음
+    assert ("user", "s1") not in controller.active_sessions
+
+
+def test_wait_longer_than_max_wait_is_rejected():
+    controller = exhausted_controller(queue_size=10, max_wait=0.1)
+    rejected = rejection(controller, ("user", "s1"))
+    assert (rejected.reason, rejected.status_code) == ("wait_timeout", 503)
+    assert rejected.retry_after > 0 and controller.waiting == 0
+
+
+def test_queued_turn_is_admitted_when_token_refills():
+    # 초당 토큰 20개: 토큰이 없어도 대기열에서 기다린 뒤 수락
+    controller = AdmissionController(rpm=1200, calls_per_turn=1, burst=1, queue_size=10, max_wait=1)
+
+    async def scenario():
+        await asyncio.gather(*(controller.acquire(("user", f"s{i}")) for i in range(3)))
+
+    asyncio.run(scenario())
+    assert len(controller.active_sessions) == 3
+
+
+@pytest.fixture
+def chat_app(monkeypatch):
+    import run_chatbot
+    from singleflight import SingleFlight
+    monkeypatch.setattr(run_chatbot, "chat_flight", SingleFlight(enabled=False))
+    return run_chatbot
+
+
+def post_chat(chat_app, session_id):
+    payload = {
+        "message": "잠을 잘 못 자요", "user_id": "admission_user", "session_id": session_id, "timestamp": 1,
+        "history": "", "last_bot_message": "잠은 잘 주무세요?", "status": initial_status(), "messageCount": 3,
+        "selectedPolicies": [], "tonePreference": "미선택", "conversationStyle": "미선택"
+    }
+
+    async def scenario():
+        response = await chat_app.app.test_client().post("/api/chat", json=payload)
+        return response.status_code, response.headers.get("Retry-After"), await response.get_json()
+
+    return asyncio.run(scenario())
+
+
+def test_chat_returns_409_for_busy_session(chat_app, monkeypatch):
+    controller = AdmissionController(session_ttl=120)
+    monkeypatch.setattr(chat_app, "admission", controller)
+    asyncio.run(controller.acquire(("admission_user", "busy")))
+    status_code, retry_after, body = post_chat(chat_app, "busy")
+    assert (status_code, retry_after, body["reason"]) == (409, None, "session_busy")
+
+
+def test_chat_returns_503_with_retry_after_when_queue_is_full(chat_app, monkeypatch):
+    monkeypatch.setattr(chat_app, "admission", exhausted_controller(queue_size=0))
+    status_code, retry_after, body = post_chat(chat_app, "full")
+    assert (status_code, retry_after, body["reason"]) == (503, "100", "queue_full")
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import httpx
+
+import api_server_client
+from api_server_client import fetch_summary_inputs
+
+
+def test_summary_inputs_are_fetched_concurrently(monkeypatch):
+    requested = []
+
+    async def handler(request):
+        requested.append(request.url.path)
+        await asyncio.sleep(0.2)
+        if request.url.path.startswith("/api/history"):
+            return httpx.Response(200, json={"messages": []})
+        if request.url.path.startswith("/api/session"):
+            return httpx.Response(404, json={"error": "not found"})
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def scenario():
+        monkeypatch.setattr(api_server_client, "_client", httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://api-server"
+        ))
+        started = time.perf_counter()
+        inputs = await fetch_summary_inputs("u1", "s1")
+        elapsed = time.perf_counter() - started
+        await api_server_client.close_api_server_client()
+        return inputs, elapsed
+
+    inputs, elapsed = asyncio.run(scenario())
+    assert inputs == {"history": (200, {"messages": []}), "session": (404, None), "state": (None, None)}
+    assert sorted(requested) == ["/api/history/u1/s1", "/api/session/u1/s1", "/api/state/u1/s1"]
+    # 세 요청을 순서대로 보냈다면 0.6초 이상
+    assert elapsed < 0.5
@@ -0,0 +1,96 @@
+import pytest
+
+from dialogue_state import DialogueState, apply_updates, next_status
+
+
+def question(question_id="Q1", **fields):
+    return {"questionId": question_id, "questionText": f"문항 {question_id}", **fields}
+
+
+def conflict_status():
+    return {"questions": [question(experience="yes", status="conflict", frequency="매일", conflict="매일 → 전혀 없음")]}
+
+
+def test_note_only_delta_keeps_conflict():
+    slots, _, _ = apply_updates(conflict_status(), [{"questionId": "Q1", "note": "잘 모르겠음"}], "음 글쎄요")
+    assert slots[0]["status"] == "conflict"
+    assert slots[0]["conflict"] == "매일 → 전혀 없음"
+
+
+def test_corrected_experience_resolves_conflict():
+    slots, _, _ = apply_updates(conflict_status(), [{"questionId": "Q1", "experience": "no"}], "사실 그런 적 없어요")
+    assert slots[0]["status"] == "checking"
+    assert slots[0]["experience"] == "no"
+    assert slots[0]["conflict"] == "매일 → 전혀 없음 → 정정: 사실 그런 적 없어요"
+
+
+@pytest.mark.parametrize("current, experience, has_detail, new_conflict, reported, expected", [
+    ("unanswered", "unknown", False, False, None, "checking"),
+    ("unanswered", "no", False, False, "no", "answered"),
+    ("unanswered", "yes", False, False, "yes", "asking"),
+    ("asking", "yes", True, False, None, "answered"),
+    ("answered", "yes", True, True, "no", "conflict"),
+    ("checking", "unknown", False, True, None, "conflict"),
+    ("conflict", "yes", True, False, None, "conflict"),
+    ("conflict", "yes", True, False, "unknown", "conflict"),
+    ("conflict", "yes", True, False, "no", "checking"),
+    ("conflict", "no", False, True, "yes", "checking"),
+])
+def test_next_status(current, experience, has_detail, new_conflict, reported, expected):
+    assert next_status(current, experience, has_detail, new_conflict, reported) == expected
+
+
+@pytest.mark.parametrize("before, delta, expected", [
+    ({}, {"experience": "yes"}, {"experience": "yes", "status": "asking"}),
+    ({}, {"experience": "yes", "frequency": "주 3-4회"}, {"experience": "yes", "status": "answered", "frequency": "주 3-4회"}),
+    ({}, {"experience": "no"}, {"experience": "no", "status": "answered"}),
+    ({}, {"note": "애매함"}, {"experience": "unknown", "status": "checking", "note": "애매함"}),
+    # unknown은 이미 수집된 yes/no를 덮어쓰지 않음
+    ({"experience": "yes", "status": "asking"}, {"experience": "unknown"}, {"experience": "yes", "status": "asking"}),
+    ({"experience": "yes", "status": "asking"}, {"condition": "회사에서"}, {"status": "answered", "condition": "회사에서"}),
+    ({"experience": "yes", "status": "answered"}, {"experience": "no", "conflict": "매일 → 없음"},
+     {"experience": "no", "status": "conflict", "conflict": "매일 → 없음"}),
+])
+def test_apply_delta(before, delta, expected):
+    state = DialogueState({"questions": [question(**before)]})
+    result = state.apply_delta({"questionId": "Q1", **delta}, "사용자 발화").to_dict()
+    assert {key: result[key] for key in expected} == expected
+    assert result["updated"] is True
+
+
+def test_apply_delta_ignores_unknown_question():
+    state = DialogueState({"questions": [question()]})
+    assert state.apply_delta({"questionId": "Q99", "experience": "yes"}, "네") is None
+    assert state.questions["Q1"].to_dict()["updated"] is False
+
+
+def test_raw_user_input_is_not_duplicated():
+    status = {"questions": [question(rawUserInput=["잠을 못 자요"])]}
+    deltas = [{"questionId": "Q1", "experience": "yes"}, {"questionId": "Q1", "frequency": "매일"}]
+    slots, _, _ = apply_updates(status, deltas, "잠을 못 자요")
+    assert slots[0]["rawUserInput"] == ["잠을 못 자요"]
+    slots, _, _ = apply_updates(status, deltas, "매일 그래요")
+    assert slots[0]["rawUserInput"] == ["잠을 못 자요", "매일 그래요"]
+
+
+def test_to_status_keeps_header_order_and_extra_fields():
+    status = {
+        "is_completed": False,
+        "last_asked_question": "Q2",
+        "questions": [question("Q1", custom="보존"), question("Q2"), {"questionText": "ID 없음"}]
+    }
+    slots, updated, last_answered = apply_updates(status, [{"questionId": "Q2", "experience": "no"}], "아니요")
+    assert last_answered == "Q2"
+    assert updated["is_completed"] is False and updated["last_asked_question"] == "Q2"
+    assert updated["last_answered_question"] == "Q2"
+    assert [q["questionId"] for q in updated["questions"]] == ["Q1", "Q2"]
+    assert updated["questions"][0]["custom"] == "보존"
+    assert [q["questionId"] for q in slots] == ["Q2"]
+    # 입력 상태는 변경하지 않음
+    assert "status" not in status["questions"][1]
+
+
+def test_apply_updates_skips_invalid_deltas():
+    slots, updated, last_answered = apply_updates({"questions": [question()]}, ["Q1", None, {"questionId": "Q5"}], "네")
+    assert slots == [] and last_answered is None
+    assert updated["questions"][0]["status"] == "unanswered"
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+import DST
+import llm_client
+from llm_client import CircuitBreaker
+from loadgen import initial_status
+from metrics import get_counter
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient, MockResponder
+
+
+class DSTResponder(MockResponder):
+    """DST 호출만 실패시키는 응답기"""
+
+    def __init__(self, fail):
+        super().__init__()
+        self.fail = fail
+        self.dst_calls = 0
+
+    def respond(self, kwargs):
+        stage, text = super().respond(kwargs)
+        if stage == "dst":
+            self.dst_calls += 1
+            if self.fail:
+                raise RuntimeError("provider error")
+        return stage, text
+
+
+@pytest.fixture(autouse=True)
+def targeted(monkeypatch):
+    monkeypatch.setattr(DST, "DST_TARGETED", True)
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 1)
+    monkeypatch.setattr(llm_client, "breaker", CircuitBreaker())
+
+
+def run_dst(fail):
+    responder = DSTResponder(fail)
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    status = {**initial_status(), "last_asked_question": "Q1"}
+    result = asyncio.run(DST.update_dialogue_state("잠은 잘 주무세요?", status, "그냥 그래요", "answer_symptom",
+                                                   MockOpenAIClient(responder, latency)))
+    return responder.dst_calls, result
+
+
+def test_empty_targeted_result_falls_back_to_full_scan():
+    before = get_counter("dst_targeted_total", outcome="fallback")
+    calls, (slots, _, _) = run_dst(fail=False)
+    assert calls == 2 and slots == []
+    assert get_counter("dst_targeted_total", outcome="fallback") == before + 1
+
+
+def test_failed_targeted_analysis_does_not_retry_full_scan():
+    before = get_counter("dst_targeted_total", outcome="error")
+    calls, (slots, updated_status, _) = run_dst(fail=True)
+    assert calls == 1 and slots == []
+    assert updated_status["questions"][0]["status"] == "unanswered"
+    assert get_counter("dst_targeted_total", outcome="error") == before + 1
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import NLU
+from intent_classifier import IntentClassifier, extract_training_pairs, normalize_intent_label, split_by_session
+from mock_openai import MockOpenAIClient
+
+TRAINING_MESSAGES = {
+    "greeting": ["안녕하세요", "반가워요", "안녕", "처음 뵙겠습니다"],
+    "answer_symptom": ["요즘 잠을 잘 못 자요", "계속 우울해요", "밥맛이 없어요", "자꾸 불안해요"],
+    "answer_frequency": ["거의 매일이요", "일주일에 두세 번", "매일 그래요", "한 달에 한 번 정도"],
+}
+
+
+def training_pairs():
+    return [
+        {"message": message, "previous_policy": "start", "intent": intent, "session_id": f"{intent}-{i}"}
+        for intent, messages in TRAINING_MESSAGES.items() for i, message in enumerate(messages)
+    ]
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("greeting", "greeting"),
+    (" answer_tone ", "answer_tone"),
+    ("other: 날씨 이야기", "other"),
+    ("Other", "other"),
+    ("dance", None),
+    (None, None),
+])
+def test_normalize_intent_label(label, expected):
+    assert normalize_intent_label(label) == expected
+
+
+def test_extract_training_pairs_skips_unusable_turns():
+    turns = [
+        {"message": "안녕하세요", "intent": {"intent": "greeting"}, "selected_policies": [], "session_id": "s1"},
+        {"message": "잠을 못 자요", "intent": {"intent": "answer_symptom"}, "selected_policies": ["self_introduction", "ask_new_symptom"], "session_id": "s1"},
+        {"message": "NO_RESPONSE", "intent": {"intent": "other"}, "session_id": "s1"},
+        {"message": "뭐라고요", "intent": {"intent": "unknown_label"}, "session_id": "s1"},
+        {"message": "거의 매일", "intent": None, "session_id": "s1"},
+    ]
+    assert [(pair["message"], pair["previous_policy"], pair["intent"]) for pair in extract_training_pairs(turns)] == [
+        ("안녕하세요", "start", "greeting"),
+        ("잠을 못 자요", "ask_new_symptom", "answer_symptom"),
+    ]
+
+
+def test_trained_classifier_predicts_training_intents_and_round_trips(tmp_path):
+    model = IntentClassifier.train(training_pairs())
+    report = model.evaluate(training_pairs(), threshold=0.0)
+    assert report["accuracy"] == 1.0 and report["coverage"] == 1.0
+
+    path = tmp_path / "intent_model.json"
+    model.save(path)
+    loaded = IntentClassifier.load(path)
+    assert loaded.predict("요즘 잠을 잘 못 자요", "start") == model.predict("요즘 잠을 잘 못 자요", "start")
+    assert sum(loaded.predict_proba("안녕하세요", "start").values()) == pytest.approx(1.0)
+
+
+def test_split_by_session_keeps_sessions_together():
+    pairs = training_pairs() + [{**pair, "session_id": "shared"} for pair in training_pairs()[:3]]
+    train, holdout = split_by_session(pairs, holdout_ratio=0.3)
+    assert len(train) + len(holdout) == len(pairs)
+    assert not {pair["session_id"] for pair in train} & {pair["session_id"] for pair in holdout}
+
+
+@pytest.mark.parametrize("threshold, expected_calls", [(0.0, 0), (1.01, 1)])
+def test_local_backend_falls_back_to_gpt_below_threshold(monkeypatch, threshold, expected_calls):
+    monkeypatch.setattr(NLU, "NLU_BACKEND", "local")
+    monkeypatch.setattr(NLU, "NLU_RULES_ENABLED", False)
+    monkeypatch.setattr(NLU, "NLU_LOCAL_THRESHOLD", threshold)
+    monkeypatch.setattr(NLU, "_intent_classifier", IntentClassifier.train(training_pairs()))
+    monkeypatch.setattr(NLU, "_intent_classifier_loaded", True)
+    client = MockOpenAIClient()
+    result = asyncio.run(NLU.analyze_intent("계속 우울해요", "", client, "start"))
+    assert client.calls == expected_calls
+    if expected_calls == 0:
+        assert result == {"intent": "answer_symptom"}
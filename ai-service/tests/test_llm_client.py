@@ -0,0 +1,118 @@
+import asyncio
+import types
+from contextlib import aclosing
+
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, LLMUnavailable, call_llm, stream_llm
+from mock_openai import LatencyModel, MockOpenAIClient, build_chunk
+
+
+def slow_client(seconds):
+    return MockOpenAIClient(latency=LatencyModel({"nlu": seconds}, sigma=0, tokens_per_second=0))
+
+
+def open_breaker(monkeypatch):
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    monkeypatch.setattr(llm_client, "breaker", breaker)
+    return breaker
+
+
+def nlu_call(client):
+    return call_llm(client, "nlu", "intent_analysis", model="gpt-4o-mini", messages=[{"role": "user", "content": "안녕"}])
+
+
+def test_cancelled_half_open_probe_releases_breaker(monkeypatch):
+    breaker = open_breaker(monkeypatch)
+
+    async def scenario():
+        probe = asyncio.create_task(nlu_call(slow_client(5)))
+        await asyncio.sleep(0.05)
+        assert breaker.state == "half_open" and breaker.probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.state == "half_open" and not breaker.probing
+
+        # 다음 호출이 시험 호출로 수락되고, 성공하면 서킷이 닫힘
+        await nlu_call(slow_client(0))
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_half_open_allows_single_probe(monkeypatch):
+    breaker = open_breaker(monkeypatch)
+    assert breaker.before_call("nlu") is True
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call("nlu")
+    breaker.release_probe(False)
+    assert breaker.probing
+    breaker.release_probe(True)
+    assert breaker.before_call("nlu") is True
+
+
+class ScriptedStreamClient:
+    """호출마다 attempts의 항목대로 스트림을 여는 클라이언트 (예외면 열기 실패, 목록이면 조각을 차례로 반환하고 예외 항목은 발생)"""
+
+    def __init__(self, *attempts):
+        self.attempts = list(attempts)
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        attempt = self.attempts[self.calls]
+        self.calls += 1
+        if isinstance(attempt, Exception):
+            raise attempt
+        return self._stream(attempt)
+
+    async def _stream(self, pieces):
+        for piece in pieces:
+            if isinstance(piece, Exception):
+                raise piece
+            yield build_chunk("gpt", piece)
+
+
+async def collect_stream(client):
+    parts = []
+    async with aclosing(stream_llm(client, "nlg", "response_generation", model="gpt")) as stream:
+        async for delta in stream:
+            parts.append(delta)
+    return parts
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda retry: 0)
+    monkeypatch.setattr(llm_client, "breaker", CircuitBreaker())
+
+
+def test_stream_retries_failure_before_first_chunk(fast_retries):
+    client = ScriptedStreamClient(RuntimeError("connect"), ["안녕", "하세요"])
+    assert asyncio.run(collect_stream(client)) == ["안녕", "하세요"]
+    assert client.calls == 2
+    assert llm_client.breaker.failures == 0
+
+
+def test_stream_failure_after_first_chunk_is_not_retried(fast_retries):
+    client = ScriptedStreamClient(["안녕", RuntimeError("reset")], ["다시"])
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect_stream(client))
+    assert client.calls == 1
+    assert llm_client.breaker.failures == 1
+
+
+def test_closed_stream_releases_half_open_probe(monkeypatch):
+    breaker = open_breaker(monkeypatch)
+
+    async def scenario():
+        async with aclosing(stream_llm(ScriptedStreamClient(["안녕", "하세요"]), "nlg", "response_generation", model="gpt")) as stream:
+            assert await stream.__anext__() == "안녕"
+            assert breaker.probing
+        # 소비자가 스트림을 닫으면 성공/실패 없이 시험 호출만 해제
+        assert breaker.state == "half_open" and not breaker.probing
+
+    asyncio.run(scenario())
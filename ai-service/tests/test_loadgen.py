@@ -0,0 +1,27 @@
+from loadgen import WINDOW_SIZE, Session, initial_status
+
+
+def test_session_accumulates_history_policies_and_status():
+    session = Session(0, ["잠을 잘 못 자요"], initial_status())
+    session.apply("잠을 잘 못 자요", {
+        "response": "얼마나 자주 그러세요?", "first_policy": "empathize", "second_policy": "ask_frequency",
+        "updated_slots": [{"questionId": "Q3", "experience": "yes", "status": "checking"}],
+        "last_asked_question": "Q3", "last_answered_question": "Q3"
+    })
+    payload = session.payload("거의 매일이요")
+    assert payload["history"].endswith("User: 잠을 잘 못 자요\nBot: 얼마나 자주 그러세요?")
+    assert payload["last_bot_message"] == "얼마나 자주 그러세요?"
+    assert payload["selectedPolicies"] == ["empathize", "ask_frequency"]
+    assert payload["messageCount"] == 3
+    question = payload["status"]["questions"][2]
+    assert (question["experience"], question["status"], question["questionText"]) == ("yes", "checking", "문항 3")
+    assert payload["status"]["last_asked_question"] == "Q3"
+
+
+def test_history_keeps_api_server_window():
+    session = Session(0, ["네"], initial_status())
+    for index in range(WINDOW_SIZE * 2):
+        session.apply(f"답변 {index}", {"response": f"질문 {index}"})
+    lines = session.payload("네")["history"].split("\n")
+    assert len(lines) == WINDOW_SIZE * 2
+    assert lines[-1] == f"Bot: 질문 {WINDOW_SIZE * 2 - 1}"
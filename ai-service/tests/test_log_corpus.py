@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+import pytest
+
+from loadgen import initial_status
+from log_corpus import parse_turns, read_log_records
+from logger_config import ai_logger
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient, MockResponder
+from replay import dst_updates_from_log
+
+MESSAGE = "일주일에 서너 번 정도 잠을 못 자요"
+UPDATES = [{"questionId": "Q3", "experience": "yes", "frequency": "주 3-4회", "condition": None, "note": None, "conflict": None}]
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """현재 로거 포맷으로 임시 파일에도 기록"""
+    path = tmp_path / "ai-service.log"
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(next(h.formatter for h in ai_logger.handlers if h.formatter))
+    ai_logger.addHandler(handler)
+    yield path
+    ai_logger.removeHandler(handler)
+    handler.close()
+
+
+def test_chat_log_round_trip(log_path, monkeypatch):
+    monkeypatch.setenv("SUMMARY_PRECOMPUTE", "false")
+    import run_chatbot
+    medians = {stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}
+    responder = MockResponder([{"message": MESSAGE, "recorded": {"dst_updates": UPDATES}}])
+    monkeypatch.setattr(run_chatbot, "client", MockOpenAIClient(responder, LatencyModel(medians, sigma=0, tokens_per_second=0)))
+
+    payload = {
+        "message": MESSAGE, "user_id": "log_user", "session_id": "log_session", "timestamp": 1,
+        "history": "Bot: 잠은 잘 주무세요?", "last_bot_message": "잠은 잘 주무세요?", "status": initial_status(),
+        "messageCount": 3, "selectedPolicies": ["ask_new_symptom"], "tonePreference": "미선택", "conversationStyle": "미선택"
+    }
+
+    async def post():
+        return await run_chatbot.app.test_client().post("/api/chat", json=payload)
+
+    assert asyncio.run(post()).status_code == 200
+
+    turns = list(parse_turns(read_log_records(log_path)))
+    assert len(turns) == 1
+    turn = turns[0]
+    assert (turn["user_id"], turn["session_id"], turn["message"], turn["message_count"]) == ("log_user", "log_session", MESSAGE, 3)
+    assert dst_updates_from_log(turn["dst_raw"]) == UPDATES
+    assert turn["intent"] == {"intent": "answer_symptom"}
+    assert turn["policy"] is not None and turn["response"]
@@ -0,0 +1,45 @@
+import logging
+import queue
+
+from logger_config import BlockingStopQueueListener, DroppingQueueHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def queue_logger(name, log_queue):
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = DroppingQueueHandler(log_queue)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_full_queue_drops_records_without_blocking():
+    logger, handler = queue_logger("test_dropping_queue", queue.Queue(maxsize=2))
+    for index in range(5):
+        logger.info(f"메시지 {index}")
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_listener_writes_queued_records_in_background_and_flushes_on_stop():
+    log_queue = queue.Queue(maxsize=3)
+    logger, handler = queue_logger("test_listener_queue", log_queue)
+    collected = CollectingHandler()
+    # 큐가 가득 찬 상태에서 종료해도 종료 신호를 넣을 자리를 기다렸다가 남은 레코드를 모두 출력
+    for index in range(3):
+        logger.info(f"메시지 {index}")
+    listener = BlockingStopQueueListener(log_queue, collected, respect_handler_level=True)
+    listener.start()
+    listener.stop()
+    assert collected.messages == ["메시지 0", "메시지 1", "메시지 2"]
+    assert handler.dropped == 0
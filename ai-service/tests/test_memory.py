@@ -0,0 +1,50 @@
+import asyncio
+
+import memory
+from memory import ConversationMemory, SessionMemory, parse_history
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient
+
+
+def history(count, start=0):
+    return "\n".join(f"{'Bot' if i % 2 == 0 else 'User'}: 메시지 {i}" for i in range(start, start + count))
+
+
+def test_parse_history_keeps_multiline_messages():
+    assert parse_history("Bot: 안녕하세요\n반가워요\nUser: 네 안녕하세요") == ["Bot: 안녕하세요\n반가워요", "User: 네 안녕하세요"]
+    assert parse_history("") == []
+
+
+def test_merge_appends_only_new_messages_from_sliding_window():
+    session = SessionMemory()
+    session.merge(parse_history(history(6)))
+    session.merge(parse_history(history(4, start=4)))
+    assert session.transcript == parse_history(history(8))
+
+
+def test_merge_restarts_when_history_does_not_overlap():
+    session = SessionMemory()
+    session.merge(parse_history(history(6)))
+    session.summary, session.summarized_count = "요약", 2
+    session.merge(["Bot: 새 대화"])
+    assert (session.transcript, session.summary, session.summarized_count) == (["Bot: 새 대화"], "", 0)
+
+
+def test_build_context_summarizes_older_messages(monkeypatch):
+    monkeypatch.setattr(memory, "MEMORY_RAW_MESSAGES", 4)
+    monkeypatch.setattr(memory, "MEMORY_SUMMARY_BATCH", 4)
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    client = MockOpenAIClient(latency=latency)
+    conversation_memory = ConversationMemory()
+
+    async def scenario():
+        # 요약이 없으면 전달받은 히스토리를 그대로 사용하고, 요약할 메시지가 쌓이면 백그라운드로 요약
+        first = conversation_memory.build_context("user", "s1", history(10), client)
+        await asyncio.gather(*conversation_memory._tasks)
+        second = conversation_memory.build_context("user", "s1", history(10), client)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == history(10)
+    assert client.calls == 1
+    assert second.startswith("[이전 대화 요약]\n")
+    assert second.endswith("[최근 대화]\n" + history(4, start=6))
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import NLU
+from mock_openai import MockOpenAIClient
+from NLU import CONVERSATION_STYLE_OPTIONS, TONE_OPTIONS, classify_intent_by_rules, match_option
+
+
+@pytest.mark.parametrize("user_message, previous_policy, expected", [
+    ("정중하지만 다정한 말투", "ask_tone_preference", {"intent": "answer_tone"}),
+    (" 친구처럼 대화하는 말투!! ", None, {"intent": "answer_tone"}),
+    ("간결하고 신속한 대화.", "ask_conversation_style", {"intent": "answer_conversation_style"}),
+    ("안녕하세요~", "self_introduction", {"intent": "greeting"}),
+    ("Hi!", "self_introduction", {"intent": "greeting"}),
+    # 인사말이라도 자기소개 직후가 아니면 GPT가 판단
+    ("안녕하세요", "ask_current_state", None),
+    ("다정한 말투가 좋아요", "ask_tone_preference", None),
+    ("잠을 잘 못 자요", "ask_question", None),
+])
+def test_classify_intent_by_rules(user_message, previous_policy, expected):
+    assert classify_intent_by_rules(user_message, previous_policy) == expected
+
+
+@pytest.mark.parametrize("user_message, options, expected", [
+    ("  정중하지만   다정한 말투.  ", TONE_OPTIONS, "정중하지만 다정한 말투"),
+    ("이성적이고 전문적인 말투ㅎㅎ", TONE_OPTIONS, "이성적이고 전문적인 말투"),
+    ("심층적이고구체적인대화", CONVERSATION_STYLE_OPTIONS, "심층적이고 구체적인 대화"),
+    ("친구처럼", TONE_OPTIONS, None),
+])
+def test_match_option_returns_canonical_option(user_message, options, expected):
+    assert match_option(user_message, options) == expected
+
+
+def test_rule_hit_skips_gpt_call(monkeypatch):
+    monkeypatch.setattr(NLU, "NLU_RULES_ENABLED", True)
+    client = MockOpenAIClient()
+    result = asyncio.run(NLU.analyze_intent("친구처럼 대화하는 말투", "", client, "ask_tone_preference"))
+    assert result == {"intent": "answer_tone"}
+    assert client.calls == 0
+
+
+def test_tone_answer_is_normalized_to_canonical_option(monkeypatch):
+    import run_chatbot
+    from loadgen import initial_status
+    from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel
+
+    monkeypatch.setattr(NLU, "NLU_RULES_ENABLED", True)
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    monkeypatch.setattr(run_chatbot, "client", MockOpenAIClient(latency=latency))
+    data = {
+        "message": " 친구처럼  대화하는 말투!! ", "user_id": "tone_user", "session_id": "tone", "timestamp": 1,
+        "history": "", "last_bot_message": "어떤 말투가 편하세요?", "status": initial_status(), "messageCount": 3,
+        "selectedPolicies": ["ask_tone_preference"], "tonePreference": "미선택", "conversationStyle": "미선택"
+    }
+    turn = asyncio.run(run_chatbot.run_dialogue_turn(data))
+    assert turn["tone_preference"] == "친구처럼 대화하는 말투"
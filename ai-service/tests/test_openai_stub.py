@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient
+from openai_stub import StubConfig, create_stub_app
+
+REQUEST = {"model": "gpt-5-chat-latest", "messages": [{"role": "user", "content": "안녕하세요"}], "max_tokens": 50}
+
+
+def run_with_stub(config, scenario):
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    app = create_stub_app(MockOpenAIClient(latency=latency), config)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stub") as http:
+            client = openai.AsyncOpenAI(api_key="test", base_url="http://stub/v1", http_client=http, max_retries=0)
+            result = await scenario(client)
+            stats = (await http.get("/stats")).json()
+        return result, stats
+
+    return asyncio.run(run())
+
+
+def test_sdk_parses_completion_and_stream():
+    async def scenario(client):
+        completion = await client.chat.completions.create(**REQUEST)
+        stream = await client.chat.completions.create(**REQUEST, stream=True, stream_options={"include_usage": True})
+        chunks = [chunk async for chunk in stream]
+        return completion, chunks
+
+    (completion, chunks), stats = run_with_stub(StubConfig(), scenario)
+    assert completion.choices[0].message.content
+    assert completion.usage.completion_tokens > 0
+    streamed = "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices)
+    assert streamed == completion.choices[0].message.content
+    assert chunks[-1].usage.prompt_tokens == completion.usage.prompt_tokens
+    assert (stats["requests"], stats["ok"], stats["max_in_flight"]) == (2, 2, 1)
+
+
+@pytest.mark.parametrize("config, error, counter", [
+    (StubConfig(rpm=1), openai.RateLimitError, "rate_limited"),
+    (StubConfig(rate_limit_rate=1.0), openai.RateLimitError, "rate_limited"),
+    (StubConfig(error_rate=1.0), openai.InternalServerError, "errors"),
+])
+def test_injected_failures_surface_as_sdk_errors(config, error, counter):
+    async def scenario(client):
+        outcomes = []
+        for _ in range(2):
+            try:
+                await client.chat.completions.create(**REQUEST)
+                outcomes.append("ok")
+            except error:
+                outcomes.append("error")
+        return outcomes
+
+    outcomes, stats = run_with_stub(config, scenario)
+    assert outcomes[-1] == "error"
+    assert stats[counter] == outcomes.count("error")
@@ -0,0 +1,51 @@
+import asyncio
+
+import NLU
+import prompt_layout
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient, MockResponder
+from prompt_layout import build_messages, prompt_cache_key
+
+
+class RecordingResponder(MockResponder):
+    """요청 인자를 기록하는 응답기"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def respond(self, kwargs):
+        self.requests.append(kwargs)
+        return super().respond(kwargs)
+
+
+def test_build_messages_keeps_section_order_and_skips_none():
+    messages = build_messages("지시사항", [("대화 스타일", "간결"), ("히스토리", None), ("문진 상태", "Q1\nQ2"), ("현재 사용자 메시지", "안녕")])
+    assert messages == [
+        {"role": "system", "content": "지시사항"},
+        {"role": "user", "content": "대화 스타일: 간결\n문진 상태:\nQ1\nQ2\n현재 사용자 메시지: 안녕"},
+    ]
+
+
+def test_prompt_cache_key_can_be_disabled(monkeypatch):
+    assert prompt_cache_key("nlu") == "ai-service-nlu"
+    monkeypatch.setattr(prompt_layout, "PROMPT_CACHE_KEY_ENABLED", False)
+    assert prompt_cache_key("nlu") is None
+
+
+def test_stage_requests_share_static_system_prefix(monkeypatch):
+    monkeypatch.setattr(NLU, "NLU_RULES_ENABLED", False)
+    responder = RecordingResponder()
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    client = MockOpenAIClient(responder, latency)
+
+    async def scenario():
+        await NLU.analyze_intent("잠을 잘 못 자요", "Bot: 잠은 잘 주무세요?", client, "ask_new_symptom")
+        await NLU.analyze_intent("거의 매일이요", "Bot: 잠은 잘 주무세요?\nUser: 잠을 잘 못 자요", client, "ask_frequency")
+
+    asyncio.run(scenario())
+    assert {request["prompt_cache_key"] for request in responder.requests} == {"ai-service-nlu"}
+    first, second = (request["messages"] for request in responder.requests)
+    # 턴마다 바뀌는 입력은 user 메시지에만 있고, system 메시지는 바이트 단위로 같음
+    assert first[0] == second[0] == {"role": "system", "content": NLU.INTENT_ANALYSIS_PROMPT}
+    assert first[1]["content"].endswith("현재 사용자 메시지: 잠을 잘 못 자요")
+    assert second[1]["content"].startswith("이전 대화내역:\nBot: 잠은 잘 주무세요?\n")
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+import replay
+from loadgen import initial_status
+from metrics import get_counter, percentile, sum_counter
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient
+
+MESSAGES = ("요즘 좀 우울해요", "거의 매일 그래요", "잠을 잘 못 자요", "일주일에 서너 번 정도요")
+
+
+def corpus(sessions, turns_per_session):
+    """세션 턴이 서로 섞여 있는 재생용 코퍼스 (로그처럼 여러 세션이 번갈아 기록됨)"""
+    return [
+        {
+            "user_id": f"user_{session}",
+            "session_id": f"session_{session}",
+            "message": MESSAGES[turn % len(MESSAGES)],
+            "message_count": 1 + turn * 2,
+            "selected_policies": [],
+            "last_bot_message": "요즘 어떻게 지내세요?",
+            "tone_preference": "미선택",
+            "conversation_style": "미선택",
+            "history": "Bot: 요즘 어떻게 지내세요?",
+            "status": initial_status(),
+            "recorded": {"intent": None, "dst_updates": None, "policy": None, "response": None}
+        }
+        for turn in range(turns_per_session)
+        for session in range(sessions)
+    ]
+
+
+@pytest.fixture
+def chat_app(monkeypatch):
+    monkeypatch.setenv("SUMMARY_PRECOMPUTE", "false")
+    import run_chatbot
+    from admission import AdmissionController
+    monkeypatch.setattr(run_chatbot, "admission", AdmissionController(session_limit=True))
+    return run_chatbot
+
+
+def test_chat_replay_with_session_limit(chat_app, monkeypatch):
+    turns = corpus(sessions=3, turns_per_session=4)
+    order = {}
+    run_chat_turn = chat_app.run_chat_turn
+
+    async def recording_run_chat_turn(data):
+        order.setdefault(data["session_id"], []).append(data["messageCount"])
+        return await run_chat_turn(data)
+
+    monkeypatch.setattr(chat_app, "run_chat_turn", recording_run_chat_turn)
+    medians = {stage: 0.01 for stage in DEFAULT_LATENCY_MEDIANS}
+    client = MockOpenAIClient(latency=LatencyModel(medians, sigma=0, tokens_per_second=0))
+    busy_before = get_counter("admission_total", outcome="session_busy")
+
+    results = asyncio.run(replay.replay(turns, "chat", client, concurrency=8))
+
+    assert all(ok for _, ok in results)
+    assert get_counter("admission_total", outcome="session_busy") == busy_before
+    assert order == {f"session_{session}": [1, 3, 5, 7] for session in range(3)}
+
+
+def test_chat_replay_over_stub_http_transport(chat_app, monkeypatch):
+    import httpx
+    import openai
+    from openai_stub import create_stub_app
+    from singleflight import SingleFlight
+
+    # 앞선 재생 결과를 중복 요청으로 재사용하지 않도록 요청 병합을 끔
+    monkeypatch.setattr(chat_app, "chat_flight", SingleFlight(enabled=False))
+    turns = corpus(sessions=2, turns_per_session=2)
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    stub = create_stub_app(MockOpenAIClient(latency=latency))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stub), base_url="http://stub") as http:
+            client = openai.AsyncOpenAI(api_key="test", base_url="http://stub/v1", http_client=http, max_retries=0)
+            calls_before = sum_counter("llm_calls_total")
+            results = await replay.replay(turns, "chat", client, concurrency=2)
+            stats = (await http.get("/stats")).json()
+        return results, sum_counter("llm_calls_total") - calls_before, stats
+
+    results, llm_calls, stats = asyncio.run(scenario())
+    transport = {"mode": "http", "base_url": "http://stub/v1"}
+    report = replay.build_report("chat", results, llm_calls, 1.0, transport)
+    assert report["errors"] == 0 and report["transport"] == transport
+    assert llm_calls == stats["ok"] == stats["requests"] > 0
+
+
+def test_percentile_uses_nearest_rank():
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.0)) == (3.0, 5.0, 1.0)
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+import NLG
+from loadgen import initial_status
+from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient
+from response_cache import MemoryResponseCache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(NLG, "response_cache", MemoryResponseCache())
+    medians = {stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}
+    return MockOpenAIClient(latency=LatencyModel(medians, sigma=0, tokens_per_second=0))
+
+
+def generate(client, first_policy, user_message):
+    policy = {"first_policy": first_policy, "second_policy": None, "next_question": "Q2", "next_question_text": "문항 2"}
+    return asyncio.run(NLG.generate_response(policy, user_message, "Bot: 안녕하세요", initial_status(), client, "미선택"))
+
+
+@pytest.mark.parametrize("first_policy", ["ask_frequency", "ask_condition", "ask_new_symptom", "handle_crisis"])
+def test_user_dependent_policies_are_not_cached(client, first_policy):
+    generate(client, first_policy, "잠을 잘 못 자요")
+    generate(client, first_policy, "잠을 잘 못 자요")
+    assert client.calls == 2
+
+
+def test_template_policy_reply_is_shared_across_user_messages(client):
+    generate(client, "farewell_message", "고마워요")
+    generate(client, "farewell_message", "이제 그만할래요")
+    assert client.calls == 1
+
+
+def test_message_dependent_policy_is_keyed_on_user_message(client):
+    generate(client, "explain_limitations", "약 좀 추천해 주세요")
+    generate(client, "explain_limitations", "제가 우울증인가요?")
+    assert client.calls == 2
+
+    # 같은 (정규화된) 사용자 메시지면 캐시된 응답을 사용
+    generate(client, "explain_limitations", "  약 좀 추천해 주세요 ")
+    assert client.calls == 2
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from metrics import get_counter
+from schemas import INTENT_RESULT, PLAN_RESULT, POLICY_RESULT, SYMPTOM_UPDATES, SchemaValidationError
+
+POLICY = {"first_policy": "question", "second_policy": None, "next_question": "Q2", "is_completed": False, "is_finished": False}
+DELTA = {"questionId": "Q1", "experience": "yes", "frequency": None, "condition": None, "note": None, "conflict": None}
+
+
+@pytest.mark.parametrize("result, text", [
+    (INTENT_RESULT, ""),
+    (INTENT_RESULT, "의도: answer_symptom"),
+    (INTENT_RESULT, json.dumps({"intent": "dance"})),
+    (INTENT_RESULT, json.dumps({"intent": "greeting", "confidence": 0.9})),
+    (INTENT_RESULT, json.dumps({"intent": 3})),
+    (POLICY_RESULT, json.dumps({**POLICY, "first_policy": "sing_song"})),
+    (POLICY_RESULT, json.dumps({**POLICY, "next_question": "Q11"})),
+    (POLICY_RESULT, json.dumps({key: value for key, value in POLICY.items() if key != "is_finished"})),
+    (POLICY_RESULT, json.dumps({**POLICY, "is_completed": "false"})),
+    (PLAN_RESULT, json.dumps(POLICY)),
+    (SYMPTOM_UPDATES, json.dumps({"updates": [{**DELTA, "experience": "maybe"}]})),
+    (SYMPTOM_UPDATES, json.dumps({"updates": [{**DELTA, "questionId": "Q0"}]})),
+    (SYMPTOM_UPDATES, json.dumps({"updates": {"Q1": DELTA}})),
+    (SYMPTOM_UPDATES, json.dumps([DELTA])),
+])
+def test_parse_rejects_invalid_payloads(result, text):
+    before = get_counter("llm_parse_total", stage=result.stage, mode="structured", outcome="invalid")
+    with pytest.raises(SchemaValidationError):
+        result.parse(text)
+    assert get_counter("llm_parse_total", stage=result.stage, mode="structured", outcome="invalid") == before + 1
+
+
+@pytest.mark.parametrize("result, value", [
+    (INTENT_RESULT, {"intent": "answer_symptom"}),
+    (INTENT_RESULT, {"intent": "other: 챗봇에 대한 질문"}),
+    (POLICY_RESULT, POLICY),
+    (PLAN_RESULT, {"intent": "greeting", **POLICY}),
+    (SYMPTOM_UPDATES, {"updates": [DELTA]}),
+    (SYMPTOM_UPDATES, {"updates": []}),
+])
+def test_parse_accepts_valid_payloads(result, value):
+    assert result.parse(json.dumps(value, ensure_ascii=False)) == value
+
+
+def test_parse_strips_code_fence():
+    assert INTENT_RESULT.parse('```json\n{"intent": "greeting"}\n```') == {"intent": "greeting"}
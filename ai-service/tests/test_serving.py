@@ -0,0 +1,67 @@
+import asyncio
+
+
+def test_ready_reports_not_ready_while_draining(monkeypatch):
+    import run_chatbot
+    monkeypatch.setattr(run_chatbot, "serving_state", {"ready": True, "draining": False})
+
+    async def ready_status():
+        return (await run_chatbot.app.test_client().get("/ready")).status_code
+
+    assert asyncio.run(ready_status()) == 200
+    run_chatbot.mark_draining()
+    assert asyncio.run(ready_status()) == 503
+
+
+def test_stream_disconnect_before_body_releases_session(monkeypatch):
+    import json
+
+    import run_chatbot
+    from admission import AdmissionController
+    from loadgen import initial_status
+    from mock_openai import DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient
+
+    monkeypatch.setenv("SUMMARY_PRECOMPUTE", "false")
+    monkeypatch.setattr(run_chatbot, "admission", AdmissionController(session_ttl=120))
+    latency = LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+    monkeypatch.setattr(run_chatbot, "client", MockOpenAIClient(latency=latency))
+    body = json.dumps({
+        "message": "잠을 잘 못 자요", "user_id": "stream_user", "session_id": "stream_drop", "timestamp": 1,
+        "history": "", "last_bot_message": "잠은 잘 주무세요?", "status": initial_status(), "messageCount": 3,
+        "selectedPolicies": [], "tonePreference": "미선택", "conversationStyle": "미선택"
+    }).encode()
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": "/api/chat/stream",
+        "root_path": "", "query_string": b"", "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 5000),
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json")]
+    }
+
+    async def scenario():
+        headers_sent = asyncio.Event()
+        disconnected = asyncio.Event()
+        received = []
+
+        async def receive():
+            if not received:
+                received.append(True)
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            # 클라이언트가 본문을 읽지 않아 전송이 진행되지 않음
+            headers_sent.set()
+            await asyncio.Event().wait()
+
+        request_task = asyncio.create_task(run_chatbot.app(scope, receive, send))
+        await headers_sent.wait()
+        key = ("stream_user", "stream_drop")
+        assert key in run_chatbot.admission.active_sessions
+
+        # 본문을 보내기 전에 연결이 끊김
+        disconnected.set()
+        await request_task
+        await asyncio.sleep(0)
+        assert key not in run_chatbot.admission.active_sessions
+
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from loadgen import initial_status
+from mock_openai import CANNED_OUTPUTS, DEFAULT_LATENCY_MEDIANS, LatencyModel, MockOpenAIClient, MockResponder
+from NLG import RESPONSE_FAILURE_MESSAGE
+
+
+class FailingNLGResponder(MockResponder):
+    """처음 failures번의 NLG 호출은 프로바이더 오류로 실패"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def respond(self, kwargs):
+        stage, text = super().respond(kwargs)
+        if stage == "nlg" and self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("provider error")
+        return stage, text
+
+
+@pytest.fixture
+def chat_app(monkeypatch):
+    monkeypatch.setenv("SUMMARY_PRECOMPUTE", "false")
+    import run_chatbot
+    from singleflight import SingleFlight
+    monkeypatch.setattr(run_chatbot, "chat_flight", SingleFlight(enabled=True, ttl=10))
+    return run_chatbot
+
+
+def payload(session_id):
+    return {
+        "message": "잠을 잘 못 자요", "user_id": "flight_user", "session_id": session_id, "timestamp": 1,
+        "history": "Bot: 잠은 잘 주무세요?", "last_bot_message": "잠은 잘 주무세요?", "status": initial_status(),
+        "messageCount": 3, "selectedPolicies": [], "tonePreference": "미선택", "conversationStyle": "미선택"
+    }
+
+
+def post_twice(chat_app, client, session_id):
+    async def scenario():
+        test_client = chat_app.app.test_client()
+        first = await (await test_client.post("/api/chat", json=payload(session_id))).get_json()
+        second = await (await test_client.post("/api/chat", json=payload(session_id))).get_json()
+        return first, second
+    return asyncio.run(scenario())
+
+
+def zero_latency():
+    return LatencyModel({stage: 0 for stage in DEFAULT_LATENCY_MEDIANS}, sigma=0, tokens_per_second=0)
+
+
+def test_duplicate_after_success_reuses_result(chat_app, monkeypatch):
+    client = MockOpenAIClient(latency=zero_latency())
+    monkeypatch.setattr(chat_app, "client", client)
+    first, second = post_twice(chat_app, client, "flight_ok")
+    calls = client.calls
+    assert first == second
+    assert calls > 0
+    post_twice(chat_app, client, "flight_ok")
+    assert client.calls == calls
+
+
+def test_failure_fallback_is_not_reused(chat_app, monkeypatch):
+    monkeypatch.setattr("llm_client.LLM_MAX_RETRIES", 1)
+    client = MockOpenAIClient(FailingNLGResponder(failures=1), zero_latency())
+    monkeypatch.setattr(chat_app, "client", client)
+    first, second = post_twice(chat_app, client, "flight_failed")
+    assert first["response"] == RESPONSE_FAILURE_MESSAGE
+    assert second["response"] == CANNED_OUTPUTS["nlg"]
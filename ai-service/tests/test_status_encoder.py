@@ -0,0 +1,51 @@
+import pytest
+
+import status_encoder
+from status_encoder import encode_question, encode_status, summarize_raw_inputs
+
+
+def status(**first_question):
+    return {
+        "is_completed": False, "last_asked_question": "Q1", "last_answered_question": None,
+        "questions": [
+            {"questionId": "Q1", "questionText": "잠을 잘 못 잔다", "status": "asking", "experience": "yes",
+             "frequency": None, "condition": "", "rawUserInput": [], **first_question},
+            {"questionId": "Q2", "questionText": "식욕이 줄었다", "status": "unanswered", "experience": None, "rawUserInput": []},
+        ]
+    }
+
+
+@pytest.fixture(autouse=True)
+def compact(monkeypatch):
+    monkeypatch.setattr(status_encoder, "STATUS_ENCODING", "compact")
+
+
+def test_encode_status_writes_header_and_one_row_per_question():
+    assert encode_status(status(), ("questionText", "status", "experience")) == "\n".join([
+        "is_completed: false, last_asked_question: Q1, last_answered_question: None",
+        "- Q1: 잠을 잘 못 잔다 (status: asking, experience: yes)",
+        "- Q2: 식욕이 줄었다 (status: unanswered)",
+    ])
+
+
+def test_fields_follow_field_order_and_skip_empty_values():
+    question = {"questionId": "Q3", "note": "가끔", "frequency": "주 2회", "status": "checking", "condition": "null"}
+    assert encode_question(question, ("note", "status", "frequency", "condition")) == "- Q3 (status: checking, frequency: 주 2회, note: 가끔)"
+
+
+def test_question_filter_and_no_header():
+    encoded = encode_status(status(), ("status",), include_header=False, question_filter=lambda q: q["status"] != "unanswered")
+    assert encoded == "- Q1 (status: asking)"
+
+
+def test_raw_user_input_keeps_recent_truncated_inputs():
+    inputs = ["첫 번째", "두 번째", "요즘   잠들기까지 한참 걸리고 새벽에 자꾸 깨요"]
+    assert summarize_raw_inputs(inputs, limit=2, max_chars=10) == '(이전 1건 생략) / "두 번째" / "요즘 잠들기까지 …"'
+    assert summarize_raw_inputs([]) is None
+    encoded = encode_status(status(rawUserInput=["잠이 안 와요"]), ("rawUserInput",), include_header=False)
+    assert encoded.splitlines()[0] == '- Q1 (rawUserInput: "잠이 안 와요")'
+
+
+def test_raw_encoding_returns_dict_text(monkeypatch):
+    monkeypatch.setattr(status_encoder, "STATUS_ENCODING", "raw")
+    assert encode_status(status(), ("status",)) == str(status())
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from NLG import StreamPostProcessor
+
+TEXTS = [
+    "그러셨군요. 조금 더 자세히 이야기해 주실 수 있을까요?",
+    "  \n앞뒤 공백과 줄바꿈이 있는 응답\n\n",
+    "첫 문단입니다.\n\n두 번째 문단입니다.\n\n\n세 번째 문단입니다.",
+    "줄바꿈 \n\n 사이 공백\t\n\n\n\n끝",
+    "\n\n\n",
+    "",
+]
+
+
+def post_process(text):
+    # 스트리밍하지 않는 경로: NLG의 strip() 후 run_chatbot의 replace("\n\n", "\n").strip()
+    return text.strip().replace("\n\n", "\n").strip()
+
+
+def stream(chunks):
+    processor = StreamPostProcessor()
+    return "".join(processor.feed(chunk) for chunk in chunks)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_streamed_output_matches_non_streamed_post_processing(text):
+    assert stream([text]) == post_process(text)
+    assert stream(list(text)) == post_process(text)
+
+    rng = random.Random(len(text))
+    for _ in range(20):
+        cuts = sorted(rng.sample(range(len(text) + 1), k=min(len(text) + 1, 4)))
+        chunks = [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+        assert stream(chunks) == post_process(text)
+
+
+def test_whitespace_is_held_until_next_character():
+    processor = StreamPostProcessor()
+    assert processor.feed("\n안녕") == "안녕"
+    assert processor.feed("하세요\n\n") == "하세요"
+    assert processor.feed("\n반가워요") == "\n\n반가워요"
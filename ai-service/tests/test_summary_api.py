@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from summary_jobs import SummaryJobQueue
+
+MESSAGES = [{"sender": "bot", "text": "잠은 잘 주무세요?"}, {"sender": "user", "text": "잘 못 자요"}]
+
+
+@pytest.fixture
+def summary_app(monkeypatch):
+    import run_chatbot
+    monkeypatch.setattr(run_chatbot, "summary_jobs", SummaryJobQueue(workers=1, max_queued=10, ttl=60))
+    calls = []
+
+    async def build_summary_result(user_id, session_id, messages, session_data, status_data):
+        calls.append((user_id, session_id, messages, session_data, status_data))
+        return {"success": True, "report": f"레포트 {len(calls)}"}, 200
+
+    async def fetch_and_build_summary(user_id, session_id):
+        raise AssertionError("본문으로 받은 요청은 API 서버를 조회하지 않음")
+
+    monkeypatch.setattr(run_chatbot, "build_summary_result", build_summary_result)
+    monkeypatch.setattr(run_chatbot, "fetch_and_build_summary", fetch_and_build_summary)
+    return run_chatbot, calls
+
+
+def post_summaries(run_chatbot, *bodies):
+    async def scenario():
+        test_client = run_chatbot.app.test_client()
+        results = []
+        for body in bodies:
+            response = await test_client.post("/api/summary", json=body)
+            results.append((response.status_code, await response.get_json()))
+        await run_chatbot.summary_jobs.stop()
+        return results
+
+    return asyncio.run(scenario())
+
+
+def test_summary_is_built_from_request_body(summary_app):
+    run_chatbot, calls = summary_app
+    body = {"user_id": "u1", "session_id": "s1", "messages": MESSAGES, "session": {"messageCount": 2}, "status": {"questions": []}}
+    [(status_code, data)] = post_summaries(run_chatbot, body)
+    assert (status_code, data) == (200, {"success": True, "report": "레포트 1"})
+    assert calls == [("u1", "s1", MESSAGES, {"messageCount": 2}, {"questions": []})]
+
+
+def test_summary_body_is_not_served_from_previous_result(summary_app):
+    run_chatbot, calls = summary_app
+    body = {"user_id": "u1", "session_id": "s1", "messages": MESSAGES}
+    results = post_summaries(run_chatbot, body, {**body, "messages": MESSAGES * 2})
+    assert [data["report"] for _, data in results] == ["레포트 1", "레포트 2"]
+    assert calls[1][2] == MESSAGES * 2 and calls[1][3:] == ({}, {})
+
+
+@pytest.mark.parametrize("body", [{"user_id": "u1", "session_id": "s1"}, {"user_id": "u1", "session_id": "s1", "messages": "안녕"}])
+def test_summary_without_messages_array_is_rejected(summary_app, body):
+    run_chatbot, calls = summary_app
+    [(status_code, data)] = post_summaries(run_chatbot, body)
+    assert status_code == 400 and data["success"] is False
+    assert calls == []
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from summary_jobs import SummaryJobQueue, SummaryQueueFull
+
+
+def report_job(calls, status_code=200):
+    async def job():
+        calls.append(1)
+        return {"success": status_code == 200, "error": None if status_code == 200 else "실패"}, status_code
+    return job
+
+
+def test_same_session_job_is_deduplicated():
+    async def scenario():
+        queue = SummaryJobQueue(workers=1, max_queued=10, ttl=60)
+        calls = []
+        first = queue.submit("user", "s1", report_job(calls))
+        assert queue.submit("user", "s1", report_job(calls)) is first
+
+        await queue.wait(first, timeout=1)
+        assert first.status == "completed" and len(calls) == 1
+        # 완료된 작업은 force가 없으면 재사용, force면 새로 생성
+        assert queue.submit("user", "s1", report_job(calls)) is first
+        forced = queue.submit("user", "s1", report_job(calls), force=True)
+        assert forced is not first
+        await queue.wait(forced, timeout=1)
+        assert len(calls) == 2
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_is_resubmitted():
+    async def scenario():
+        queue = SummaryJobQueue(workers=1, max_queued=10, ttl=60)
+        calls = []
+        failed = await queue.wait(queue.submit("user", "s2", report_job(calls, 500)), timeout=1)
+        assert failed.status == "failed" and failed.error == "실패"
+        retried = queue.submit("user", "s2", report_job(calls))
+        assert retried is not failed
+        assert (await queue.wait(retried, timeout=1)).status == "completed"
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_new_sessions():
+    async def scenario():
+        # 워커가 없어 작업이 대기열에 그대로 남음
+        queue = SummaryJobQueue(workers=0, max_queued=1, ttl=60)
+        queued = queue.submit("user", "s3", report_job([]))
+        with pytest.raises(SummaryQueueFull):
+            queue.submit("user", "s4", report_job([]))
+        assert queue.get("user", "s4") is None
+        # 이미 대기 중인 세션은 대기열이 가득 차도 기존 작업을 반환
+        assert queue.submit("user", "s3", report_job([])) is queued
+
+    asyncio.run(scenario())
+
+
+def test_finished_job_expires_after_ttl():
+    async def scenario():
+        queue = SummaryJobQueue(workers=1, max_queued=10, ttl=60)
+        job = await queue.wait(queue.submit("user", "s5", report_job([])), timeout=1)
+        assert queue.get("user", "s5") is job
+        job.finished_at -= 61
+        assert queue.get("user", "s5") is None
+        await queue.stop()
+
+    asyncio.run(scenario())
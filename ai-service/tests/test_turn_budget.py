@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+import turn_budget
+from NLG import limit_max_tokens
+from turn_budget import (
+    TURN_DEGRADE_DP_BELOW, TURN_DEGRADE_DST_BELOW, TURN_DEGRADE_NLG_BELOW, TURN_MIN_CALL_SECONDS,
+    TurnBudget, call_deadline, start_turn
+)
+
+
+def run_in_turn(seconds, check):
+    async def scenario():
+        start_turn(seconds)
+        return check()
+    return asyncio.run(scenario())
+
+
+def test_budget_is_disabled_by_default():
+    assert turn_budget.TURN_BUDGET_SECONDS == 0
+
+    def check():
+        budget = TurnBudget()
+        return budget.deadline, budget.degrade("skip_dst", TURN_DEGRADE_DST_BELOW), call_deadline("nlu", 0)
+
+    assert run_in_turn(0, check) == (None, False, None)
+
+
+@pytest.mark.parametrize("remaining, expected", [
+    (20, []),
+    (8, ["skip_dst"]),
+    (5, ["skip_dst", "rule_policy"]),
+    (3, ["skip_dst", "rule_policy", "short_nlg"]),
+])
+def test_degrade_thresholds(remaining, expected):
+    def check():
+        budget = turn_budget.current_turn()
+        budget.degrade("skip_dst", TURN_DEGRADE_DST_BELOW)
+        budget.degrade("rule_policy", TURN_DEGRADE_DP_BELOW)
+        budget.degrade("short_nlg", TURN_DEGRADE_NLG_BELOW)
+        return budget.degradations
+
+    assert run_in_turn(remaining, check) == expected
+
+
+def test_short_nlg_limits_max_tokens():
+    assert run_in_turn(20, lambda: limit_max_tokens(300)) == 300
+    assert run_in_turn(1, lambda: limit_max_tokens(300)) == turn_budget.TURN_NLG_MAX_TOKENS
+
+
+def test_call_deadline_keeps_minimum_call_time():
+    def check():
+        loop_time = asyncio.get_running_loop().time()
+        deadline = turn_budget.current_turn().deadline
+        return (
+            call_deadline("nlu", loop_time) == deadline,
+            call_deadline("nlg", loop_time + 30) == loop_time + 30 + TURN_MIN_CALL_SECONDS,
+            call_deadline("summary", loop_time),
+        )
+
+    assert run_in_turn(10, check) == (True, True, None)
+
+
+def test_call_deadline_without_turn():
+    assert call_deadline("nlu", 0) is None
@@ -0,0 +1,82 @@
+# turn_budget.py - 턴 단위 지연 시간 예산 (모든 단계에 마감 시각을 전달하고, 남은 시간이 부족하면 단계별로 품질을 낮춤)
+import asyncio
+import contextvars
+import os
+
+from logger_config import ai_logger
+from metrics import increment_counter
+
+# 한 턴(NLU → DST → DP → NLG)에 허용하는 시간 (초, 기본값 0: 사용하지 않음)
+TURN_BUDGET_SECONDS = float(os.environ.get("TURN_BUDGET_SECONDS", "0"))
+# 단계 시작 시점의 남은 시간이 아래 값보다 적으면 해당 단계를 축소
+TURN_DEGRADE_DST_BELOW = float(os.environ.get("TURN_DEGRADE_DST_BELOW", "10"))  # DST 생략, 이전 상태 유지
+TURN_DEGRADE_DP_BELOW = float(os.environ.get("TURN_DEGRADE_DP_BELOW", "6"))     # DP 대신 플래너/규칙 기반 정책
+TURN_DEGRADE_NLG_BELOW = float(os.environ.get("TURN_DEGRADE_NLG_BELOW", "4"))   # NLG max_tokens 축소
+TURN_NLG_MAX_TOKENS = int(os.environ.get("TURN_NLG_MAX_TOKENS", "120"))
+# 예산이 거의 남지 않았더라도 GPT 호출 1회에 보장하는 최소 시간 (마지막 단계가 응답을 만들 수 있도록)
+TURN_MIN_CALL_SECONDS = float(os.environ.get("TURN_MIN_CALL_SECONDS", "2"))
+# 턴 예산을 적용하는 단계 (요약/메모리 갱신처럼 턴이 끝난 뒤 백그라운드로 실행되는 호출은 제외)
+TURN_STAGES = ("nlu", "planner", "dst", "dp", "nlg")
+
+_current_budget = contextvars.ContextVar("turn_budget", default=None)
+
+
+class TurnBudget:
+    """한 턴의 마감 시각과 이번 턴에 적용된 축소(degradation) 목록"""
+
+    def __init__(self, seconds=TURN_BUDGET_SECONDS):
+        loop = asyncio.get_running_loop()
+        self.deadline = loop.time() + seconds if seconds > 0 else None
+        self.degradations = []
+
+    def remaining(self):
+        """남은 시간 (초, 예산을 사용하지 않으면 None)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - asyncio.get_running_loop().time()
+
+    def degrade(self, name, below):
+        """
+        남은 시간이 below초보다 적으면 축소를 기록하고 True를 반환
+
+        Args:
+            name (str): 축소 이름 (skip_dst, rule_policy, short_nlg)
+            below (float): 기준 시간 (초)
+        """
+        remaining = self.remaining()
+        if remaining is None or remaining >= below:
+            return False
+        if name not in self.degradations:
+            self.degradations.append(name)
+            increment_counter("turn_degradations_total", degradation=name)
+            ai_logger.warning(f"⏳ 턴 예산 부족 ({remaining:.1f}초 남음): {name} 적용")
+        return True
+
+
+def start_turn(seconds=TURN_BUDGET_SECONDS):
+    """새 턴의 예산을 만들고 현재 컨텍스트(이후 생성되는 태스크 포함)에 설정"""
+    budget = TurnBudget(seconds)
+    _current_budget.set(budget)
+    return budget
+
+
+def use_turn(budget):
+    """이미 만든 턴 예산을 현재 컨텍스트에 설정 (스트리밍 응답 생성기처럼 다른 컨텍스트에서 이어서 실행할 때 사용)"""
+    _current_budget.set(budget)
+
+
+def current_turn():
+    """현재 컨텍스트의 턴 예산 (없으면 None)"""
+    return _current_budget.get()
+
+
+def call_deadline(stage, loop_time):
+    """
+    stage 단계의 GPT 호출에 적용할 턴 마감 시각 (턴 예산이 없거나 턴 단계가 아니면 None)
+
+    마감이 임박했거나 지났더라도 지금부터 TURN_MIN_CALL_SECONDS초는 보장합니다.
+    """
+    budget = current_turn()
+    if stage not in TURN_STAGES or budget is None or budget.deadline is None:
+        return None
+    return max(budget.deadline, loop_time + TURN_MIN_CALL_SECONDS)
@@ -12,6 +12,8 @@ require("dotenv").config();
 // AI 서비스 URL 환경변수
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL;
 const WINDOW_SIZE = parseInt(process.env.WINDOW_SIZE) || 10; // 기본값 10
+// AI 서비스 응답 대기 시간 (ms, AI 서비스의 TURN_BUDGET_SECONDS보다 길게)
+const AI_SERVICE_TIMEOUT = parseInt(process.env.AI_SERVICE_TIMEOUT) || 30000; // 기본값 30초
 
 module.exports = function () {
   const router = express.Router();  
@@ -323,7 +325,9 @@ module.exports = function () {
       logger.info(`👤 [USER]: "${userMessage}"`);
       
       // Flask에 현재 메시지, 히스토리와 새로운 데이터 전송
-      const botResponse = await axios.post(`${AI_SERVICE_URL}/api/chat`, aiRequestData);
+      const botResponse = await axios.post(`${AI_SERVICE_URL}/api/chat`, aiRequestData, {
+        timeout: AI_SERVICE_TIMEOUT
+      });
     
       const { 
         response: chatbotReply, 
@@ -336,7 +340,8 @@ module.exports = function () {
         last_asked_question,
         last_asked_question_text,
         last_answered_question,
-        selected_policies
+        selected_policies,
+        degradations
       } = botResponse.data;
 
       logger.info(`🤖 [BOT]: "${chatbotReply}" (${chatbotReply?.length}자)`);
@@ -347,6 +352,9 @@ module.exports = function () {
       logger.info(`🎯 [LAST_ASKED_QUESTION_TEXT]: ${last_asked_question_text}`);
       logger.info(`🎯 [LAST_ANSWERED_QUESTION]: ${last_answered_question}`);
       logger.info(`🎯 [SELECTED_POLICIES]: ${selected_policies}`);
+      if (degradations && degradations.length > 0) {
+        logger.warn(`⏳ [DEGRADATIONS]: ${degradations.join(", ")}`);
+      }
 
       // 통합 저장 처리 (Chat + Session 메시지 + 정책 + 상태)
       try {
@@ -457,6 +465,17 @@ module.exports = function () {
 
     } catch (error) {
       logger.error("❌ [ERROR] AI 서비스 통신 실패:", error.message);
+      if (error.code === "ECONNABORTED") {
+        return res.status(504).json({ error: "에이전트 모델의 응답 시간이 초과되었습니다." });
+      }
+      // AI 서비스 수락 제어: 같은 세션의 이전 메시지 처리 중(409) 또는 대기열 초과(503)
+      if (error.response && [409, 503].includes(error.response.status)) {
+        const retryAfter = error.response.headers["retry-after"];
+        if (retryAfter) {
+          res.set("Retry-After", retryAfter);
+        }
+        return res.status(error.response.status).json({ error: error.response.data.error });
+      }
       return res.status(500).json({ error: "에이전트 모델로부터 응답을 받지 못했습니다." });
     }
   });
@@ -4,10 +4,13 @@ const express = require("express");
 const axios = require("axios");
 const logger = require("../config/logger");
 const Session = require("../models/Session");
+const Status = require("../models/Status");
 require("dotenv").config();
 
 // AI 서비스 URL 환경변수
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL;
+// true이면 대화 내용/세션/상태를 요청 본문으로 전달 (AI 서비스가 API 서버를 다시 조회하지 않음)
+const SUMMARY_PUSH_MODE = process.env.SUMMARY_PUSH_MODE === "true";
 
 module.exports = function () {
   const router = express.Router();
@@ -60,14 +63,34 @@ module.exports = function () {
       // 3. 캐시된 summary가 없으면 AI 서비스에 요청
       logger.info(`🤖 [SUMMARY] AI 서비스로 새 레포트 생성 요청 - User: ${userId}, Session: ${sessionId}`);
       
-      const aiServiceUrl = `${AI_SERVICE_URL}/api/summary/${userId}/${sessionId}`;
-      
-      const response = await axios.get(aiServiceUrl, {
+      const requestConfig = {
         timeout: 30000, // 30초 타임아웃
         headers: {
           'Content-Type': 'application/json'
         }
-      });
+      };
+
+      let response;
+      if (SUMMARY_PUSH_MODE) {
+        // 이미 조회한 세션과 상태 정보를 본문에 담아 전달
+        const status = await Status.findOrCreate(userId, sessionId);
+        response = await axios.post(`${AI_SERVICE_URL}/api/summary`, {
+          user_id: userId,
+          session_id: sessionId,
+          messages: session.messages,
+          session: {
+            isFinished: session.isFinished || false,
+            messageCount: session.messageCount || 0,
+            totalDuration: session.totalDuration || 0,
+            selectedPolicies: session.selectedPolicies || [],
+            tonePreference: session.tonePreference || null,
+            conversationStyle: session.conversationStyle || null
+          },
+          status: status.toObject()
+        }, requestConfig);
+      } else {
+        response = await axios.get(`${AI_SERVICE_URL}/api/summary/${userId}/${sessionId}`, requestConfig);
+      }
       
       if (response.status === 200 && response.data.success) {
         logger.info(`✅ [SUMMARY] AI 서비스에서 레포트 생성 성공 - User: ${userId}, Session: ${sessionId}`);
@@ -93,6 +116,15 @@ module.exports = function () {
           from_cache: false
         });
         
+      } else if (response.status === 202) {
+        // AI 서비스에서 레포트를 아직 생성 중 (잠시 후 다시 요청하면 완료된 결과를 받음)
+        logger.info(`⏳ [SUMMARY] 레포트 생성 진행 중 - User: ${userId}, Session: ${sessionId}`);
+        res.status(202).json({
+          success: false,
+          pending: true,
+          error: "레포트를 생성하고 있습니다. 잠시 후 다시 시도해주세요."
+        });
+
       } else {
         logger.error(`❌ [SUMMARY] AI 서비스 응답 실패 - User: ${userId}, Session: ${sessionId}`);
         res.status(500).json({